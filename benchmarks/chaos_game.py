@@ -0,0 +1,22 @@
+import time
+
+from src.sierpinski import ChaosGame, shapes
+
+
+def main(points: int = 4_000_000, divisions: int = 200):
+    for name, make_system in shapes.items():
+        system = make_system()
+        grid = system.fit_grid(divisions=divisions)
+
+        for mode in ["numpy", "jit", "parallel"]:
+            ChaosGame(system, grid, points=10_000, mode=mode).compute()
+
+            start = time.perf_counter()
+            ChaosGame(system, grid, points=points, mode=mode).compute()
+            elapsed = time.perf_counter() - start
+
+            print(f"{name:<9} {mode:<9} {points / elapsed / 1e6:.1f}M points/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import time
+import tracemalloc
+
+from src.l_system import LSystem
+from src.turtle_graphics import TurtleRenderer
+
+
+def expand_by_concatenation(system: LSystem, n: int) -> str:
+    # The expansion before the bulk path, one character at a time
+    input = system.axiom
+
+    for iteration in range(n):
+        result = ""
+        for char in input:
+            result += system.rules[char] if char in system.rules else char
+        input = result
+
+    return input
+
+
+def main():
+    # Koch curve and fractal plant, the usual deep generation workloads
+    systems = {
+        "koch": LSystem("F", {"F": "F+F-F-F+F"}),
+        "plant": LSystem("X", {"X": "F+[[X]-X]-F[-FX]+X", "F": "FF"}),
+    }
+
+    for name, system in systems.items():
+        for n in [6, 8]:
+            start = time.perf_counter()
+            expand_by_concatenation(system, n)
+            concatenation_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            generation = system.get_generation(n)
+            bulk_time = time.perf_counter() - start
+
+            print(
+                f"{name:<6} generation {n:>2} ({len(generation)} symbols): "
+                f"concatenation {concatenation_time:.3f}s, "
+                f"bulk {bulk_time:.4f}s"
+            )
+
+        for n in [10, 12]:
+            start = time.perf_counter()
+            length = system.length(n)
+            prediction_time = time.perf_counter() - start
+
+            # Streamed symbols are counted without holding the generation
+            tracemalloc.start()
+            start = time.perf_counter()
+            streamed = sum(len(chunk) for chunk in system.chunks(n))
+            stream_time = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            assert streamed == length
+            print(
+                f"{name:<6} generation {n:>2} ({length} symbols): "
+                f"predicted in {prediction_time * 1e3:.2f}ms, "
+                f"streamed in {stream_time:.3f}s with peak {peak / 2**10:.0f}KiB"
+            )
+
+    # Both turtle passes stream the symbols, so drawing time grows linearly
+    angles = {"koch": 90, "plant": 25}
+    for name, system in systems.items():
+        TurtleRenderer(system, generations=2, angle=angles[name]).compute()
+
+        for n in [8, 10]:
+            start = time.perf_counter()
+            TurtleRenderer(system, generations=n, angle=angles[name]).compute()
+            draw_time = time.perf_counter() - start
+
+            print(
+                f"{name:<6} generation {n:>2} drawn in {draw_time:.3f}s "
+                f"({system.length(n) / draw_time / 1e6:.1f}M symbols/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import time
+
+from src.perturbation import PerturbedMandelbrot
+from src.render import render
+
+# A point on the boundary of the set found by bisection along y = 0.11
+CENTER_X = "-0.740910148767786192206219086538576190509503003033444080544251609104844"
+CENTER_Y = "0.11"
+
+
+def main(divisions: int = 100, samples: int = 2, max_iterations: int = 20000):
+    print(
+        f"{'size':>8} {'skip':>7} {'saved per frame':>16} {'fraction':>9} "
+        f"{'plain (s)':>10} {'series (s)':>11}"
+    )
+
+    for side_length in [1e-10, 1e-30, 1e-60]:
+        times = {}
+        for series in [False, True]:
+            perturbed_mandelbrot = PerturbedMandelbrot(
+                max_iterations=max_iterations,
+                center_x=CENTER_X,
+                center_y=CENTER_Y,
+                side_length=side_length,
+                series=series,
+            )
+            average_escape_field_function = (
+                perturbed_mandelbrot.build_average_escape_field_function(mode="jit")
+            )
+
+            # Warm up the JIT compilation on a small grid before timing
+            render(
+                perturbed_mandelbrot.delta_grid(divisions=4),
+                average_escape_field_function,
+                samples=1,
+            )
+
+            grid = perturbed_mandelbrot.delta_grid(divisions=divisions)
+            start = time.perf_counter()
+            results = render(grid, average_escape_field_function, samples=samples)
+            times[series] = time.perf_counter() - start
+
+        sample_count = results.size * samples**2
+        iterations_saved = perturbed_mandelbrot.iterations_saved(sample_count)
+        iterations_total = results.sum() * samples**2
+
+        print(
+            f"{side_length:>8.0e} {perturbed_mandelbrot.series_skip:>7} "
+            f"{iterations_saved:>16} {iterations_saved / iterations_total:>9.2%} "
+            f"{times[False]:>10.3f} {times[True]:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMAND = [sys.executable, "main.py", "mandelbrot", "-c", "-0.5", "0", "-s", "3"]
+
+CASES = [
+    ("normal", ["-m", "normal", "-d", "40", "-i", "100"]),
+    ("jit", ["-m", "jit", "-d", "40", "-i", "100"]),
+    ("parallel", ["-m", "parallel", "-d", "40", "-i", "100"]),
+    ("numpy", ["-m", "numpy", "-d", "40", "-i", "100"]),
+]
+
+
+def first_frame_latency(arguments: list[str], cache_directory: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        COMMAND + arguments,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        env={**os.environ, "NUMBA_CACHE_DIR": cache_directory},
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    # Each case starts from an empty numba cache, so the first run compiles
+    # every kernel and the second loads them from disk
+    print(f"{'mode':<10} {'cold (s)':>9} {'cached (s)':>11} {'warmed (s)':>11}")
+
+    for name, arguments in CASES:
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cold = first_frame_latency(arguments, cache_directory)
+            cached = first_frame_latency(arguments, cache_directory)
+
+        with tempfile.TemporaryDirectory() as cache_directory:
+            subprocess.run(
+                [sys.executable, "main.py", "warmup"],
+                check=True,
+                stderr=subprocess.DEVNULL,
+                env={**os.environ, "NUMBA_CACHE_DIR": cache_directory},
+            )
+            warmed = first_frame_latency(arguments, cache_directory)
+
+        print(f"{name:<10} {cold:>9.3f} {cached:>11.3f} {warmed:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import time
+
+from src.burning_ship import BurningShip
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet
+from src.mandelbrot import Mandelbrot
+from src.render import render, render_subdivided
+
+CASES = [
+    ("mandelbrot", Mandelbrot(max_iterations=1000), ComplexPoint(-0.5, 0), 3),
+    (
+        "mandelbrot zoom",
+        Mandelbrot(max_iterations=1000),
+        ComplexPoint(-0.745, 0.11),
+        0.02,
+    ),
+    (
+        "julia",
+        JuliaSet(max_iterations=1000, parameter=ComplexPoint(-0.8, 0.156)),
+        ComplexPoint(0, 0),
+        3.2,
+    ),
+    ("burningship", BurningShip(max_iterations=1000), ComplexPoint(-0.5, -0.5), 3.5),
+]
+
+
+def main(divisions: int = 400, samples: int = 1):
+    print(
+        f"{'case':<16} {'evaluated':>10} {'total':>10} {'fraction':>9} "
+        f"{'full (s)':>9} {'subdiv (s)':>10} {'identical':>9}"
+    )
+
+    for name, fractal, center, size in CASES:
+        grid = generate_square_grid(
+            center=center, side_length=size, divisions=divisions
+        )
+
+        average_escape_field_function = fractal.build_average_escape_field_function(
+            mode="jit"
+        )
+        subdivided_average_escape_field_function = (
+            fractal.build_subdivided_average_escape_field_function(mode="jit")
+        )
+
+        # Warm up the JIT compilation on a small grid before timing
+        small_grid = generate_square_grid(center=center, side_length=size, divisions=4)
+        render(small_grid, average_escape_field_function, samples=samples)
+        render_subdivided(small_grid, subdivided_average_escape_field_function, samples)
+
+        start = time.perf_counter()
+        expected = render(grid, average_escape_field_function, samples=samples)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results, cells_evaluated = render_subdivided(
+            grid, subdivided_average_escape_field_function, samples=samples
+        )
+        subdivided_time = time.perf_counter() - start
+
+        print(
+            f"{name:<16} {cells_evaluated:>10} {results.size:>10} "
+            f"{cells_evaluated / results.size:>9.2%} {full_time:>9.3f} "
+            f"{subdivided_time:>10.3f} {str((results == expected).all()):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
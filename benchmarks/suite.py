@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from src.burning_ship import BurningShip
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet
+from src.lyapunov import Lyapunov
+from src.mandelbrot import Mandelbrot
+from src.perturbation import PerturbedMandelbrot
+from src.render import Renderer
+
+MODES = ["normal", "jit", "parallel", "numpy", "gpu"]
+
+# Fractal and mode pairs without kernels, which run skips. Any other case
+# that raises fails the run
+UNSUPPORTED = {("perturbation", "gpu")}
+
+# Views with both escaping and interior cells, so throughput reflects a mix
+FRACTALS = {
+    "mandelbrot": (
+        lambda max_iterations: Mandelbrot(max_iterations=max_iterations),
+        ComplexPoint(-0.5, 0),
+        3,
+    ),
+    "julia": (
+        lambda max_iterations: JuliaSet(
+            max_iterations=max_iterations, parameter=ComplexPoint(-0.8, 0.156)
+        ),
+        ComplexPoint(0, 0),
+        3,
+    ),
+    "burningship": (
+        lambda max_iterations: BurningShip(max_iterations=max_iterations),
+        ComplexPoint(-0.4, -0.6),
+        3,
+    ),
+    "lyapunov": (
+        lambda max_iterations: Lyapunov(max_iterations=max_iterations, sequence="AB"),
+        ComplexPoint(3, 3),
+        1,
+    ),
+    "perturbation": (
+        lambda max_iterations: PerturbedMandelbrot(
+            max_iterations=max_iterations,
+            center_x=Decimal("-0.743643887037151"),
+            center_y=Decimal("0.131825904205330"),
+            side_length=1e-10,
+        ),
+        None,
+        None,
+    ),
+}
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    # DIVISIONSxITERATIONS, e.g. 80x400
+    try:
+        divisions, iterations = value.lower().split("x")
+        return int(divisions), int(iterations)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: '{value}'")
+
+
+def case_name(case: dict) -> str:
+    return (
+        f"{case['fractal']}/{case['mode']}/"
+        f"{case['divisions']}x{case['iterations']}x{case['samples']}"
+    )
+
+
+def run_case(
+    fractal_name: str,
+    mode: str,
+    divisions: int,
+    max_iterations: int,
+    samples: int,
+    repeats: int,
+) -> dict | None:
+    make_fractal, center, side_length = FRACTALS[fractal_name]
+    fractal = make_fractal(max_iterations)
+    grid = (
+        fractal.delta_grid(divisions=divisions)
+        if center is None
+        else generate_square_grid(
+            center=center, side_length=side_length, divisions=divisions
+        )
+    )
+
+    if (fractal_name, mode) in UNSUPPORTED:
+        return None
+
+    renderer = Renderer(fractal=fractal, grid=grid, mode=mode, samples=samples)
+
+    # The first frame includes compiling the kernels or loading them from the
+    # on disk cache, and is kept apart from the throughput
+    start = time.perf_counter()
+    results = renderer.compute()
+    first_seconds = time.perf_counter() - start
+
+    seconds = []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        renderer.compute()
+        seconds.append(time.perf_counter() - start)
+    best = min(seconds)
+
+    # Iterations the kernels ran in the timed renders, counted inside them.
+    # Escape counts would overstate them for points that interior checks,
+    # series approximation or early exits skip. The numpy and gpu kernels do
+    # not count, so their iteration throughput is left unknown
+    pixels = results.size
+    iterations = renderer.stats.iterations
+
+    return {
+        "fractal": fractal_name,
+        "mode": mode,
+        "divisions": divisions,
+        "iterations": max_iterations,
+        "samples": samples,
+        "pixels": pixels,
+        "iterations_performed": iterations,
+        "seconds": best,
+        "first_seconds": first_seconds,
+        "compile_seconds": max(first_seconds - best, 0.0),
+        "mpixels_per_second": pixels / best / 1e6,
+        "miterations_per_second": None
+        if iterations is None
+        else iterations / best / 1e6,
+    }
+
+
+def machine() -> dict:
+    import numba
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": numba.__version__,
+    }
+
+
+def run(arguments: argparse.Namespace) -> int:
+    modes = list(arguments.modes)
+    if "gpu" in modes:
+        from numba import cuda
+
+        if not cuda.is_available():
+            print("Skipping the gpu mode, no CUDA device", file=sys.stderr)
+            modes.remove("gpu")
+
+    cases = []
+    for fractal_name in arguments.fractals:
+        for mode in modes:
+            for divisions, max_iterations in arguments.sizes:
+                case = run_case(
+                    fractal_name,
+                    mode,
+                    divisions,
+                    max_iterations,
+                    arguments.samples,
+                    arguments.repeats,
+                )
+                if case is None:
+                    continue
+
+                cases.append(case)
+                miterations = (
+                    f"{case['miterations_per_second']:>10.2f} Miter/s "
+                    if case["miterations_per_second"] is not None
+                    else ""
+                )
+                print(
+                    f"{case_name(case):<40} {case['mpixels_per_second']:>10.4f} Mpixel/s "
+                    f"{miterations}(first frame {case['first_seconds']:.3f}s)",
+                    file=sys.stderr,
+                )
+
+    with open(arguments.output, "w") as file:
+        json.dump({"machine": machine(), "cases": cases}, file, indent=2)
+
+    return 0
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    threshold: float,
+    metric: str = "mpixels_per_second",
+) -> list[str]:
+    # Baseline cases whose metric fell by more than threshold, or that are
+    # missing from the current results. Cases without the metric, such as the
+    # iterations of modes that do not count them, are not compared
+    current_cases = {case_name(case): case for case in current["cases"]}
+
+    regressions = []
+    for case in baseline["cases"]:
+        name = case_name(case)
+        before = case.get(metric)
+        if name not in current_cases:
+            shown = "n/a" if before is None else f"{before:.4f}"
+            print(f"{name:<40} {shown:>10} {'missing':>10}")
+            regressions.append(name)
+            continue
+
+        after = current_cases[name].get(metric)
+        if before is None or after is None:
+            print(f"{name:<40} {'n/a':>10} {'n/a':>10}")
+            continue
+
+        change = after / before - 1
+
+        print(f"{name:<40} {before:>10.4f} {after:>10.4f} {change:>+8.1%}")
+        if change < -threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def compare(arguments: argparse.Namespace) -> int:
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+    with open(arguments.current) as file:
+        current = json.load(file)
+
+    print(f"{'case':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    regressions = compare_results(
+        baseline, current, arguments.threshold, arguments.metric
+    )
+
+    if regressions:
+        print(
+            f"{len(regressions)} cases dropped by more than {arguments.threshold:.0%} "
+            "or are missing: " + ", ".join(regressions),
+            file=sys.stderr,
+        )
+        return 1
+
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite",
+        description="Throughput of every fractal and mode, and comparison against a baseline",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark and write the results")
+    run_parser.add_argument("-o", "--output", default="benchmark.json", metavar="PATH")
+    run_parser.add_argument(
+        "--fractals", nargs="+", choices=list(FRACTALS), default=list(FRACTALS)
+    )
+    run_parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    run_parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=parse_size,
+        default=[(40, 100), (80, 400)],
+        metavar="DIVISIONSxITERATIONS",
+    )
+    run_parser.add_argument("--samples", type=int, default=3)
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.set_defaults(function=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Fail when throughput dropped against a baseline"
+    )
+    compare_parser.add_argument("baseline", metavar="BASELINE")
+    compare_parser.add_argument("current", metavar="CURRENT")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="The largest accepted drop in the metric, as a fraction",
+    )
+    compare_parser.add_argument(
+        "--metric",
+        choices=["mpixels_per_second", "miterations_per_second"],
+        default="mpixels_per_second",
+    )
+    compare_parser.set_defaults(function=compare)
+
+    arguments = parser.parse_args(argv)
+    return arguments.function(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
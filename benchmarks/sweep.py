@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet
+from src.render import Renderer
+from src.sweep import JuliaSweep
+
+
+def main(frames: int = 256, divisions: int = 40, samples: int = 2):
+    # Thumbnails along the main cardioid, the usual path of a Julia atlas
+    angles = np.linspace(0, 2 * np.pi, frames, endpoint=False)
+    parameters = np.exp(1j * angles) / 2 - np.exp(2j * angles) / 4
+
+    grid = generate_square_grid(
+        center=ComplexPoint(0, 0), side_length=3.2, divisions=divisions
+    )
+
+    for mode in ["jit", "parallel"]:
+        sweep = JuliaSweep(max_iterations=200, grid=grid, mode=mode, samples=samples)
+        sweep.compute(parameters[:1])
+
+        start = time.perf_counter()
+        results = sweep.compute(parameters)
+        sweep_time = time.perf_counter() - start
+
+        # The same frames rendered one JuliaSet at a time
+        start = time.perf_counter()
+        for frame, parameter in zip(results, parameters):
+            julia = JuliaSet(
+                max_iterations=200,
+                parameter=ComplexPoint(parameter.real, parameter.imag),
+            )
+            expected = Renderer(
+                fractal=julia, grid=grid, mode=mode, samples=samples
+            ).compute()
+            assert np.array_equal(frame, expected)
+        single_time = time.perf_counter() - start
+
+        print(
+            f"{mode:<9} {frames} frames: sweep {sweep_time:.3f}s, "
+            f"one at a time {single_time:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
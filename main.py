@@ -1,26 +1,88 @@
 import argparse
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
 
-from src.ascii import get_ascii
+from src.animation import Keyframe, SequenceRenderer
+from src.ascii import get_ascii_frame, palette as default_palette
 from src.grid import (
     ComplexPoint,
-    generate_grid,
     generate_square_grid,
 )
 from src.julia import JuliaSet
 from src.lyapunov import Lyapunov
 from src.mandelbrot import Mandelbrot
+from src.perturbation import PerturbedMandelbrot
 from src.burning_ship import BurningShip
-from src.render import render
+from src.cache import TileCache, render_cached
+from src.distributed import TileScheduler
+from src.l_system import LSystem
+from src.render import Renderer
+from src.sierpinski import ChaosGame, IteratedFunctionSystem, shapes
+from src.stats import add_hook, combine, timed
+from src.turtle_graphics import TurtleRenderer
+from src.warmup import warmup
 
 
-def main():
+def decimal_argument(value: str) -> Decimal:
+    # Decimal keeps every digit of the center for deep zooms
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise argparse.ArgumentTypeError(f"invalid decimal value: '{value}'")
+
+
+def warmup_main(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="Benoit warmup",
+        description="Compile every kernel into numba's on disk cache, so that later renders start without compiling",
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["jit", "parallel"],
+        default=["jit", "parallel"],
+    )
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        choices=["full", "adaptive", "subdivide"],
+        default=["full", "adaptive", "subdivide"],
+    )
+
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    kernels = warmup(modes=args.modes, strategies=args.strategies)
+    print(
+        f"Compiled {kernels} kernels in {time.perf_counter() - start:.2f}s",
+        file=sys.stderr,
+    )
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["warmup"]:
+        return warmup_main(argv[1:])
+
     parser = argparse.ArgumentParser(
         prog="Benoit",
         description="ASCII rendering of common fractals and Lindenmayer systems",
+        epilog="Run 'warmup' in place of the fractal to compile every kernel into the on disk cache.",
     )
 
     parser.add_argument(
-        "fractal", choices=["mandelbrot", "julia", "lyapunov", "burningship"]
+        "fractal",
+        choices=[
+            "mandelbrot",
+            "julia",
+            "lyapunov",
+            "burningship",
+            "lsystem",
+            "ifs",
+        ],
+        help="The fractal to render",
     )
     parser.add_argument(
         "-p",
@@ -35,15 +97,90 @@ def main():
         type=str,
         help="The sequence parameter for calculating the Lyapunov fractal e.g. ABAABA",
     )
+    parser.add_argument(
+        "--transient",
+        type=int,
+        default=0,
+        metavar="ITERATIONS",
+        help="The number of initial iterations discarded before measuring the Lyapunov exponent",
+    )
+    parser.add_argument(
+        "--axiom",
+        type=str,
+        help="The starting symbols of the Lindenmayer system e.g. X",
+    )
+    parser.add_argument(
+        "--rule",
+        type=str,
+        action="append",
+        metavar="SYMBOL=REPLACEMENT",
+        help="A rule of the Lindenmayer system e.g. F=FF, can be repeated",
+    )
+    parser.add_argument(
+        "--generations",
+        type=int,
+        default=4,
+        metavar="GENERATIONS",
+        help="The number of times the Lindenmayer system rules are applied",
+    )
+    parser.add_argument(
+        "--angle",
+        type=float,
+        default=90,
+        metavar="DEGREES",
+        help="The angle the turtle turns by on + and - when drawing a Lindenmayer system",
+    )
+    parser.add_argument(
+        "--heading",
+        type=float,
+        default=0,
+        metavar="DEGREES",
+        help="The direction the turtle starts in, counterclockwise from the positive x axis",
+    )
+
+    parser.add_argument(
+        "--shape",
+        choices=list(shapes),
+        default="triangle",
+        help="The iterated function system drawn by the chaos game, unless --map is given",
+    )
+    parser.add_argument(
+        "--map",
+        nargs=6,
+        type=float,
+        action="append",
+        metavar=("A", "B", "C", "D", "E", "F"),
+        help="An affine map (x, y) to (A x + B y + E, C x + D y + F) of the iterated function system, can be repeated",
+    )
+    parser.add_argument(
+        "--probabilities",
+        nargs="+",
+        type=float,
+        metavar="PROBABILITY",
+        help="The probability of every --map, in proportion to the area each map keeps by default",
+    )
+    parser.add_argument(
+        "--points",
+        type=int,
+        default=1_000_000,
+        metavar="POINTS",
+        help="The number of chaos game points counted into the iterated function system density",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        metavar="SEED",
+        help="The seed the random streams of the chaos game are spawned from",
+    )
 
     parser.add_argument(
         "-c",
         "--center",
         nargs=2,
-        type=float,
-        default=(0, 0),
+        type=decimal_argument,
         metavar=("X CENTER", "Y CENTER"),
-        help="Specify the center point of the viewing box of the fractal in world space (x,y)",
+        help="Specify the center point of the viewing box of the fractal in world space (x,y), defaults to the origin or the whole iterated function system",
     )
     parser.add_argument(
         "-s",
@@ -69,20 +206,227 @@ def main():
         metavar="MAX ITERATIONS",
         help="The max number of iterations for the escape algorithm to run",
     )
+    parser.add_argument(
+        "-a",
+        "--samples",
+        type=int,
+        default=5,
+        metavar="SAMPLES",
+        help="The number of supersampling divisions along each axis of a character cell",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["full", "adaptive", "subdivide"],
+        default="full",
+        help="Supersample every cell, only cells on a boundary (adaptive), or fill rectangles with a uniform border (subdivide)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        metavar="TOLERANCE",
+        help="The largest probe difference between neighbouring cells treated as uniform in the adaptive strategy",
+    )
 
     parser.add_argument(
-        "-m", "--mode", choices=["normal", "jit", "gpu"], default="normal"
+        "--deep",
+        action="store_true",
+        help="Render a Mandelbrot zoom beyond float64 precision by perturbation around a high precision orbit of the center",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print a JSON report of the time spent in every phase, samples and iterations to stderr",
+    )
+    parser.add_argument(
+        "--band-size",
+        type=int,
+        default=16,
+        metavar="ROWS",
+        help="The number of rows rendered and printed at a time",
+    )
+    parser.add_argument(
+        "--palette",
+        type=str,
+        metavar="CHARACTERS",
+        help="The characters to shade with from outside to inside the fractal e.g. ' .:-=+*#%%@'",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIRECTORY",
+        help="Reuse rendered tiles stored in this directory and store newly rendered ones",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        default=32,
+        metavar="TILE SIZE",
+        help="The side length in characters of the tiles stored with --cache-dir or handed to --processes workers",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        metavar="PROCESSES",
+        help="Render tiles of the frame across this many worker processes",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store results as rounded escape counts in 16 or 32 bit integers, or 32 bit floats for the Lyapunov fractal",
+    )
+    parser.add_argument(
+        "--result-file",
+        metavar="PATH",
+        help="Write the results to this .npy file as they are computed instead of printing them",
+    )
 
+    parser.add_argument(
+        "--keyframe",
+        nargs=4,
+        type=float,
+        action="append",
+        metavar=("X CENTER", "Y CENTER", "SIZE", "MAX ITERATIONS"),
+        help="Animate from the view of --center, --size and --iterations through this view, can be repeated",
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=30,
+        metavar="FRAMES",
+        help="The number of frames rendered along the --keyframe path",
+    )
+    parser.add_argument(
+        "--reuse-tolerance",
+        type=float,
+        default=0.25,
+        metavar="CELLS",
+        help="How far in cells a value of the previous animation frame may be from a cell, or how much coarser, to be reused for it",
+    )
+    parser.add_argument(
+        "--frame-file",
+        metavar="PATH",
+        help="Write the animation frames to this .npy file instead of printing them",
+    )
+
+    parser.add_argument(
+        "-m",
+        "--mode",
+        choices=["normal", "jit", "parallel", "numpy", "gpu"],
+        default="normal",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        metavar="WORKERS",
+        help="The number of threads to render with in parallel mode (defaults to all cores)",
+    )
+
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+
+    if args.fractal == "lsystem":
+        if not args.axiom:
+            parser.error("Axiom --axiom is required for a Lindenmayer system.")
+        if args.mode not in ("normal", "jit"):
+            parser.error("Lindenmayer systems are drawn in the normal or jit mode.")
+
+        rules = {}
+        for rule in args.rule or []:
+            symbol, separator, replacement = rule.partition("=")
+            if len(symbol) != 1 or not separator:
+                parser.error(f"Rule '{rule}' must have the form SYMBOL=REPLACEMENT.")
+            rules[symbol] = replacement
+
+        try:
+            renderer = TurtleRenderer(
+                system=LSystem(axiom=args.axiom, rules=rules),
+                generations=args.generations,
+                angle=args.angle,
+                heading=args.heading,
+                divisions=args.divisions,
+                mode=args.mode,
+            )
+        except ValueError as error:
+            parser.error(str(error))
+
+        renderer.render(palette=list(args.palette) if args.palette else default_palette)
+        return
+
+    if args.fractal == "ifs":
+        if args.mode == "gpu":
+            parser.error("The chaos game is not available in the gpu mode.")
+
+        try:
+            system = (
+                IteratedFunctionSystem(args.map, args.probabilities)
+                if args.map
+                else shapes[args.shape]()
+            )
+        except ValueError as error:
+            parser.error(str(error))
+
+        grid = (
+            system.fit_grid(divisions=args.divisions)
+            if args.center is None
+            else generate_square_grid(
+                center=ComplexPoint(float(args.center[0]), float(args.center[1])),
+                side_length=args.size,
+                divisions=args.divisions,
+            )
+        )
+        ChaosGame(
+            system=system,
+            grid=grid,
+            points=args.points,
+            mode=args.mode,
+            workers=args.workers,
+            seed=args.seed,
+        ).render(palette=list(args.palette) if args.palette else default_palette)
+        return
+
+    args.center = args.center or (0, 0)
+
+    if args.stats and (args.keyframe or args.processes):
+        parser.error(
+            "The --stats report cannot be combined with --keyframe or --processes."
+        )
+    if args.deep and args.fractal != "mandelbrot":
+        parser.error("Deep zoom --deep is only available for the Mandelbrot fractal.")
+    if args.mode == "gpu":
+        # numba.cuda is only imported once the gpu mode is selected
+        from numba import cuda
+
+        if not cuda.is_available():
+            parser.error(
+                "The gpu mode needs a CUDA device, or NUMBA_ENABLE_CUDASIM=1 to simulate one."
+            )
+    if args.deep and args.mode == "gpu":
+        parser.error("Deep zoom --deep is not available in the gpu mode.")
+    if args.keyframe and (args.deep or args.cache_dir or args.mode == "gpu"):
+        parser.error(
+            "Animation with --keyframe cannot be combined with --deep, --cache-dir or the gpu mode."
+        )
+    if args.processes and (
+        args.deep or args.cache_dir or args.keyframe or args.mode in ("parallel", "gpu")
+    ):
+        parser.error(
+            "Rendering with --processes cannot be combined with --deep, --cache-dir, --keyframe or the parallel and gpu modes."
+        )
+    if args.result_file and (args.cache_dir or args.keyframe):
+        parser.error(
+            "Writing results with --result-file cannot be combined with --cache-dir or --keyframe."
+        )
+    if args.deep and args.cache_dir:
+        parser.error("Deep zoom --deep cannot be combined with --cache-dir.")
     if args.fractal == "julia" and not args.parameter:
         parser.error("Parameter point --parameter is required for a Julia fractal.")
     if args.fractal == "lyapunov":
         if not args.sequence:
             parser.error("Sequence --sequence is required for a Lyapunov fractal.")
 
-        x_center, y_center = args.center[0], args.center[1]
+        x_center, y_center = float(args.center[0]), float(args.center[1])
         size = args.size
 
         x_min, x_max = x_center - size / 2.0, x_center + size / 2.0
@@ -94,45 +438,187 @@ def main():
             )
     max_iterations = args.iterations
     mode = args.mode
+    palette = list(args.palette) if args.palette else default_palette
 
-    fractal = (
-        Mandelbrot(max_iterations=args.iterations)
-        if args.fractal == "mandelbrot"
-        else JuliaSet(
-            max_iterations=args.iterations,
-            parameter=ComplexPoint(x=args.parameter[0], y=args.parameter[1]),
+    def make_fractal(max_iterations: int):
+        return (
+            PerturbedMandelbrot(
+                max_iterations=max_iterations,
+                center_x=args.center[0],
+                center_y=args.center[1],
+                side_length=args.size,
+            )
+            if args.deep
+            else Mandelbrot(max_iterations=max_iterations)
+            if args.fractal == "mandelbrot"
+            else JuliaSet(
+                max_iterations=max_iterations,
+                parameter=ComplexPoint(x=args.parameter[0], y=args.parameter[1]),
+            )
+            if args.fractal == "julia"
+            else Lyapunov(
+                max_iterations=max_iterations,
+                sequence=args.sequence,
+                transient=args.transient,
+            )
+            if args.fractal == "lyapunov"
+            else BurningShip(max_iterations=max_iterations)  # type: ignore
         )
-        if args.fractal == "julia"
-        else Lyapunov(max_iterations=args.iterations, sequence=args.sequence)
-        if args.fractal == "lyapunov"
-        else BurningShip(max_iterations=args.iterations)  # type: ignore
-    )
 
-    average_escape_function = fractal.build_average_escape_function(mode=mode)
+    timings = {}
+    with timed(lambda seconds: timings.update(fractal_seconds=seconds)):
+        fractal = make_fractal(args.iterations)
 
-    center = ComplexPoint(x=args.center[0], y=args.center[1])
+    center = ComplexPoint(x=float(args.center[0]), y=float(args.center[1]))
     size = args.size
     divisions = args.divisions
 
-    grid = generate_square_grid(center=center, side_length=size, divisions=divisions)
+    if args.keyframe:
+        keyframes = [Keyframe(0, center, size, max_iterations)] + [
+            Keyframe(time + 1, ComplexPoint(x, y), keyframe_size, int(iterations))
+            for time, (x, y, keyframe_size, iterations) in enumerate(args.keyframe)
+        ]
+        sequence = SequenceRenderer(
+            make_fractal=make_fractal,
+            keyframes=keyframes,
+            frames=args.frames,
+            divisions=divisions,
+            mode=mode,
+            samples=args.samples,
+            workers=args.workers,
+            tolerance=args.reuse_tolerance,
+        )
+
+        if args.frame_file:
+            sequence.save(args.frame_file)
+        else:
+            sequence.render(palette=palette)
+
+        computed = sum(sequence.cells_computed)
+        cells = len(sequence.path) * divisions * int(divisions / 2)
+        print(
+            f"Evaluated {computed} of {cells} cells ({computed / cells:.2%})",
+            file=sys.stderr,
+        )
+        return
 
-    results = render(
-        x_grid=grid.x_grid,
-        y_grid=grid.y_grid,
-        sample_grid_function=generate_grid,
-        average_escape_function=average_escape_function,
+    grid = (
+        fractal.delta_grid(divisions=divisions)
+        if args.deep
+        else generate_square_grid(center=center, side_length=size, divisions=divisions)
     )
 
-    print(results)
+    if args.processes:
+        scheduler = TileScheduler(
+            fractal=fractal,
+            grid=grid,
+            mode=mode,
+            samples=args.samples,
+            strategy=args.strategy,
+            tolerance=args.tolerance,
+            tile_size=args.tile_size,
+            processes=args.processes,
+            compact=args.compact,
+        )
+
+        if args.result_file:
+            scheduler.compute(path=args.result_file)
+        else:
+            results = scheduler.compute()
+            print(
+                get_ascii_frame(
+                    results, max_iterations=max_iterations, palette=palette
+                ),
+                end="",
+            )
+
+        slowest = max(scheduler.timings, key=lambda timing: timing.seconds)
+        print(
+            f"Rendered {len(scheduler.timings)} tiles, the slowest in "
+            f"{slowest.seconds:.3f}s at rows {slowest.tile.row_start}-{slowest.tile.row_end} "
+            f"and columns {slowest.tile.column_start}-{slowest.tile.column_end}",
+            file=sys.stderr,
+        )
+        workers = {}
+        for timing in scheduler.timings:
+            workers.setdefault(timing.worker, []).append(timing.seconds)
+        for worker, seconds in sorted(workers.items()):
+            print(
+                f"Worker {worker}: {len(seconds)} tiles in {sum(seconds):.3f}s",
+                file=sys.stderr,
+            )
+        return
+
+    stats = []
+    if args.stats:
+        add_hook(stats.append)
+
+    renderer = Renderer(
+        fractal=fractal,
+        grid=grid,
+        mode=mode,
+        samples=args.samples,
+        workers=args.workers,
+        strategy=args.strategy,
+        tolerance=args.tolerance,
+        compact=args.compact,
+    )
+    if args.result_file:
+        renderer.save(args.result_file, band_size=args.band_size)
+    elif args.cache_dir:
+        results = render_cached(
+            cache=TileCache(directory=args.cache_dir),
+            key=renderer.cache_key(),
+            center=center,
+            side_length=size,
+            divisions=divisions,
+            compute_tile=renderer.compute,
+            tile_size=args.tile_size,
+            dtype=renderer.dtype,
+        )
+
+        with timed(lambda seconds: timings.update(output_seconds=seconds)):
+            print(
+                get_ascii_frame(
+                    results, max_iterations=max_iterations, palette=palette
+                ),
+                end="",
+                flush=True,
+            )
+    else:
+        renderer.render(band_size=args.band_size, palette=palette)
+
+        if args.deep:
+            sample_count = len(grid.x_grid) * len(grid.y_grid) * args.samples**2
+            print(
+                f"Series approximation skipped {fractal.series_skip} iterations per sample "
+                f"({fractal.iterations_saved(sample_count)} per frame)",
+                file=sys.stderr,
+            )
+
+        if args.strategy != "full":
+            samples_spent = renderer.samples_spent
+            cells = len(grid.x_grid) * len(grid.y_grid)
+            print(
+                f"Evaluated {samples_spent} samples ({samples_spent / cells:.2f} per cell)",
+                file=sys.stderr,
+            )
 
-    for j in range(len(grid.y_grid)):
-        line = "".join(
-            [
-                get_ascii(value=value, max_iterations=max_iterations)
-                for value in results[j, :]
-            ]
+    if args.stats:
+        # Tiles read from --cache-dir are not computed, so only computed cells
+        # are counted
+        report = combine(stats) if stats else renderer.new_stats()
+        report.output_seconds += timings.get("output_seconds", 0.0)
+        print(
+            json.dumps(
+                {
+                    **report.to_dict(),
+                    "fractal_seconds": timings["fractal_seconds"],
+                    "total_seconds": time.perf_counter() - start,
+                }
+            ),
+            file=sys.stderr,
         )
-        print(line)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,218 @@
+import sys
+from dataclasses import dataclass
+from typing import Callable, Iterator, Literal, TextIO
+
+import numpy as np
+
+from src.ascii import get_ascii_frame, palette
+from src.escape_fractal import EscapeFractal
+from src.grid import ComplexPoint, generate_square_grid
+
+# Moves the cursor to the top left, so frames written to a terminal replace
+# the previous one
+HOME = "\x1b[H"
+
+
+@dataclass
+class Keyframe:
+    time: float
+    center: ComplexPoint
+    size: float
+    max_iterations: int
+
+
+def interpolate_keyframes(keyframes: list[Keyframe], frames: int) -> list[Keyframe]:
+    keyframes = sorted(keyframes, key=lambda keyframe: keyframe.time)
+    times = np.linspace(keyframes[0].time, keyframes[-1].time, frames)
+
+    path = []
+    segment = 0
+    for time in times:
+        while segment < len(keyframes) - 2 and time > keyframes[segment + 1].time:
+            segment += 1
+
+        start, end = keyframes[segment], keyframes[min(segment + 1, len(keyframes) - 1)]
+        duration = end.time - start.time
+        fraction = (time - start.time) / duration if duration > 0 else 1.0
+
+        # Sizes change geometrically so a zoom keeps a constant speed, and the
+        # center moves in proportion to the size so the zoom target stays put
+        size = start.size * (end.size / start.size) ** fraction
+        weight = (
+            (size - start.size) / (end.size - start.size)
+            if end.size != start.size
+            else fraction
+        )
+
+        path.append(
+            Keyframe(
+                time=float(time),
+                center=ComplexPoint(
+                    start.center.x + weight * (end.center.x - start.center.x),
+                    start.center.y + weight * (end.center.y - start.center.y),
+                ),
+                size=size,
+                max_iterations=round(
+                    start.max_iterations
+                    + fraction * (end.max_iterations - start.max_iterations)
+                ),
+            )
+        )
+
+    return path
+
+
+class SequenceRenderer:
+    # Renders the frames along a keyframe path in one process. Cells of the
+    # previous frame are resampled onto the next one, and only cells that are
+    # newly exposed, coarser than the new cells or too far from where they were
+    # computed are evaluated, each by a tolerance in new cells. Frames whose
+    # depth changes are computed in full, since averaged counts cannot be extended.
+    def __init__(
+        self,
+        make_fractal: Callable[[int], EscapeFractal],
+        keyframes: list[Keyframe],
+        frames: int,
+        divisions: int,
+        mode: Literal["normal", "jit", "parallel", "numpy"] = "jit",
+        samples: int = 5,
+        workers: int | None = None,
+        tolerance: float = 0.25,
+    ):
+        self.make_fractal = make_fractal
+        self.path = interpolate_keyframes(keyframes, frames)
+        self.divisions = divisions
+        self.mode = mode
+        self.samples = samples
+        self.workers = workers
+        self.tolerance = tolerance
+
+        # The number of cells evaluated for every frame rendered so far
+        self.cells_computed: list[int] = []
+
+    def frames(self) -> Iterator[np.ndarray]:
+        self.cells_computed = []
+
+        field_functions = {}
+        previous = None
+
+        for keyframe in self.path:
+            grid = generate_square_grid(
+                center=keyframe.center,
+                side_length=keyframe.size,
+                divisions=self.divisions,
+            )
+            x_samples, y_samples = grid.sample_grids(divisions=self.samples)
+            x_centers, y_centers = grid.probe_grids()
+            x_step, y_step = grid.steps()
+            rows, columns = len(y_centers), len(x_centers)
+
+            # Value of every cell, the cell width it was computed at and the
+            # point it was computed at
+            values = np.empty(shape=(rows, columns))
+            units = np.full(shape=(rows, columns), fill_value=np.inf)
+            source_x = np.broadcast_to(x_centers[None, :], (rows, columns)).copy()
+            source_y = np.broadcast_to(y_centers[:, None], (rows, columns)).copy()
+
+            if previous is not None and previous["depth"] == keyframe.max_iterations:
+                previous_columns = np.rint(
+                    (x_centers - previous["x_centers"][0]) / previous["x_step"]
+                ).astype(np.int64)
+                previous_rows = np.rint(
+                    (previous["y_centers"][0] - y_centers) / previous["y_step"]
+                ).astype(np.int64)
+
+                column_indices = np.nonzero(
+                    (previous_columns >= 0)
+                    & (previous_columns < len(previous["x_centers"]))
+                )[0]
+                row_indices = np.nonzero(
+                    (previous_rows >= 0) & (previous_rows < len(previous["y_centers"]))
+                )[0]
+
+                target = np.ix_(row_indices, column_indices)
+                source = np.ix_(
+                    previous_rows[row_indices], previous_columns[column_indices]
+                )
+                for array, previous_array in [
+                    (values, previous["values"]),
+                    (units, previous["units"]),
+                    (source_x, previous["source_x"]),
+                    (source_y, previous["source_y"]),
+                ]:
+                    array[target] = previous_array[source]
+
+            stale = (
+                (units > x_step * (1 + self.tolerance))
+                | (np.abs(source_x - x_centers[None, :]) > self.tolerance * x_step)
+                | (np.abs(source_y - y_centers[:, None]) > self.tolerance * y_step)
+            )
+            stale_rows, stale_columns = np.nonzero(stale)
+
+            # Fractals of the same kind share compiled kernels, so a new depth
+            # only rebuilds the bound field function
+            if keyframe.max_iterations not in field_functions:
+                fractal = self.make_fractal(keyframe.max_iterations)
+                field_functions[keyframe.max_iterations] = (
+                    fractal.build_selected_average_escape_field_function(
+                        mode=self.mode, workers=self.workers
+                    )
+                )
+
+            if len(stale_rows) > 0:
+                values[stale_rows, stale_columns] = field_functions[
+                    keyframe.max_iterations
+                ](x_samples, y_samples, stale_rows, stale_columns)
+            units[stale] = x_step
+            source_x[stale] = np.broadcast_to(x_centers[None, :], stale.shape)[stale]
+            source_y[stale] = np.broadcast_to(y_centers[:, None], stale.shape)[stale]
+
+            self.cells_computed.append(len(stale_rows))
+            previous = {
+                "depth": keyframe.max_iterations,
+                "x_centers": x_centers,
+                "y_centers": y_centers,
+                "x_step": x_step,
+                "y_step": y_step,
+                "values": values,
+                "units": units,
+                "source_x": source_x,
+                "source_y": source_y,
+            }
+
+            yield values.copy()
+
+    def render(
+        self,
+        file: TextIO | None = None,
+        palette: list[str] = palette,
+        separator: str = HOME,
+    ):
+        file = sys.stdout if file is None else file
+
+        for keyframe, results in zip(self.path, self.frames()):
+            file.write(separator)
+            file.write(
+                get_ascii_frame(
+                    results, max_iterations=keyframe.max_iterations, palette=palette
+                )
+            )
+            file.flush()
+
+    def save(self, path: str) -> np.ndarray:
+        # Frames are written into a .npy file of shape (frames, rows, columns)
+        # as they are rendered, so the sequence never has to fit in memory
+        rows = len(
+            generate_square_grid(
+                center=ComplexPoint(0, 0), side_length=1, divisions=self.divisions
+            ).y_grid
+        )
+        frames = np.lib.format.open_memmap(
+            path, mode="w+", shape=(len(self.path), rows, self.divisions)
+        )
+
+        for index, results in enumerate(self.frames()):
+            frames[index] = results
+        frames.flush()
+
+        return frames
@@ -1,7 +1,11 @@
+from functools import cache
+
+import numpy as np
+
 palette = [" ", ".", ":", "-", "=", "+", "*", "#", "%", "@"]
 
 
-def get_ascii(value: int, max_iterations: int) -> str:
+def get_ascii(value: int, max_iterations: int, palette: list[str] = palette) -> str:
     if value <= 0:
         return palette[0]
 
@@ -11,3 +15,68 @@ def get_ascii(value: int, max_iterations: int) -> str:
         else len(palette) - 1
     )
     return palette[index]
+
+
+def get_ascii_indices(
+    values: np.ndarray, max_iterations: int, palette_length: int = len(palette)
+) -> np.ndarray:
+    values = np.asarray(values)
+
+    if np.issubdtype(values.dtype, np.integer):
+        # Iteration counts index a lookup table over 0..max_iterations
+        lookup = ascii_lookup(int(max_iterations), palette_length)
+        return lookup[np.clip(values, 0, max_iterations)]
+
+    # Same arithmetic as get_ascii applied elementwise, so the indices match
+    in_range = (values > 0) & (values < max_iterations)
+    scaled = np.where(in_range, (values / max_iterations) * palette_length, 0)
+
+    return np.where(
+        in_range,
+        scaled.astype(np.intp),
+        np.where(values <= 0, 0, palette_length - 1),
+    )
+
+
+@cache
+def ascii_lookup(max_iterations: int, palette_length: int) -> np.ndarray:
+    # Built once per max_iterations and palette length, and shared between
+    # calls, so it is read only
+    lookup = get_ascii_indices(
+        np.arange(max_iterations + 1, dtype=np.float64), max_iterations, palette_length
+    )
+    lookup.flags.writeable = False
+
+    return lookup
+
+
+def get_ascii_frame(
+    values: np.ndarray, max_iterations: int, palette: list[str] = palette
+) -> str:
+    if not palette or any(len(character) != 1 for character in palette):
+        raise ValueError("The palette needs at least one entry, each one character")
+
+    indices = get_ascii_indices(values, max_iterations, len(palette))
+
+    # Code points of every character plus a newline column, decoded in one go
+    code_points = np.array([ord(character) for character in palette], dtype="<u4")
+    frame = np.full(
+        shape=(indices.shape[0], indices.shape[1] + 1),
+        fill_value=ord("\n"),
+        dtype="<u4",
+    )
+    frame[:, :-1] = code_points[indices]
+
+    return frame.tobytes().decode("utf-32-le")
+
+
+def shade(
+    counts: np.ndarray, palette_length: int = len(palette)
+) -> tuple[np.ndarray, int]:
+    # Hit counts on a log scale, with every cell hit at least once shown by
+    # the first visible character, as values and max_iterations for get_ascii_frame
+    max_count = max(int(counts.max()), 1)
+    values = np.log1p(counts) / np.log1p(max_count) * max_count
+    values = np.where(counts > 0, np.maximum(values, max_count / palette_length), 0)
+
+    return values, max_count
@@ -0,0 +1,156 @@
+import sys
+from functools import cache
+from hashlib import sha1
+from types import CellType, FunctionType
+from typing import Callable, Literal
+
+# Importing numba, and numba.cuda in particular, takes most of the startup time,
+# so kernels are declared with these decorators and only handed to numba when
+# first called, leaving normal and numpy renders free of the import
+
+# Plain range for uncompiled runs, replaced by numba.prange when compiling
+prange = range
+
+
+class LazyKernel:
+    def __init__(
+        self, function: Callable, target: Literal["cpu", "cuda"], options: dict
+    ):
+        self.py_func = function
+        self.target = target
+        self.options = options
+        self._dispatcher = None
+
+        self.__name__ = function.__name__
+        self.__qualname__ = function.__qualname__
+        self.__module__ = function.__module__
+        self.__doc__ = function.__doc__
+
+    @property
+    def dispatcher(self) -> Callable:
+        if self._dispatcher is None:
+            self._dispatcher = compile_kernel(
+                self.py_func, target=self.target, **self.options
+            )
+
+        return self._dispatcher
+
+    def __call__(self, *args, **kwargs):
+        return self.dispatcher(*args, **kwargs)
+
+    def __getitem__(self, configuration):
+        # Launch configuration of CUDA kernels
+        return self.dispatcher[configuration]
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        return getattr(self.dispatcher, name)
+
+    def __reduce__(self) -> str:
+        # Kernels are module level, so they are pickled by reference to the
+        # name they are assigned to, which differs from the name of the
+        # function for kernels compiled from a copy such as njit(specialize(...))
+        module = vars(sys.modules[self.__module__])
+
+        return next(name for name, value in module.items() if value is self)
+
+
+def njit(function: Callable | None = None, **options) -> Callable:
+    if function is None:
+        return lambda function: LazyKernel(function, "cpu", options)
+
+    return LazyKernel(function, "cpu", options)
+
+
+def cuda_jit(function: Callable | None = None, **options) -> Callable:
+    if function is None:
+        return lambda function: LazyKernel(function, "cuda", options)
+
+    return LazyKernel(function, "cuda", options)
+
+
+def resolve(value):
+    return value.dispatcher if isinstance(value, LazyKernel) else value
+
+
+class Unbound:
+    # Module level stand-in for a global of a template that specialize binds
+    # in copies of it, so the name is defined where the template is written
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        raise TypeError(
+            f"{self.name} is unbound, call a copy of the template from specialize"
+        )
+
+
+@cache
+def source_digest(path: str) -> str:
+    # Short digest of a source file, for names that change with the code
+    with open(path, "rb") as file:
+        return sha1(file.read()).hexdigest()[:12]
+
+
+def specialize(
+    function: Callable,
+    name: str | None = None,
+    /,
+    closure: tuple | None = None,
+    **bindings,
+) -> Callable:
+    # Copy of the function that sees the bound values in place of its globals
+    # of those names. Kernel templates call globals such as escape_function
+    # that stay Unbound until copies bind them, and unlike a closure the copy
+    # captures no values of its own, so numba can cache it on disk. numba keys
+    # that cache by the qualified name, so every copy given a name gets its own
+    specialized = FunctionType(
+        function.__code__,
+        {**function.__globals__, **bindings},
+        function.__name__,
+        function.__defaults__,
+        function.__closure__ if closure is None else closure,
+    )
+    specialized.__qualname__ = (
+        function.__qualname__ if name is None else f"{function.__qualname__}[{name}]"
+    )
+
+    return specialized
+
+
+def compile_kernel(
+    function: Callable, target: Literal["cpu", "cuda"] = "cpu", **options
+) -> Callable:
+    # Compiles a copy of the function that sees the compiled form of the lazy
+    # kernels it calls, and numba's prange in place of range
+    import numba
+
+    bindings = {
+        name: numba.prange
+        if function.__globals__[name] is prange
+        else resolve(function.__globals__[name])
+        for name in function.__code__.co_names
+        if name in function.__globals__
+    }
+    closure = (
+        tuple(CellType(resolve(cell.cell_contents)) for cell in function.__closure__)
+        if function.__closure__
+        else None
+    )
+
+    compiled_function = specialize(function, closure=closure, **bindings)
+
+    if target == "cuda":
+        from numba import cuda
+
+        return cuda.jit(**options)(compiled_function)
+
+    return numba.njit(**options)(compiled_function)
+
+
+def set_num_threads(workers: int):
+    import numba
+
+    numba.set_num_threads(workers)
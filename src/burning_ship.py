@@ -1,7 +1,8 @@
-from typing import Callable, Literal
+from typing import Callable, Literal, Tuple
+from src.backend import compile_kernel, cuda_jit, njit
 from src.escape_fractal import EscapeFractal
 
-from numba import njit
+import numpy as np
 
 
 def burning_ship_escape(input_x: float, input_y: float, max_iterations: int) -> int:
@@ -18,7 +19,7 @@ def burning_ship_escape(input_x: float, input_y: float, max_iterations: int) ->
     return iter
 
 
-@njit
+@njit(cache=True)
 def burning_ship_escape_jit(input_x: float, input_y: float, max_iterations: int) -> int:
     x_loop = y_loop = 0
 
@@ -33,26 +34,131 @@ def burning_ship_escape_jit(input_x: float, input_y: float, max_iterations: int)
     return iter
 
 
+def burning_ship_escape_resume(
+    input_x: float,
+    input_y: float,
+    x_loop: float,
+    y_loop: float,
+    iter: int,
+    max_iterations: int,
+) -> Tuple[float, float, int]:
+    while (x_loop**2 + y_loop**2) < 4 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + input_x
+        y_loop = 2 * abs(x_loop) * abs(y_loop) + input_y
+        x_loop = x_new
+
+        iter += 1
+
+    return x_loop, y_loop, iter
+
+
+@njit(cache=True)
+def burning_ship_escape_resume_jit(
+    input_x: float,
+    input_y: float,
+    x_loop: float,
+    y_loop: float,
+    iter: int,
+    max_iterations: int,
+) -> Tuple[float, float, int]:
+    while (x_loop**2 + y_loop**2) < 4 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + input_x
+        y_loop = 2 * abs(x_loop) * abs(y_loop) + input_y
+        x_loop = x_new
+
+        iter += 1
+
+    return x_loop, y_loop, iter
+
+
+def burning_ship_escape_numpy(
+    input_x: np.ndarray, input_y: np.ndarray, max_iterations: int
+) -> np.ndarray:
+    input_x, input_y = np.broadcast_arrays(input_x, input_y)
+    shape = input_x.shape
+
+    counts = np.full(input_x.size, max_iterations, dtype=np.int64)
+
+    # Only orbits that have not escaped yet are kept in the compact arrays
+    indices = np.arange(input_x.size)
+    c_x, c_y = input_x.ravel().astype(np.float64), input_y.ravel().astype(np.float64)
+    x_loop, y_loop = np.zeros_like(c_x), np.zeros_like(c_y)
+
+    for iter in range(max_iterations):
+        escaped = (x_loop**2 + y_loop**2) >= 4
+        if escaped.any():
+            counts[indices[escaped]] = iter
+
+            active = ~escaped
+            indices, c_x, c_y = indices[active], c_x[active], c_y[active]
+            x_loop, y_loop = x_loop[active], y_loop[active]
+
+        if indices.size == 0:
+            break
+
+        x_loop, y_loop = (
+            x_loop**2 - y_loop**2 + c_x,
+            2 * np.abs(x_loop) * np.abs(y_loop) + c_y,
+        )
+
+    return counts.reshape(shape)
+
+
+@cuda_jit(device=True)
+def burning_ship_escape_gpu(input_x: float, input_y: float, max_iterations: int) -> int:
+    x_loop = y_loop = 0.0
+
+    iter = 0
+    while (x_loop**2 + y_loop**2) < 4 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + input_x
+        y_loop = 2 * abs(x_loop) * abs(y_loop) + input_y
+        x_loop = x_new
+
+        iter += 1
+
+    return iter
+
+
 class BurningShip(EscapeFractal):
+    resumable = True
+
     def __init__(self, max_iterations: int):
         super().__init__(
             max_iterations=max_iterations,
             base_function=burning_ship_escape,
             jit_function=burning_ship_escape_jit,
+            numpy_function=burning_ship_escape_numpy,
+            gpu_function=burning_ship_escape_gpu,
         )
 
-    def _make_escape_function(self, mode: Literal["normal", "jit", "gpu"]) -> Callable:
+    def _make_escape_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
         max_iterations = self.max_iterations
 
         if mode == "normal":
 
             def bound_escape_function(input_x: float, input_y: float) -> int:
                 return self.base_function(input_x, input_y, max_iterations)
+        elif mode == "numpy":
+
+            def bound_escape_function(
+                input_x: np.ndarray, input_y: np.ndarray
+            ) -> np.ndarray:
+                return self.numpy_function(input_x, input_y, max_iterations)
         else:
             escape_function = self.jit_function
 
-            @njit
+            @compile_kernel
             def bound_escape_function(input_x: float, input_y: float) -> int:
                 return escape_function(input_x, input_y, max_iterations)
 
         return bound_escape_function
+
+    def _make_resume_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
+        if mode == "normal":
+            return burning_ship_escape_resume
+
+        return burning_ship_escape_resume_jit
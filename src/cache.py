@@ -0,0 +1,113 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import numpy as np
+
+from src.grid import ComplexPoint, GridPoints
+
+
+class TileCache:
+    def __init__(self, capacity: int = 256, directory: str | None = None):
+        self.capacity = capacity
+        self.directory = directory
+
+        self.tiles: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def get(self, key: Hashable) -> np.ndarray | None:
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return self.tiles[key]
+
+        if self.directory is not None:
+            path = self._path(key)
+            if os.path.exists(path):
+                tile = np.load(path, mmap_mode="r")
+                self._remember(key, tile)
+                self.hits += 1
+                return tile
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, tile: np.ndarray):
+        self._remember(key, tile)
+
+        if self.directory is not None:
+            # Write then rename so concurrent renders never read a partial tile
+            path = self._path(key)
+            temporary_path = f"{path}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as file:
+                np.save(file, tile)
+            os.replace(temporary_path, path)
+
+    def _remember(self, key: Hashable, tile: np.ndarray):
+        self.tiles[key] = tile
+        self.tiles.move_to_end(key)
+
+        while len(self.tiles) > self.capacity:
+            self.tiles.popitem(last=False)
+
+    def _path(self, key: Hashable) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.npy")
+
+
+def render_cached(
+    cache: TileCache,
+    key: tuple,
+    center: ComplexPoint,
+    side_length: float,
+    divisions: int,
+    compute_tile: Callable[[GridPoints], np.ndarray],
+    tile_size: int = 32,
+    dtype: np.dtype = np.dtype(np.float64),
+) -> np.ndarray:
+    # Cells are snapped to a global lattice with centers at (k + 0.5) * unit, so
+    # panned and overlapping views at the same zoom share the same tiles
+    rows = int(divisions / 2)
+    x_unit, y_unit = side_length / divisions, side_length / rows
+
+    left_column = round((center.x - side_length / 2) / x_unit)
+    top_row = round((center.y + side_length / 2) / y_unit) - 1
+
+    results = np.empty(shape=(rows, divisions), dtype=dtype)
+
+    for tile_y in range((top_row - rows + 1) // tile_size, top_row // tile_size + 1):
+        for tile_x in range(
+            left_column // tile_size, (left_column + divisions - 1) // tile_size + 1
+        ):
+            tile_key = (*key, x_unit, y_unit, tile_size, tile_x, tile_y)
+
+            tile = cache.get(tile_key)
+            if tile is None:
+                x_grid = (np.arange(tile_size) + tile_x * tile_size + 0.5) * x_unit
+                y_grid = (np.arange(tile_size) + tile_y * tile_size + 0.5) * y_unit
+
+                tile = compute_tile(GridPoints(x_grid, y_grid))
+                cache.put(tile_key, tile)
+
+            # Tile rows run top to bottom, i.e. from the highest lattice row
+            row_offset = top_row - ((tile_y + 1) * tile_size - 1)
+            column_offset = tile_x * tile_size - left_column
+
+            row_start, row_end = max(row_offset, 0), min(row_offset + tile_size, rows)
+            column_start = max(column_offset, 0)
+            column_end = min(column_offset + tile_size, divisions)
+
+            results[row_start:row_end, column_start:column_end] = tile[
+                row_start - row_offset : row_end - row_offset,
+                column_start - column_offset : column_end - column_offset,
+            ]
+
+    return results
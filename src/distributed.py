@@ -0,0 +1,193 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Literal
+
+import numpy as np
+
+from src.escape_fractal import EscapeFractal
+from src.grid import GridPoints
+from src.render import Renderer, open_results
+
+
+@dataclass
+class Tile:
+    row_start: int
+    row_end: int
+    column_start: int
+    column_end: int
+
+
+@dataclass
+class TileTiming:
+    tile: Tile
+    worker: int
+    seconds: float
+    samples_spent: int
+
+
+def split_tiles(rows: int, columns: int, tile_size: int) -> list[Tile]:
+    return [
+        Tile(
+            row_start,
+            min(row_start + tile_size, rows),
+            column_start,
+            min(column_start + tile_size, columns),
+        )
+        for row_start in range(0, rows, tile_size)
+        for column_start in range(0, columns, tile_size)
+    ]
+
+
+# State of a worker process, set up once by initialize_worker
+worker = {}
+
+
+def initialize_worker(
+    fractal: EscapeFractal,
+    grid: GridPoints,
+    options: dict,
+    shared_memory_name: str | None,
+    shape: tuple[int, int],
+    path: str | None = None,
+):
+    # Field functions are closures that cannot be pickled, so every worker
+    # builds its own renderer, loading compiled kernels from numba's cache
+    renderer = Renderer(fractal=fractal, grid=grid, **options)
+
+    worker["renderer"] = renderer
+    if path is not None:
+        worker["results"] = np.load(path, mmap_mode="r+")
+    else:
+        shared_memory = SharedMemory(name=shared_memory_name, track=False)
+        worker["shared_memory"] = shared_memory
+        worker["results"] = np.ndarray(
+            shape, dtype=renderer.dtype, buffer=shared_memory.buf
+        )
+    worker["samples"] = renderer.grid.sample_grids(divisions=renderer.samples)
+    worker["probes"] = renderer.grid.probe_grids()
+
+
+def compute_tile(tile: Tile) -> TileTiming:
+    start = time.perf_counter()
+
+    x_samples, y_samples = worker["samples"]
+    x_probes, y_probes = worker["probes"]
+    rows, columns = worker["results"].shape
+
+    # Adaptive cells compare probes with their neighbours, so tiles are
+    # computed with a one cell border from the next tiles that is then dropped
+    halo = 1 if worker["renderer"].strategy == "adaptive" else 0
+    row_start, row_end = max(tile.row_start - halo, 0), min(tile.row_end + halo, rows)
+    column_start = max(tile.column_start - halo, 0)
+    column_end = min(tile.column_end + halo, columns)
+
+    results, samples_spent = worker["renderer"].compute_samples(
+        x_samples[column_start:column_end],
+        y_samples[row_start:row_end],
+        x_probes[column_start:column_end],
+        y_probes[row_start:row_end],
+    )
+
+    # The tile is written straight into the shared frame, so only its timing
+    # goes back to the scheduler
+    worker["results"][
+        tile.row_start : tile.row_end, tile.column_start : tile.column_end
+    ] = results[
+        tile.row_start - row_start : tile.row_end - row_start,
+        tile.column_start - column_start : tile.column_end - column_start,
+    ]
+
+    return TileTiming(tile, os.getpid(), time.perf_counter() - start, samples_spent)
+
+
+class TileScheduler:
+    # Renders one frame with a pool of worker processes. The frame is split
+    # into tiles that are handed out one at a time, so a worker that finishes
+    # a cheap exterior tile takes the next one while another is still on a
+    # costly boundary tile, and tiles land in a shared memory frame
+    def __init__(
+        self,
+        fractal: EscapeFractal,
+        grid: GridPoints,
+        mode: Literal["normal", "jit", "numpy"] = "jit",
+        samples: int = 5,
+        strategy: Literal["full", "adaptive", "subdivide"] = "full",
+        tolerance: float = 0.0,
+        tile_size: int = 64,
+        processes: int | None = None,
+        compact: bool = False,
+    ):
+        self.fractal = fractal
+        self.grid = grid
+        self.tile_size = tile_size
+        self.processes = processes or os.cpu_count()
+        self.options = {
+            "mode": mode,
+            "samples": samples,
+            "strategy": strategy,
+            "tolerance": tolerance,
+            "compact": compact,
+        }
+        self.dtype = fractal.result_dtype() if compact else np.dtype(np.float64)
+
+        self.timings: list[TileTiming] = []
+        self.samples_spent = 0
+
+    def compute(self, path: str | None = None) -> np.ndarray:
+        # With a path, workers write tiles into a memory mapped .npy file that
+        # is returned, so the frame is never held in memory at once
+        shape = (len(self.grid.y_grid), len(self.grid.x_grid))
+
+        if path is not None:
+            results = open_results(path, shape=shape, dtype=self.dtype)
+            results.flush()
+            self._run(shape, shared_memory_name=None, path=path)
+
+            return np.load(path, mmap_mode="r+")
+
+        shared_memory = SharedMemory(
+            create=True, size=int(np.prod(shape)) * self.dtype.itemsize
+        )
+        try:
+            self._run(shape, shared_memory_name=shared_memory.name)
+
+            results = np.ndarray(
+                shape, dtype=self.dtype, buffer=shared_memory.buf
+            ).copy()
+        finally:
+            shared_memory.close()
+            shared_memory.unlink()
+
+        return results
+
+    def _run(
+        self,
+        shape: tuple[int, int],
+        shared_memory_name: str | None,
+        path: str | None = None,
+    ):
+        tiles = split_tiles(*shape, self.tile_size)
+
+        # Spawned workers do not inherit the threads of compiled kernels
+        # from this process, which forking would
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initialize_worker,
+            initargs=(
+                self.fractal,
+                self.grid,
+                self.options,
+                shared_memory_name,
+                shape,
+                path,
+            ),
+        ) as executor:
+            futures = [executor.submit(compute_tile, tile) for tile in tiles]
+            self.timings = [future.result() for future in as_completed(futures)]
+
+        self.samples_spent = sum(timing.samples_spent for timing in self.timings)
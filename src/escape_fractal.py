@@ -1,23 +1,367 @@
-from typing import Callable, Literal
+from functools import cache
+from typing import Callable, Literal, Tuple
 
 import numpy as np
-from numba import njit
+
+from src.backend import (
+    Unbound,
+    compile_kernel,
+    njit,
+    prange,
+    set_num_threads,
+    source_digest,
+    specialize,
+)
+
+
+# Field kernels are written once as templates calling escape_function with the
+# fractal parameters passed through as trailing arguments. Each fractal gets a
+# copy of the template with escape_function bound to the fractal's escape kernel,
+# or in the average templates, which count the iterations run, to its orbit
+# kernel returning the escape value with the iterations
+escape_function = Unbound("escape_function")
+
+
+def kernel_name(kernel: Callable) -> str:
+    # Names copies of templates bound to the kernel. numba checks the files of
+    # the functions it caches, not of the kernels they call, so the name
+    # carries a digest of the kernel's file and changes along with the kernel
+    function = getattr(kernel, "py_func", kernel)
+
+    return (
+        f"{function.__module__}.{function.__qualname__}"
+        f"@{source_digest(function.__code__.co_filename)}"
+    )
+
+
+def bind_escape_function(
+    template: Callable, escape_function: Callable, name: str | None = None
+) -> Callable:
+    name = name or kernel_name(escape_function)
+
+    return specialize(template, name, escape_function=escape_function)
+
+
+@cache
+def compile_field_function(
+    template: Callable, escape_function: Callable, parallel: bool, /
+) -> Callable:
+    name = kernel_name(escape_function)
+    if parallel:
+        name += ",parallel"
+
+    return compile_kernel(
+        bind_escape_function(template, escape_function, name),
+        cache=True,
+        parallel=parallel,
+    )
+
+
+def counted_escape(input_x: float, input_y: float, *arguments) -> tuple:
+    # Orbit kernel of an escape kernel whose escape count is the number of
+    # iterations it runs
+    count = escape_function(input_x, input_y, *arguments)
+
+    return count, count
+
+
+@cache
+def count_iterations(escape_function: Callable, jit: bool, /) -> Callable:
+    function = bind_escape_function(counted_escape, escape_function)
+
+    return njit(function, cache=True) if jit else function
+
+
+def average_escape_field(
+    x_samples: np.ndarray,
+    y_samples: np.ndarray,
+    *arguments,
+) -> tuple[np.ndarray, int]:
+    columns, x_divisions = x_samples.shape
+    rows, y_divisions = y_samples.shape
+
+    results = np.empty(shape=(rows, columns))
+    # Iterations run in every row, kept apart so that rows run in parallel
+    iterations = np.zeros(rows, dtype=np.int64)
+
+    # prange is a plain range unless compiled with parallel=True
+    for j in prange(rows):
+        row_iterations = 0
+        for i in range(columns):
+            total = 0
+            for k in range(x_divisions):
+                for m in range(y_divisions):
+                    value, count = escape_function(
+                        x_samples[i, k], y_samples[j, m], *arguments
+                    )
+                    total += value
+                    row_iterations += count
+            results[j, i] = total / (x_divisions * y_divisions)
+        iterations[j] = row_iterations
+
+    return results, iterations.sum()
+
+
+def adaptive_average_escape_field(
+    x_samples: np.ndarray,
+    y_samples: np.ndarray,
+    x_probes: np.ndarray,
+    y_probes: np.ndarray,
+    tolerance: float,
+    *arguments,
+) -> tuple[np.ndarray, int, int]:
+    columns, x_divisions = x_samples.shape
+    rows, y_divisions = y_samples.shape
+
+    probes = np.empty(shape=(rows, columns))
+    iterations = np.zeros(rows, dtype=np.int64)
+    for j in prange(rows):
+        row_iterations = 0
+        for i in range(columns):
+            value, count = escape_function(x_probes[i], y_probes[j], *arguments)
+            probes[j, i] = value
+            row_iterations += count
+        iterations[j] = row_iterations
+
+    results = np.empty(shape=(rows, columns))
+    refined = np.zeros(rows, dtype=np.int64)
+
+    # A cell keeps its probe value unless a probe in its 3x3
+    # neighbourhood differs, in which case the full subgrid is averaged
+    for j in prange(rows):
+        row_iterations = 0
+        for i in range(columns):
+            probe = probes[j, i]
+
+            uniform = True
+            for n in range(max(j - 1, 0), min(j + 2, rows)):
+                for m in range(max(i - 1, 0), min(i + 2, columns)):
+                    if abs(probes[n, m] - probe) > tolerance:
+                        uniform = False
+
+            if uniform:
+                results[j, i] = probe
+                continue
+
+            total = 0
+            for k in range(x_divisions):
+                for m in range(y_divisions):
+                    value, count = escape_function(
+                        x_samples[i, k], y_samples[j, m], *arguments
+                    )
+                    total += value
+                    row_iterations += count
+            results[j, i] = total / (x_divisions * y_divisions)
+            refined[j] += 1
+        iterations[j] += row_iterations
+
+    samples_spent = rows * columns + refined.sum() * x_divisions * y_divisions
+
+    return results, samples_spent, iterations.sum()
+
+
+def subdivided_average_escape_field(
+    x_samples: np.ndarray,
+    y_samples: np.ndarray,
+    block_size: int,
+    *arguments,
+) -> tuple[np.ndarray, int, int]:
+    columns, x_divisions = x_samples.shape
+    rows, y_divisions = y_samples.shape
+
+    results = np.empty(shape=(rows, columns))
+    evaluated = np.zeros(shape=(rows, columns), dtype=np.bool_)
+
+    block_rows = (rows + block_size - 1) // block_size
+    block_columns = (columns + block_size - 1) // block_size
+    iterations = np.zeros(block_rows * block_columns, dtype=np.int64)
+
+    # Mariani-Silver subdivision: a rectangle whose border cells all
+    # share one value is filled with it, otherwise it is split into
+    # quadrants. Blocks are disjoint so they can be processed in parallel.
+    for block in prange(block_rows * block_columns):
+        top = (block // block_columns) * block_size
+        left = (block % block_columns) * block_size
+        block_iterations = 0
+
+        stack = [
+            (
+                top,
+                left,
+                min(top + block_size, rows),
+                min(left + block_size, columns),
+            )
+        ]
+        while len(stack) > 0:
+            top_row, left_column, bottom_row, right_column = stack.pop()
+            height = bottom_row - top_row
+            width = right_column - left_column
+
+            uniform = True
+            first = -1.0
+            for j in range(top_row, bottom_row):
+                step = 1 if j == top_row or j == bottom_row - 1 else max(width - 1, 1)
+                for i in range(left_column, right_column, step):
+                    if not evaluated[j, i]:
+                        total = 0
+                        for k in range(x_divisions):
+                            for m in range(y_divisions):
+                                value, count = escape_function(
+                                    x_samples[i, k], y_samples[j, m], *arguments
+                                )
+                                total += value
+                                block_iterations += count
+                        results[j, i] = total / (x_divisions * y_divisions)
+                        evaluated[j, i] = True
+
+                    if j == top_row and i == left_column:
+                        first = results[j, i]
+                    elif results[j, i] != first:
+                        uniform = False
+
+            if height <= 2 or width <= 2:
+                continue
+
+            if uniform:
+                for j in range(top_row + 1, bottom_row - 1):
+                    for i in range(left_column + 1, right_column - 1):
+                        results[j, i] = first
+                continue
+
+            middle_row = top_row + height // 2
+            middle_column = left_column + width // 2
+
+            stack.append((top_row, left_column, middle_row, middle_column))
+            stack.append((top_row, middle_column, middle_row, right_column))
+            stack.append((middle_row, left_column, bottom_row, middle_column))
+            stack.append((middle_row, middle_column, bottom_row, right_column))
+
+        iterations[block] = block_iterations
+
+    return results, evaluated.sum(), iterations.sum()
+
+
+def selected_average_escape_field(
+    x_samples: np.ndarray,
+    y_samples: np.ndarray,
+    rows: np.ndarray,
+    columns: np.ndarray,
+    *arguments,
+) -> np.ndarray:
+    # Averages only the cells at the given row and column indices
+    x_divisions, y_divisions = x_samples.shape[1], y_samples.shape[1]
+
+    results = np.empty(len(rows))
+    for n in prange(len(rows)):
+        j, i = rows[n], columns[n]
+
+        total = 0
+        for k in range(x_divisions):
+            for m in range(y_divisions):
+                total += escape_function(x_samples[i, k], y_samples[j, m], *arguments)
+        results[n] = total / (x_divisions * y_divisions)
+
+    return results
+
+
+def resume_field(
+    input_x: np.ndarray,
+    input_y: np.ndarray,
+    x_loop: np.ndarray,
+    y_loop: np.ndarray,
+    iterations: np.ndarray,
+    max_iterations: int,
+    *arguments,
+):
+    for n in prange(len(input_x)):
+        x_loop[n], y_loop[n], iterations[n] = escape_function(
+            input_x[n],
+            input_y[n],
+            x_loop[n],
+            y_loop[n],
+            iterations[n],
+            max_iterations,
+            *arguments,
+        )
 
 
 class EscapeFractal:
+    # Fractals with resume kernels, whose escape orbits can be continued to a
+    # deeper max_iterations by ProgressiveRender
+    resumable = False
+
     def __init__(
-        self, max_iterations: int, base_function: Callable, jit_function: Callable
+        self,
+        max_iterations: int,
+        base_function: Callable,
+        jit_function: Callable,
+        numpy_function: Callable | None = None,
+        gpu_function: Callable | None = None,
     ):
         self.max_iterations = max_iterations
         self.base_function = base_function
         self.jit_function = jit_function
+        self.numpy_function = numpy_function
+        self.gpu_function = gpu_function
+
+    def cache_key(self) -> tuple:
+        return (type(self).__name__, self.max_iterations)
+
+    def result_dtype(self) -> np.dtype:
+        # Smallest type holding every escape count, for storing whole frames
+        return np.dtype(np.uint16 if self.max_iterations < 2**16 else np.uint32)
+
+    def capped_cells(self, results: np.ndarray) -> int | None:
+        # Cells that reached max_iterations in every sample
+        return int(np.count_nonzero(results >= self.max_iterations))
 
-    def build_escape_function(self, mode: Literal["normal", "jit", "gpu"]) -> Callable:
+    def escape_kernel(self, mode: Literal["normal", "jit", "gpu"]) -> Callable:
+        if mode == "normal":
+            return self.base_function
+        if mode == "gpu":
+            return self.gpu_function
+
+        return self.jit_function
+
+    def orbit_kernel(self, mode: Literal["normal", "jit"]) -> Callable:
+        # Kernel taking the escape kernel's arguments and returning its escape
+        # value with the iterations it runs, which are the escape count unless
+        # the kernel skips iterations or stops early
+        return count_iterations(self.escape_kernel(mode), mode == "jit")
+
+    def escape_arguments(self) -> tuple:
+        # Arguments following the sample point in calls to the escape kernel
+        return (self.max_iterations,)
+
+    def resume_arguments(self) -> tuple:
+        # Arguments following max_iterations in calls to the resume kernel
+        return ()
+
+    def build_escape_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
         return self._make_escape_function(mode)
 
-    def _make_escape_function(self, mode: Literal["normal", "jit", "gpu"]) -> Callable:
+    def _make_escape_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
         pass
 
+    def build_resume_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
+        if not self.resumable:
+            raise ValueError(
+                f"{type(self).__name__} does not support resuming escape orbits"
+            )
+
+        return self._make_resume_function(mode)
+
+    def initial_orbit(
+        self, input_x: np.ndarray, input_y: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return np.zeros_like(input_x), np.zeros_like(input_y)
+
     @staticmethod
     def average_escape_function(escape_function: Callable) -> Callable:
         def average_escape(
@@ -34,13 +378,264 @@ class EscapeFractal:
 
         return average_escape
 
+    @staticmethod
+    def average_escape_field_function(escape_function: Callable) -> Callable:
+        return bind_escape_function(
+            average_escape_field, count_iterations(escape_function, False)
+        )
+
     def build_average_escape_function(
         self,
-        mode=Literal["normal", "jit", "gpu"],
+        mode=Literal["normal", "jit", "numpy", "gpu"],
     ) -> Callable:
         if mode == "normal":
             escape_function = self.build_escape_function(mode="normal")
             return self.average_escape_function(escape_function)
 
         escape_function = self.build_escape_function(mode="jit")
-        return njit(self.average_escape_function(escape_function))
+        return compile_kernel(self.average_escape_function(escape_function))
+
+    @staticmethod
+    def adaptive_average_escape_field_function(escape_function: Callable) -> Callable:
+        return bind_escape_function(
+            adaptive_average_escape_field, count_iterations(escape_function, False)
+        )
+
+    @staticmethod
+    def subdivided_average_escape_field_function(escape_function: Callable) -> Callable:
+        return bind_escape_function(
+            subdivided_average_escape_field, count_iterations(escape_function, False)
+        )
+
+    @staticmethod
+    def resume_field_function(resume_function: Callable) -> Callable:
+        return bind_escape_function(resume_field, resume_function)
+
+    @staticmethod
+    def average_escape_field_function_numpy(escape_function: Callable) -> Callable:
+        def average_escape_field(
+            x_samples: np.ndarray,
+            y_samples: np.ndarray,
+        ) -> tuple[np.ndarray, None]:
+            x_divisions, y_divisions = x_samples.shape[1], y_samples.shape[1]
+
+            # Escape values of every sample in (row, column, x sample, y sample) order
+            escapes = escape_function(
+                x_samples[None, :, :, None], y_samples[:, None, None, :]
+            )
+
+            # Vectorized kernels do not count the iterations they run
+            return escapes.sum(axis=(2, 3)) / (x_divisions * y_divisions), None
+
+        return average_escape_field
+
+    @staticmethod
+    def adaptive_average_escape_field_function_numpy(
+        escape_function: Callable,
+    ) -> Callable:
+        def adaptive_average_escape_field(
+            x_samples: np.ndarray,
+            y_samples: np.ndarray,
+            x_probes: np.ndarray,
+            y_probes: np.ndarray,
+            tolerance: float,
+        ) -> tuple[np.ndarray, int, None]:
+            columns, x_divisions = x_samples.shape
+            rows, y_divisions = y_samples.shape
+
+            probes = escape_function(x_probes[None, :], y_probes[:, None]).astype(
+                np.float64
+            )
+
+            # Edge padding compares border cells with themselves, like clipping
+            # the neighbourhood in the compiled kernel
+            padded = np.pad(probes, 1, mode="edge")
+            uniform = np.ones(shape=(rows, columns), dtype=np.bool_)
+            for n in range(3):
+                for m in range(3):
+                    neighbours = padded[n : n + rows, m : m + columns]
+                    uniform &= ~(np.abs(neighbours - probes) > tolerance)
+
+            refined_rows, refined_columns = np.nonzero(~uniform)
+            escapes = escape_function(
+                x_samples[refined_columns][:, :, None],
+                y_samples[refined_rows][:, None, :],
+            )
+
+            results = probes
+            results[refined_rows, refined_columns] = escapes.sum(axis=(1, 2)) / (
+                x_divisions * y_divisions
+            )
+
+            samples_spent = (
+                rows * columns + len(refined_rows) * x_divisions * y_divisions
+            )
+
+            return results, samples_spent, None
+
+        return adaptive_average_escape_field
+
+    @staticmethod
+    def subdivided_average_escape_field_function_numpy(
+        escape_function: Callable,
+    ) -> Callable:
+        average_escape_field = EscapeFractal.average_escape_field_function_numpy(
+            escape_function
+        )
+
+        def subdivided_average_escape_field(
+            x_samples: np.ndarray,
+            y_samples: np.ndarray,
+            block_size: int,
+        ) -> tuple[np.ndarray, int, None]:
+            # Rectangle subdivision is inherently sequential, so the vectorized
+            # backend evaluates every cell
+            results, iterations = average_escape_field(x_samples, y_samples)
+
+            return results, results.size, iterations
+
+        return subdivided_average_escape_field
+
+    @staticmethod
+    def selected_average_escape_field_function_numpy(
+        escape_function: Callable,
+    ) -> Callable:
+        def selected_average_escape_field(
+            x_samples: np.ndarray,
+            y_samples: np.ndarray,
+            rows: np.ndarray,
+            columns: np.ndarray,
+        ) -> np.ndarray:
+            x_divisions, y_divisions = x_samples.shape[1], y_samples.shape[1]
+
+            escapes = escape_function(
+                x_samples[columns][:, :, None], y_samples[rows][:, None, :]
+            )
+
+            return escapes.sum(axis=(1, 2)) / (x_divisions * y_divisions)
+
+        return selected_average_escape_field
+
+    def build_average_escape_field_function(
+        self,
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"],
+        workers: int | None = None,
+    ) -> Callable:
+        return self._build_field_function(
+            average_escape_field,
+            mode=mode,
+            workers=workers,
+            kernel_builder=self.orbit_kernel,
+            numpy_field_function_factory=self.average_escape_field_function_numpy,
+        )
+
+    def build_adaptive_average_escape_field_function(
+        self,
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"],
+        workers: int | None = None,
+    ) -> Callable:
+        return self._build_field_function(
+            adaptive_average_escape_field,
+            mode=mode,
+            workers=workers,
+            kernel_builder=self.orbit_kernel,
+            numpy_field_function_factory=self.adaptive_average_escape_field_function_numpy,
+        )
+
+    def build_subdivided_average_escape_field_function(
+        self,
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"],
+        workers: int | None = None,
+    ) -> Callable:
+        return self._build_field_function(
+            subdivided_average_escape_field,
+            mode=mode,
+            workers=workers,
+            kernel_builder=self.orbit_kernel,
+            numpy_field_function_factory=self.subdivided_average_escape_field_function_numpy,
+        )
+
+    def build_selected_average_escape_field_function(
+        self,
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"],
+        workers: int | None = None,
+    ) -> Callable:
+        return self._build_field_function(
+            selected_average_escape_field,
+            mode=mode,
+            workers=workers,
+            numpy_field_function_factory=self.selected_average_escape_field_function_numpy,
+        )
+
+    def build_resume_field_function(
+        self,
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"],
+        workers: int | None = None,
+    ) -> Callable:
+        return self._build_field_function(
+            resume_field,
+            mode=mode,
+            workers=workers,
+            kernel_builder=self.build_resume_function,
+            arguments=self.resume_arguments(),
+        )
+
+    def _build_field_function(
+        self,
+        template: Callable,
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"],
+        workers: int | None,
+        kernel_builder: Callable | None = None,
+        arguments: tuple | None = None,
+        numpy_field_function_factory: Callable | None = None,
+    ) -> Callable:
+        if mode == "numpy":
+            if numpy_field_function_factory is None:
+                raise ValueError(
+                    f"The numpy mode is not supported for {template.__name__}"
+                )
+
+            escape_function = self.build_escape_function(mode="numpy")
+            return numpy_field_function_factory(escape_function)
+
+        kernel_builder = kernel_builder or self.escape_kernel
+        arguments = self.escape_arguments() if arguments is None else arguments
+
+        if mode == "gpu":
+            # Imported here so that numba.cuda is only loaded for the gpu mode
+            from src import gpu
+
+            if template not in gpu.field_function_builders or self.gpu_function is None:
+                raise ValueError(
+                    f"The gpu mode is not supported for {template.__name__} "
+                    f"of {type(self).__name__}"
+                )
+
+            # Launch kernels call the escape kernel and leave the iterations
+            # uncounted
+            return gpu.field_function_builders[template](
+                self.escape_kernel(mode="gpu"), arguments
+            )
+
+        if mode == "normal":
+            field_function = bind_escape_function(
+                template, kernel_builder(mode="normal")
+            )
+        else:
+            # Compiled once per process and loaded from numba's disk cache after
+            field_function = compile_field_function(
+                template, kernel_builder(mode="jit"), mode == "parallel"
+            )
+
+        if mode != "parallel" or workers is None:
+
+            def bound_field_function(*args):
+                return field_function(*args, *arguments)
+
+            return bound_field_function
+
+        def bound_parallel_field_function(*args):
+            set_num_threads(workers)
+            return field_function(*args, *arguments)
+
+        return bound_parallel_field_function
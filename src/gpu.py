@@ -0,0 +1,217 @@
+from functools import cache
+from math import ceil
+from typing import Callable, Tuple
+
+import numpy as np
+from numba import cuda
+
+from src.backend import compile_kernel
+from src.escape_fractal import (
+    adaptive_average_escape_field,
+    average_escape_field,
+    bind_escape_function,
+    escape_function,
+    subdivided_average_escape_field,
+)
+
+# Launch kernels run one thread per character cell, which accumulates the
+# escape values of all the samples of its cell in registers and writes the
+# average once, so only the sample coordinates go to the device and only the
+# final frame comes back. Like the field templates, launch templates call the
+# escape_function placeholder, bound by bind_escape_function. Device kernels do
+# not count the iterations they run, so field functions return None for them
+
+THREADS_PER_BLOCK = (16, 16)
+
+
+def average_escape_field_kernel(
+    x_samples: np.ndarray,
+    y_samples: np.ndarray,
+    results: np.ndarray,
+    *arguments,
+):
+    j, i = cuda.grid(2)
+    rows, columns = results.shape
+    if j >= rows or i >= columns:
+        return
+
+    x_divisions, y_divisions = x_samples.shape[1], y_samples.shape[1]
+
+    total = 0.0
+    for k in range(x_divisions):
+        for m in range(y_divisions):
+            total += escape_function(x_samples[i, k], y_samples[j, m], *arguments)
+    results[j, i] = total / (x_divisions * y_divisions)
+
+
+def probe_field_kernel(
+    x_probes: np.ndarray,
+    y_probes: np.ndarray,
+    probes: np.ndarray,
+    *arguments,
+):
+    j, i = cuda.grid(2)
+    rows, columns = probes.shape
+    if j >= rows or i >= columns:
+        return
+
+    probes[j, i] = escape_function(x_probes[i], y_probes[j], *arguments)
+
+
+def adaptive_average_escape_field_kernel(
+    x_samples: np.ndarray,
+    y_samples: np.ndarray,
+    probes: np.ndarray,
+    tolerance: float,
+    results: np.ndarray,
+    refined: np.ndarray,
+    *arguments,
+):
+    j, i = cuda.grid(2)
+    rows, columns = results.shape
+    if j >= rows or i >= columns:
+        return
+
+    probe = probes[j, i]
+
+    uniform = True
+    for n in range(max(j - 1, 0), min(j + 2, rows)):
+        for m in range(max(i - 1, 0), min(i + 2, columns)):
+            if abs(probes[n, m] - probe) > tolerance:
+                uniform = False
+
+    if uniform:
+        results[j, i] = probe
+        return
+
+    x_divisions, y_divisions = x_samples.shape[1], y_samples.shape[1]
+
+    total = 0.0
+    for k in range(x_divisions):
+        for m in range(y_divisions):
+            total += escape_function(x_samples[i, k], y_samples[j, m], *arguments)
+    results[j, i] = total / (x_divisions * y_divisions)
+    cuda.atomic.add(refined, 0, 1)
+
+
+@cache
+def compile_launch_kernel(template: Callable, escape_function: Callable) -> Callable:
+    return compile_kernel(
+        bind_escape_function(template, escape_function), target="cuda"
+    )
+
+
+def launch_configuration(
+    rows: int, columns: int
+) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    blocks = (
+        ceil(rows / THREADS_PER_BLOCK[0]),
+        ceil(columns / THREADS_PER_BLOCK[1]),
+    )
+
+    return blocks, THREADS_PER_BLOCK
+
+
+def device_arguments(arguments: tuple) -> tuple:
+    # Array parameters such as the Lyapunov sequence are copied once per build
+    return tuple(
+        cuda.to_device(argument) if isinstance(argument, np.ndarray) else argument
+        for argument in arguments
+    )
+
+
+def build_average_escape_field_function(
+    escape_function: Callable, arguments: tuple
+) -> Callable:
+    kernel = compile_launch_kernel(average_escape_field_kernel, escape_function)
+    arguments = device_arguments(arguments)
+
+    def average_escape_field(
+        x_samples: np.ndarray,
+        y_samples: np.ndarray,
+    ) -> tuple[np.ndarray, None]:
+        rows, columns = len(y_samples), len(x_samples)
+
+        results = cuda.device_array(shape=(rows, columns))
+        kernel[launch_configuration(rows, columns)](
+            cuda.to_device(x_samples), cuda.to_device(y_samples), results, *arguments
+        )
+
+        return results.copy_to_host(), None
+
+    return average_escape_field
+
+
+def build_adaptive_average_escape_field_function(
+    escape_function: Callable, arguments: tuple
+) -> Callable:
+    probe_kernel = compile_launch_kernel(probe_field_kernel, escape_function)
+    kernel = compile_launch_kernel(
+        adaptive_average_escape_field_kernel, escape_function
+    )
+    arguments = device_arguments(arguments)
+
+    def adaptive_average_escape_field(
+        x_samples: np.ndarray,
+        y_samples: np.ndarray,
+        x_probes: np.ndarray,
+        y_probes: np.ndarray,
+        tolerance: float,
+    ) -> tuple[np.ndarray, int, None]:
+        columns, x_divisions = x_samples.shape
+        rows, y_divisions = y_samples.shape
+        configuration = launch_configuration(rows, columns)
+
+        # Probes stay on the device between the two launches
+        probes = cuda.device_array(shape=(rows, columns))
+        probe_kernel[configuration](
+            cuda.to_device(x_probes), cuda.to_device(y_probes), probes, *arguments
+        )
+
+        results = cuda.device_array(shape=(rows, columns))
+        refined = cuda.to_device(np.zeros(1, dtype=np.int64))
+        kernel[configuration](
+            cuda.to_device(x_samples),
+            cuda.to_device(y_samples),
+            probes,
+            tolerance,
+            results,
+            refined,
+            *arguments,
+        )
+
+        samples_spent = (
+            rows * columns + int(refined.copy_to_host()[0]) * x_divisions * y_divisions
+        )
+
+        return results.copy_to_host(), samples_spent, None
+
+    return adaptive_average_escape_field
+
+
+def build_subdivided_average_escape_field_function(
+    escape_function: Callable, arguments: tuple
+) -> Callable:
+    average_escape_field = build_average_escape_field_function(
+        escape_function, arguments
+    )
+
+    def subdivided_average_escape_field(
+        x_samples: np.ndarray,
+        y_samples: np.ndarray,
+        block_size: int,
+    ) -> tuple[np.ndarray, int, None]:
+        # Rectangle subdivision is sequential within a block, so the device
+        # evaluates every cell like the numpy backend
+        results, iterations = average_escape_field(x_samples, y_samples)
+
+        return results, results.size, iterations
+
+    return subdivided_average_escape_field
+
+
+field_function_builders = {
+    average_escape_field: build_average_escape_field_function,
+    adaptive_average_escape_field: build_adaptive_average_escape_field_function,
+    subdivided_average_escape_field: build_subdivided_average_escape_field_function,
+}
@@ -39,6 +39,20 @@ class GridPoints:
 
         return x_step, y_step
 
+    def sample_grids(self, divisions: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        # Rows are ordered top to bottom, so the y samples run in reverse
+        x_step, y_step = self.steps()
+
+        x_samples = generate_sample_grid(self.x_grid, x_step, divisions)
+        y_samples = generate_sample_grid(self.y_grid[::-1], y_step, divisions)
+
+        # Contiguous samples give compiled kernels one cached signature at every size
+        return np.ascontiguousarray(x_samples), np.ascontiguousarray(y_samples)
+
+    def probe_grids(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Cell centers in the same row order as sample_grids
+        return self.x_grid, self.y_grid[::-1].copy()
+
 
 def generate_grid(
     x_center: float,
@@ -64,6 +78,22 @@ def generate_grid(
     return x_grid, y_grid
 
 
+def generate_sample_grid(
+    centers: np.ndarray, unit_length: float, divisions: int = 5
+) -> np.ndarray:
+    # Vectorized generate_grid along one axis: row k holds the sample points of
+    # the cell centered at centers[k], with identical floating point results
+    half_length = unit_length / 2
+
+    minimum, maximum = centers - half_length, centers + half_length
+
+    unit = (maximum - minimum) / divisions
+
+    start, end = minimum + unit / 2, maximum - unit / 2
+
+    return np.linspace(start, end, divisions, axis=-1)
+
+
 def generate_square_grid(
     center: ComplexPoint, side_length: float, divisions: int
 ) -> GridPoints:
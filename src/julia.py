@@ -1,8 +1,9 @@
 from math import sqrt
-from typing import Callable, Literal
+from typing import Callable, Literal, Tuple
 
-from numba import njit, cuda
+import numpy as np
 
+from src.backend import compile_kernel, cuda_jit, njit
 from src.grid import ComplexPoint
 from src.mandelbrot import EscapeFractal
 
@@ -30,7 +31,7 @@ def julia_escape(
     return iter
 
 
-@njit
+@njit(cache=True)
 def julia_escape_jit(
     input_x: float,
     input_y: float,
@@ -54,7 +55,93 @@ def julia_escape_jit(
     return iter
 
 
-@cuda.jit
+def julia_escape_resume(
+    input_x: float,
+    input_y: float,
+    x_loop: float,
+    y_loop: float,
+    iter: int,
+    max_iterations: int,
+    parameter_x: float,
+    parameter_y: float,
+) -> Tuple[float, float, int]:
+    determinant = 1 + 4 * (parameter_x**2 + parameter_y**2)
+    boundary = (1 + sqrt(determinant)) / 2
+
+    while (x_loop**2 + y_loop**2) <= boundary**2 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + parameter_x
+        y_loop = 2 * x_loop * y_loop + parameter_y
+        x_loop = x_new
+
+        iter += 1
+
+    return x_loop, y_loop, iter
+
+
+@njit(cache=True)
+def julia_escape_resume_jit(
+    input_x: float,
+    input_y: float,
+    x_loop: float,
+    y_loop: float,
+    iter: int,
+    max_iterations: int,
+    parameter_x: float,
+    parameter_y: float,
+) -> Tuple[float, float, int]:
+    determinant = 1 + 4 * (parameter_x**2 + parameter_y**2)
+    boundary = (1 + sqrt(determinant)) / 2
+
+    while (x_loop**2 + y_loop**2) <= boundary**2 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + parameter_x
+        y_loop = 2 * x_loop * y_loop + parameter_y
+        x_loop = x_new
+
+        iter += 1
+
+    return x_loop, y_loop, iter
+
+
+def julia_escape_numpy(
+    input_x: np.ndarray,
+    input_y: np.ndarray,
+    max_iterations: int,
+    parameter_x: float,
+    parameter_y: float,
+) -> np.ndarray:
+    determinant = 1 + 4 * (parameter_x**2 + parameter_y**2)
+    boundary = (1 + sqrt(determinant)) / 2
+
+    input_x, input_y = np.broadcast_arrays(input_x, input_y)
+    shape = input_x.shape
+
+    counts = np.full(input_x.size, max_iterations, dtype=np.int64)
+
+    # Only orbits that have not escaped yet are kept in the compact arrays
+    indices = np.arange(input_x.size)
+    x_loop = input_x.ravel().astype(np.float64)
+    y_loop = input_y.ravel().astype(np.float64)
+
+    for iter in range(max_iterations):
+        escaped = (x_loop**2 + y_loop**2) > boundary**2
+        if escaped.any():
+            counts[indices[escaped]] = iter
+
+            active = ~escaped
+            indices, x_loop, y_loop = indices[active], x_loop[active], y_loop[active]
+
+        if indices.size == 0:
+            break
+
+        x_loop, y_loop = (
+            x_loop**2 - y_loop**2 + parameter_x,
+            2 * x_loop * y_loop + parameter_y,
+        )
+
+    return counts.reshape(shape)
+
+
+@cuda_jit(device=True)
 def julia_escape_gpu(
     input_x: float,
     input_y: float,
@@ -79,16 +166,25 @@ def julia_escape_gpu(
 
 
 class JuliaSet(EscapeFractal):
+    resumable = True
+
     def __init__(self, max_iterations: int, parameter: ComplexPoint):
         super().__init__(
             max_iterations=max_iterations,
             base_function=julia_escape,
             jit_function=julia_escape_jit,
+            numpy_function=julia_escape_numpy,
+            gpu_function=julia_escape_gpu,
         )
         self.parameter_x = parameter.x
         self.parameter_y = parameter.y
 
-    def _make_escape_function(self, mode: Literal["normal", "jit", "gpu"]) -> Callable:
+    def cache_key(self) -> tuple:
+        return (*super().cache_key(), self.parameter_x, self.parameter_y)
+
+    def _make_escape_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
         max_iterations = self.max_iterations
         parameter_x, parameter_y = self.parameter_x, self.parameter_y
 
@@ -98,13 +194,40 @@ class JuliaSet(EscapeFractal):
                 return self.base_function(
                     input_x, input_y, max_iterations, parameter_x, parameter_y
                 )
+        elif mode == "numpy":
+
+            def bound_escape_function(
+                input_x: np.ndarray, input_y: np.ndarray
+            ) -> np.ndarray:
+                return self.numpy_function(
+                    input_x, input_y, max_iterations, parameter_x, parameter_y
+                )
         else:
             escape_function = self.jit_function
 
-            @njit
+            @compile_kernel
             def bound_escape_function(input_x: float, input_y: float) -> int:
                 return escape_function(
                     input_x, input_y, max_iterations, parameter_x, parameter_y
                 )
 
         return bound_escape_function
+
+    def escape_arguments(self) -> tuple:
+        return (self.max_iterations, self.parameter_x, self.parameter_y)
+
+    def resume_arguments(self) -> tuple:
+        return (self.parameter_x, self.parameter_y)
+
+    def _make_resume_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
+        if mode == "normal":
+            return julia_escape_resume
+
+        return julia_escape_resume_jit
+
+    def initial_orbit(
+        self, input_x: np.ndarray, input_y: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return input_x.copy(), input_y.copy()
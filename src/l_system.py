@@ -1,20 +1,117 @@
+from typing import Iterator
+
+import numpy as np
+
+
 class LSystem:
     def __init__(self, axiom: str, rules: dict[str, str]):
         self.axiom = axiom
         self.rules = rules
 
-    def next(self, input: str) -> str:
-        result = ""
+        self.alphabet = sorted(set(axiom).union(rules, *rules.values()))
+
+        # ASCII systems expand as bytes: one translate marks every symbol with
+        # a rule by an unused byte, then one replace per rule substitutes it.
+        # Both run in C, several times faster than joining replacements
+        unused = [
+            bytes([byte]) for byte in range(128) if chr(byte) not in self.alphabet
+        ]
+        ascii = all(symbol.isascii() for symbol in self.alphabet)
 
-        for char in input:
-            result += self.rules[char] if char in self.rules else char
+        if ascii and len(unused) >= len(rules):
+            self.placeholders = bytes.maketrans(
+                "".join(rules).encode(), b"".join(unused[: len(rules)])
+            )
+            self.replacements = [
+                (placeholder, replacement.encode())
+                for placeholder, replacement in zip(unused, rules.values())
+            ]
+        else:
+            self.replacements = None
 
-        return result
+    def next(self, input: str) -> str:
+        return self.expand(input, 1)
 
     def get_generation(self, n: int) -> str:
-        input = self.axiom
+        return self.expand(self.axiom, n)
+
+    def expand(self, input: str, generations: int) -> str:
+        if self.replacements is None:
+            for iteration in range(generations):
+                input = "".join(map(self.rules.get, input, input))
+
+            return input
+
+        symbols = input.encode()
+        for iteration in range(generations):
+            symbols = symbols.translate(self.placeholders)
+            for placeholder, replacement in self.replacements:
+                symbols = symbols.replace(placeholder, replacement)
+
+        return symbols.decode()
+
+    def rule_matrix(self) -> np.ndarray:
+        # Entry (i, j) counts symbol j in the replacement of symbol i, and
+        # symbols without a rule replace themselves
+        index = {symbol: i for i, symbol in enumerate(self.alphabet)}
+        matrix = np.zeros(shape=(len(self.alphabet), len(self.alphabet)), dtype=object)
+
+        for symbol in self.alphabet:
+            for replacement_symbol in self.rules.get(symbol, symbol):
+                matrix[index[symbol], index[replacement_symbol]] += 1
+
+        return matrix
+
+    def symbol_counts(self, n: int) -> dict[str, int]:
+        # Counts of generation n are the axiom counts times the n-th power of
+        # the rule matrix, in Python integers since lengths grow exponentially
+        counts = np.array(
+            [self.axiom.count(symbol) for symbol in self.alphabet], dtype=object
+        )
+        counts = counts @ np.linalg.matrix_power(self.rule_matrix(), n)
+
+        return dict(zip(self.alphabet, counts.tolist()))
+
+    def length(self, n: int) -> int:
+        return sum(self.symbol_counts(n).values())
+
+    def chunks(self, n: int, chunk_size: int = 1 << 16) -> Iterator[str]:
+        # Consecutive pieces of generation n, expanded depth first. Symbols
+        # whose expansion fits in chunk_size are expanded in bulk once and
+        # reused, so only one path of the derivation tree is held at a time
+        lengths = {}
+        expansions = {}
+
+        def expansion_length(symbol: str, generations: int) -> int:
+            if (symbol, generations) not in lengths:
+                lengths[(symbol, generations)] = (
+                    1
+                    if generations == 0 or symbol not in self.rules
+                    else sum(
+                        expansion_length(replacement_symbol, generations - 1)
+                        for replacement_symbol in self.rules[symbol]
+                    )
+                )
+
+            return lengths[(symbol, generations)]
+
+        stack = [(iter(self.axiom), n)]
+        while stack:
+            symbol = next(stack[-1][0], None)
+            if symbol is None:
+                stack.pop()
+                continue
+
+            generations = stack[-1][1]
+            if expansion_length(symbol, generations) <= chunk_size:
+                if (symbol, generations) not in expansions:
+                    expansions[(symbol, generations)] = self.expand(symbol, generations)
 
-        for iteration in range(n):
-            input = self.next(input)
+                yield expansions[(symbol, generations)]
+            else:
+                stack.append((iter(self.rules[symbol]), generations - 1))
 
-        return input
+    def symbols(self, n: int) -> Iterator[str]:
+        # Symbols of generation n one at a time, without building the string
+        for chunk in self.chunks(n):
+            yield from chunk
@@ -1,66 +1,332 @@
-from numba import njit
+from math import inf, log
+from typing import Callable, Literal, Tuple
+
 import numpy as np
 
+from src.backend import compile_kernel, cuda_jit, njit, specialize
 from src.escape_fractal import EscapeFractal
 
 
+def lyapunov_orbit(
+    input_x: float,
+    input_y: float,
+    max_iterations: int,
+    sequence: np.ndarray,
+    transient: int = 0,
+    batch_size: int = 16,
+    tolerance: float = 0.0,
+) -> Tuple[float, int]:
+    # Exponent and the iterations run, with the transient, until the estimate
+    # settles within the tolerance, the orbit is superstable or max_iterations.
+    # The schedule of r values for one period of the sequence is expanded once
+    sequence_length = len(sequence)
+    schedule = np.empty(sequence_length)
+    for k in range(sequence_length):
+        schedule[k] = input_x if sequence[k] == 1 else input_y
+
+    # Discard the transient, always including the first step whose derivative
+    # at the starting point x = 1/2 is zero
+    x_loop = 0.5
+    index = 0
+    for _ in range(max(transient, 1)):
+        r_loop = schedule[index]
+        x_loop = r_loop * x_loop * (1 - x_loop)
+
+        index += 1
+        if index == sequence_length:
+            index = 0
+
+    # Derivatives are multiplied together and only the product of each batch
+    # goes through log. A zero product is a superstable orbit diverging to -inf.
+    total = 0.0
+    product = 1.0
+    estimate = 0.0
+
+    iter = 0
+    while iter < max_iterations:
+        r_loop = schedule[index]
+        product *= abs(r_loop * (1 - 2 * x_loop))
+        x_loop = r_loop * x_loop * (1 - x_loop)
+
+        index += 1
+        if index == sequence_length:
+            index = 0
+
+        iter += 1
+        if iter % batch_size == 0 or iter == max_iterations:
+            if product == 0:
+                return -np.inf, max(transient, 1) + iter
+
+            total += log(product)
+            product = 1.0
+
+            previous_estimate, estimate = estimate, total / iter
+            if iter >= 4 * batch_size and abs(estimate - previous_estimate) < tolerance:
+                break
+
+    # Base 2 exponent scaled to the full run, on the same scale as escape counts
+    return estimate / log(2) * max_iterations, max(transient, 1) + iter
+
+
+lyapunov_orbit_jit = njit(lyapunov_orbit, cache=True)
+
+
 def lyapunov_escape(
-    input_x: float, input_y: float, max_iterations: int, sequence: np.ndarray
+    input_x: float,
+    input_y: float,
+    max_iterations: int,
+    sequence: np.ndarray,
+    transient: int = 0,
+    batch_size: int = 16,
+    tolerance: float = 0.0,
 ) -> float:
+    return lyapunov_orbit(
+        input_x,
+        input_y,
+        max_iterations,
+        sequence,
+        transient,
+        batch_size,
+        tolerance,
+    )[0]
+
+
+lyapunov_escape_jit = njit(
+    specialize(lyapunov_escape, lyapunov_orbit=lyapunov_orbit_jit), cache=True
+)
+
+
+def lyapunov_escape_numpy(
+    input_x: np.ndarray,
+    input_y: np.ndarray,
+    max_iterations: int,
+    sequence: np.ndarray,
+    transient: int = 0,
+    batch_size: int = 16,
+    tolerance: float = 0.0,
+) -> np.ndarray:
+    input_x, input_y = np.broadcast_arrays(input_x, input_y)
+    shape = input_x.shape
+
+    results = np.empty(input_x.size)
+
+    # Row k of the schedule holds the r value of every pixel at sequence position k
     sequence_length = len(sequence)
+    schedule = np.where(
+        sequence[:, None] == 1, input_x.ravel()[None, :], input_y.ravel()[None, :]
+    ).astype(np.float64)
 
-    x_loop = 0.5
-    total = 0
+    x_loop = np.full(input_x.size, 0.5)
+    index = 0
+    for _ in range(max(transient, 1)):
+        r_loop = schedule[index]
+        x_loop = r_loop * x_loop * (1 - x_loop)
+
+        index += 1
+        if index == sequence_length:
+            index = 0
 
-    for i in range(max_iterations):
-        r_loop = input_x if (i % sequence_length) % 2 == 0 else input_y
-        if i > 0:
-            total += np.log2(abs(r_loop * (1 - 2 * x_loop)))
+    # Only pixels that have not converged or diverged are kept in the compact arrays
+    indices = np.arange(input_x.size)
+    total = np.zeros(input_x.size)
+    product = np.ones(input_x.size)
+    estimate = np.zeros(input_x.size)
+
+    iter = 0
+    while iter < max_iterations and indices.size > 0:
+        r_loop = schedule[index]
+        product *= np.abs(r_loop * (1 - 2 * x_loop))
         x_loop = r_loop * x_loop * (1 - x_loop)
 
-    return total
+        index += 1
+        if index == sequence_length:
+            index = 0
+
+        iter += 1
+        if iter % batch_size == 0 or iter == max_iterations:
+            finished = product == 0
+            results[indices[finished]] = -np.inf
+
+            active = ~finished
+            indices, schedule = indices[active], schedule[:, active]
+            x_loop, total, estimate = x_loop[active], total[active], estimate[active]
+
+            total += np.log(product[active])
+            product = np.ones(indices.size)
+
+            previous_estimate, estimate = estimate, total / iter
+            if iter >= 4 * batch_size:
+                finished = np.abs(estimate - previous_estimate) < tolerance
+                results[indices[finished]] = (
+                    estimate[finished] / log(2) * max_iterations
+                )
+
+                active = ~finished
+                indices, schedule = indices[active], schedule[:, active]
+                x_loop, total = x_loop[active], total[active]
+                estimate, product = estimate[active], product[active]
+
+    results[indices] = estimate / log(2) * max_iterations
 
+    return results.reshape(shape)
 
-@njit
-def lyapunov_escape_jit(
-    input_x: float, input_y: float, max_iterations: int, sequence: np.ndarray
+
+@cuda_jit(device=True)
+def lyapunov_escape_gpu(
+    input_x: float,
+    input_y: float,
+    max_iterations: int,
+    sequence: np.ndarray,
+    transient: int,
+    batch_size: int,
+    tolerance: float,
 ) -> float:
+    # Reads r from the sequence at every step, as device functions cannot
+    # allocate the schedule
     sequence_length = len(sequence)
 
     x_loop = 0.5
-    total = 0
+    index = 0
+    for _ in range(max(transient, 1)):
+        r_loop = input_x if sequence[index] == 1 else input_y
+        x_loop = r_loop * x_loop * (1 - x_loop)
+
+        index += 1
+        if index == sequence_length:
+            index = 0
+
+    total = 0.0
+    product = 1.0
+    estimate = 0.0
 
-    for i in range(max_iterations):
-        r_loop = input_x if (i % sequence_length) % 2 == 0 else input_y
-        total += np.log(r_loop * (1 - 2 * x_loop))
+    iter = 0
+    while iter < max_iterations:
+        r_loop = input_x if sequence[index] == 1 else input_y
+        product *= abs(r_loop * (1 - 2 * x_loop))
         x_loop = r_loop * x_loop * (1 - x_loop)
 
-    return total / max_iterations
+        index += 1
+        if index == sequence_length:
+            index = 0
+
+        iter += 1
+        if iter % batch_size == 0 or iter == max_iterations:
+            if product == 0:
+                return -inf
+
+            total += log(product)
+            product = 1.0
+
+            previous_estimate, estimate = estimate, total / iter
+            if iter >= 4 * batch_size and abs(estimate - previous_estimate) < tolerance:
+                break
+
+    return estimate / log(2) * max_iterations
 
 
 class Lyapunov(EscapeFractal):
-    def __init__(self, max_iterations: int, sequence: str):
+    def __init__(
+        self,
+        max_iterations: int,
+        sequence: str,
+        transient: int = 0,
+        batch_size: int = 16,
+        tolerance: float = 1e-4,
+    ):
         super().__init__(
             max_iterations=max_iterations,
             base_function=lyapunov_escape,
             jit_function=lyapunov_escape_jit,
+            numpy_function=lyapunov_escape_numpy,
+            gpu_function=lyapunov_escape_gpu,
         )
         self.sequence = np.array([1 if char == "A" else 0 for char in sequence])
+        self.transient = transient
+        self.batch_size = batch_size
+        self.tolerance = tolerance
+
+    def cache_key(self) -> tuple:
+        return (
+            *super().cache_key(),
+            tuple(self.sequence.tolist()),
+            self.transient,
+            self.batch_size,
+            self.tolerance,
+        )
+
+    def result_dtype(self) -> np.dtype:
+        # Exponents are signed and fractional
+        return np.dtype(np.float32)
+
+    def capped_cells(self, results: np.ndarray) -> None:
+        # Exponents are not escape counts
+        return None
+
+    def escape_arguments(self) -> tuple:
+        return (
+            self.max_iterations,
+            self.sequence,
+            self.transient,
+            self.batch_size,
+            self.tolerance,
+        )
+
+    def orbit_kernel(self, mode: Literal["normal", "jit"]) -> Callable:
+        if mode == "normal":
+            return lyapunov_orbit
+
+        return lyapunov_orbit_jit
 
     def _make_escape_function(self, mode):
         max_iterations = self.max_iterations
         sequence = self.sequence
+        transient, batch_size, tolerance = (
+            self.transient,
+            self.batch_size,
+            self.tolerance,
+        )
 
         if mode == "normal":
 
             def bound_escape_function(input_x: float, input_y: float) -> float:
-                return self.base_function(input_x, input_y, max_iterations, sequence)
+                return self.base_function(
+                    input_x,
+                    input_y,
+                    max_iterations,
+                    sequence,
+                    transient,
+                    batch_size,
+                    tolerance,
+                )
+
+        elif mode == "numpy":
+
+            def bound_escape_function(
+                input_x: np.ndarray, input_y: np.ndarray
+            ) -> np.ndarray:
+                return self.numpy_function(
+                    input_x,
+                    input_y,
+                    max_iterations,
+                    sequence,
+                    transient,
+                    batch_size,
+                    tolerance,
+                )
 
         else:
             escape_function = self.jit_function
 
-            @njit
+            @compile_kernel
             def bound_escape_function(input_x: float, input_y: float) -> float:
-                return escape_function(input_x, input_y, max_iterations, sequence)
+                return escape_function(
+                    input_x,
+                    input_y,
+                    max_iterations,
+                    sequence,
+                    transient,
+                    batch_size,
+                    tolerance,
+                )
 
         return bound_escape_function
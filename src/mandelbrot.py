@@ -1,9 +1,8 @@
-from typing import Callable, Literal
+from typing import Callable, Literal, Tuple
 
 import numpy as np
-from numba import njit
-from numba import cuda
 
+from src.backend import compile_kernel, cuda_jit, njit, specialize
 from src.escape_fractal import EscapeFractal
 
 
@@ -21,7 +20,7 @@ def mandelbrot_escape(input_x: float, input_y: float, max_iterations: int) -> in
     return iter
 
 
-@njit
+@njit(cache=True)
 def mandelbrot_escape_jit(input_x: float, input_y: float, max_iterations: int) -> int:
     x_loop = y_loop = 0
 
@@ -36,11 +35,216 @@ def mandelbrot_escape_jit(input_x: float, input_y: float, max_iterations: int) -
     return iter
 
 
-@cuda.jit
+def mandelbrot_interior(input_x: float, input_y: float) -> bool:
+    # Main cardioid
+    x_shifted = input_x - 0.25
+    q = x_shifted**2 + input_y**2
+    if q * (q + x_shifted) < 0.25 * input_y**2:
+        return True
+
+    # Period-2 bulb
+    return (input_x + 1) ** 2 + input_y**2 < 0.0625
+
+
+@njit(cache=True)
+def mandelbrot_interior_jit(input_x: float, input_y: float) -> bool:
+    # Main cardioid
+    x_shifted = input_x - 0.25
+    q = x_shifted**2 + input_y**2
+    if q * (q + x_shifted) < 0.25 * input_y**2:
+        return True
+
+    # Period-2 bulb
+    return (input_x + 1) ** 2 + input_y**2 < 0.0625
+
+
+def mandelbrot_orbit_shortcut(
+    input_x: float, input_y: float, max_iterations: int
+) -> Tuple[int, int]:
+    # Escape count and the iterations run, which are fewer for points the
+    # interior checks place in the set and for orbits found to be periodic
+    if mandelbrot_interior(input_x, input_y):
+        return max_iterations, 0
+
+    x_loop = y_loop = 0.0
+
+    # Brent cycle detection: compare against a checkpoint refreshed at doubling
+    # intervals. An exact repeat means the orbit is periodic in floating point
+    # and can never escape, so the count is the same as the full iteration.
+    x_check = y_check = 0.0
+    check_interval = check_steps = 1
+
+    iter = 0
+    while (x_loop**2 + y_loop**2) <= 4 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + input_x
+        y_loop = 2 * x_loop * y_loop + input_y
+        x_loop = x_new
+
+        iter += 1
+
+        if x_loop == x_check and y_loop == y_check:
+            return max_iterations, iter
+
+        check_steps -= 1
+        if check_steps == 0:
+            x_check, y_check = x_loop, y_loop
+            check_interval *= 2
+            check_steps = check_interval
+
+    return iter, iter
+
+
+mandelbrot_orbit_shortcut_jit = njit(
+    specialize(mandelbrot_orbit_shortcut, mandelbrot_interior=mandelbrot_interior_jit),
+    cache=True,
+)
+
+
+def mandelbrot_escape_shortcut(
+    input_x: float, input_y: float, max_iterations: int
+) -> int:
+    return mandelbrot_orbit_shortcut(input_x, input_y, max_iterations)[0]
+
+
+mandelbrot_escape_shortcut_jit = njit(
+    specialize(
+        mandelbrot_escape_shortcut,
+        mandelbrot_orbit_shortcut=mandelbrot_orbit_shortcut_jit,
+    ),
+    cache=True,
+)
+
+
+def mandelbrot_escape_resume(
+    input_x: float,
+    input_y: float,
+    x_loop: float,
+    y_loop: float,
+    iter: int,
+    max_iterations: int,
+) -> Tuple[float, float, int]:
+    # An iteration count of -1 marks an orbit proven never to escape
+    if iter == 0 and mandelbrot_interior(input_x, input_y):
+        return x_loop, y_loop, -1
+
+    x_check, y_check = x_loop, y_loop
+    check_interval = check_steps = 1
+
+    while (x_loop**2 + y_loop**2) <= 4 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + input_x
+        y_loop = 2 * x_loop * y_loop + input_y
+        x_loop = x_new
+
+        iter += 1
+
+        if x_loop == x_check and y_loop == y_check:
+            return x_loop, y_loop, -1
+
+        check_steps -= 1
+        if check_steps == 0:
+            x_check, y_check = x_loop, y_loop
+            check_interval *= 2
+            check_steps = check_interval
+
+    return x_loop, y_loop, iter
+
+
+@njit(cache=True)
+def mandelbrot_escape_resume_jit(
+    input_x: float,
+    input_y: float,
+    x_loop: float,
+    y_loop: float,
+    iter: int,
+    max_iterations: int,
+) -> Tuple[float, float, int]:
+    if iter == 0 and mandelbrot_interior_jit(input_x, input_y):
+        return x_loop, y_loop, -1
+
+    x_check, y_check = x_loop, y_loop
+    check_interval = check_steps = 1
+
+    while (x_loop**2 + y_loop**2) <= 4 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + input_x
+        y_loop = 2 * x_loop * y_loop + input_y
+        x_loop = x_new
+
+        iter += 1
+
+        if x_loop == x_check and y_loop == y_check:
+            return x_loop, y_loop, -1
+
+        check_steps -= 1
+        if check_steps == 0:
+            x_check, y_check = x_loop, y_loop
+            check_interval *= 2
+            check_steps = check_interval
+
+    return x_loop, y_loop, iter
+
+
+def mandelbrot_escape_numpy(
+    input_x: np.ndarray,
+    input_y: np.ndarray,
+    max_iterations: int,
+    interior_checks: bool = True,
+) -> np.ndarray:
+    input_x, input_y = np.broadcast_arrays(input_x, input_y)
+    shape = input_x.shape
+
+    counts = np.full(input_x.size, max_iterations, dtype=np.int64)
+
+    # Only orbits that have not escaped yet are kept in the compact arrays
+    indices = np.arange(input_x.size)
+    c_x, c_y = input_x.ravel().astype(np.float64), input_y.ravel().astype(np.float64)
+
+    if interior_checks:
+        x_shifted = c_x - 0.25
+        q = x_shifted**2 + c_y**2
+        interior = (q * (q + x_shifted) < 0.25 * c_y**2) | (
+            (c_x + 1) ** 2 + c_y**2 < 0.0625
+        )
+        indices, c_x, c_y = indices[~interior], c_x[~interior], c_y[~interior]
+
+    x_loop, y_loop = np.zeros_like(c_x), np.zeros_like(c_y)
+    x_check, y_check = np.zeros_like(c_x), np.zeros_like(c_y)
+
+    for iter in range(max_iterations):
+        escaped = (x_loop**2 + y_loop**2) > 4
+        if escaped.any():
+            counts[indices[escaped]] = iter
+
+            active = ~escaped
+            indices, c_x, c_y = indices[active], c_x[active], c_y[active]
+            x_loop, y_loop = x_loop[active], y_loop[active]
+            x_check, y_check = x_check[active], y_check[active]
+
+        if indices.size == 0:
+            break
+
+        x_loop, y_loop = x_loop**2 - y_loop**2 + c_x, 2 * x_loop * y_loop + c_y
+
+        if interior_checks:
+            # Same Brent checkpoints as mandelbrot_escape_shortcut, refreshed
+            # after iteration 2^k - 1 for every orbit at once
+            periodic = (x_loop == x_check) & (y_loop == y_check)
+            if periodic.any():
+                active = ~periodic
+                indices, c_x, c_y = indices[active], c_x[active], c_y[active]
+                x_loop, y_loop = x_loop[active], y_loop[active]
+                x_check, y_check = x_check[active], y_check[active]
+
+            if (iter + 2) & (iter + 1) == 0:
+                x_check, y_check = x_loop.copy(), y_loop.copy()
+
+    return counts.reshape(shape)
+
+
+@cuda_jit(device=True)
 def mandelbrot_escape_gpu_jit(
     input_x: float, input_y: float, max_iterations: int
 ) -> int:
-    x_loop = y_loop = 0
+    x_loop = y_loop = 0.0
 
     iter = 0
     while (x_loop**2 + y_loop**2) <= 4 and iter < max_iterations:
@@ -54,25 +258,64 @@ def mandelbrot_escape_gpu_jit(
 
 
 class Mandelbrot(EscapeFractal):
-    def __init__(self, max_iterations: int):
+    resumable = True
+
+    def __init__(self, max_iterations: int, interior_checks: bool = True):
+        base_function, jit_function = (
+            (mandelbrot_escape_shortcut, mandelbrot_escape_shortcut_jit)
+            if interior_checks
+            else (mandelbrot_escape, mandelbrot_escape_jit)
+        )
+
         super().__init__(
             max_iterations=max_iterations,
-            base_function=mandelbrot_escape,
-            jit_function=mandelbrot_escape_jit,
+            base_function=base_function,
+            jit_function=jit_function,
+            numpy_function=mandelbrot_escape_numpy,
+            gpu_function=mandelbrot_escape_gpu_jit,
         )
+        self.interior_checks = interior_checks
 
-    def _make_escape_function(self, mode: Literal["normal", "jit", "gpu"]) -> Callable:
+    def _make_escape_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
         max_iterations = self.max_iterations
 
         if mode == "normal":
 
             def bound_escape_function(input_x: float, input_y: float) -> int:
                 return self.base_function(input_x, input_y, max_iterations)
+        elif mode == "numpy":
+            interior_checks = self.interior_checks
+
+            def bound_escape_function(
+                input_x: np.ndarray, input_y: np.ndarray
+            ) -> np.ndarray:
+                return self.numpy_function(
+                    input_x, input_y, max_iterations, interior_checks
+                )
         else:
             escape_function = self.jit_function
 
-            @njit
+            @compile_kernel
             def bound_escape_function(input_x: float, input_y: float) -> int:
                 return escape_function(input_x, input_y, max_iterations)
 
         return bound_escape_function
+
+    def orbit_kernel(self, mode: Literal["normal", "jit"]) -> Callable:
+        if not self.interior_checks:
+            return super().orbit_kernel(mode)
+
+        if mode == "normal":
+            return mandelbrot_orbit_shortcut
+
+        return mandelbrot_orbit_shortcut_jit
+
+    def _make_resume_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
+        if mode == "normal":
+            return mandelbrot_escape_resume
+
+        return mandelbrot_escape_resume_jit
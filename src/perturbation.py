@@ -0,0 +1,513 @@
+from decimal import Decimal, localcontext
+from math import log10, sqrt
+from typing import Callable, Literal, Tuple
+
+import numpy as np
+
+from src.backend import compile_kernel, njit, specialize
+from src.escape_fractal import EscapeFractal
+from src.grid import ComplexPoint, GridPoints, generate_square_grid
+
+
+def reference_orbit(
+    center_x: Decimal,
+    center_y: Decimal,
+    max_iterations: int,
+    precision: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # High precision orbit of the view center, rounded to float64 per step
+    reference_x, reference_y = [0.0], [0.0]
+
+    with localcontext() as context:
+        context.prec = precision
+
+        x_loop = y_loop = Decimal(0)
+        for _ in range(max_iterations):
+            x_new = x_loop * x_loop - y_loop * y_loop + center_x
+            y_loop = 2 * x_loop * y_loop + center_y
+            x_loop = x_new
+
+            reference_x.append(float(x_loop))
+            reference_y.append(float(y_loop))
+
+            if x_loop * x_loop + y_loop * y_loop > 4:
+                break
+
+    return np.array(reference_x), np.array(reference_y)
+
+
+def perturbation_escape(
+    delta_x: float,
+    delta_y: float,
+    max_iterations: int,
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    x_offset: float = 0.0,
+    y_offset: float = 0.0,
+    start: int = 0,
+) -> int:
+    # Iterates the offset d of the orbit from the reference orbit Z, using
+    # d' = 2Zd + d^2 + dc. When the full orbit Z + d gets smaller than d, or the
+    # reference orbit runs out, the offset is rebased onto the start of the
+    # reference orbit, which avoids the precision loss known as glitches. The
+    # orbit can start from a later iteration with an offset from the series
+    # approximation.
+    reference_length = len(reference_x)
+
+    reference_iter = iter = start
+
+    while iter < max_iterations:
+        x_loop = reference_x[reference_iter] + x_offset
+        y_loop = reference_y[reference_iter] + y_offset
+
+        length_squared = x_loop**2 + y_loop**2
+        if length_squared > 4:
+            break
+
+        if (
+            length_squared < x_offset**2 + y_offset**2
+            or reference_iter == reference_length - 1
+        ):
+            x_offset, y_offset = x_loop, y_loop
+            reference_iter = 0
+
+        x_reference = reference_x[reference_iter]
+        y_reference = reference_y[reference_iter]
+
+        x_new = (
+            2 * (x_reference * x_offset - y_reference * y_offset)
+            + x_offset**2
+            - y_offset**2
+            + delta_x
+        )
+        y_offset = (
+            2 * (x_reference * y_offset + y_reference * x_offset)
+            + 2 * x_offset * y_offset
+            + delta_y
+        )
+        x_offset = x_new
+
+        reference_iter += 1
+        iter += 1
+
+    return iter
+
+
+@njit(cache=True)
+def perturbation_escape_jit(
+    delta_x: float,
+    delta_y: float,
+    max_iterations: int,
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    x_offset: float = 0.0,
+    y_offset: float = 0.0,
+    start: int = 0,
+) -> int:
+    reference_length = len(reference_x)
+
+    reference_iter = iter = start
+
+    while iter < max_iterations:
+        x_loop = reference_x[reference_iter] + x_offset
+        y_loop = reference_y[reference_iter] + y_offset
+
+        length_squared = x_loop**2 + y_loop**2
+        if length_squared > 4:
+            break
+
+        if (
+            length_squared < x_offset**2 + y_offset**2
+            or reference_iter == reference_length - 1
+        ):
+            x_offset, y_offset = x_loop, y_loop
+            reference_iter = 0
+
+        x_reference = reference_x[reference_iter]
+        y_reference = reference_y[reference_iter]
+
+        x_new = (
+            2 * (x_reference * x_offset - y_reference * y_offset)
+            + x_offset**2
+            - y_offset**2
+            + delta_x
+        )
+        y_offset = (
+            2 * (x_reference * y_offset + y_reference * x_offset)
+            + 2 * x_offset * y_offset
+            + delta_y
+        )
+        x_offset = x_new
+
+        reference_iter += 1
+        iter += 1
+
+    return iter
+
+
+def perturbation_series_escape(
+    delta_x: float,
+    delta_y: float,
+    max_iterations: int,
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    radius: float,
+    coefficients: np.ndarray,
+    start: int,
+) -> int:
+    # Starts the orbit at iteration start from the offset given by the series
+    # A u + B u^2 + C u^3 in the delta scaled by the radius of the view
+    a, b, c = coefficients[0], coefficients[1], coefficients[2]
+    u = complex(delta_x, delta_y) / radius
+    offset = ((c * u + b) * u + a) * u
+
+    return perturbation_escape(
+        delta_x,
+        delta_y,
+        max_iterations,
+        reference_x,
+        reference_y,
+        offset.real,
+        offset.imag,
+        start,
+    )
+
+
+@njit(cache=True)
+def perturbation_series_escape_jit(
+    delta_x: float,
+    delta_y: float,
+    max_iterations: int,
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    radius: float,
+    coefficients: np.ndarray,
+    start: int,
+) -> int:
+    a, b, c = coefficients[0], coefficients[1], coefficients[2]
+    u = complex(delta_x, delta_y) / radius
+    offset = ((c * u + b) * u + a) * u
+
+    return perturbation_escape_jit(
+        delta_x,
+        delta_y,
+        max_iterations,
+        reference_x,
+        reference_y,
+        offset.real,
+        offset.imag,
+        start,
+    )
+
+
+def perturbation_series_orbit(
+    delta_x: float,
+    delta_y: float,
+    max_iterations: int,
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    radius: float,
+    coefficients: np.ndarray,
+    start: int,
+) -> Tuple[int, int]:
+    # Escape count and the iterations run, which leave out the start the
+    # series approximation skips
+    count = perturbation_series_escape(
+        delta_x,
+        delta_y,
+        max_iterations,
+        reference_x,
+        reference_y,
+        radius,
+        coefficients,
+        start,
+    )
+
+    return count, count - start
+
+
+perturbation_series_orbit_jit = njit(
+    specialize(
+        perturbation_series_orbit,
+        perturbation_series_escape=perturbation_series_escape_jit,
+    ),
+    cache=True,
+)
+
+
+def perturbation_escape_numpy(
+    delta_x: np.ndarray,
+    delta_y: np.ndarray,
+    max_iterations: int,
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    x_offset: np.ndarray | float = 0.0,
+    y_offset: np.ndarray | float = 0.0,
+    start: int = 0,
+) -> np.ndarray:
+    delta_x, delta_y, x_offset, y_offset = np.broadcast_arrays(
+        delta_x, delta_y, x_offset, y_offset
+    )
+    shape = delta_x.shape
+    reference_length = len(reference_x)
+
+    counts = np.full(delta_x.size, max_iterations, dtype=np.int64)
+
+    # Only orbits that have not escaped yet are kept in the compact arrays, each
+    # with its own position in the reference orbit after rebasing
+    indices = np.arange(delta_x.size)
+    delta_x = delta_x.ravel().astype(np.float64)
+    delta_y = delta_y.ravel().astype(np.float64)
+    x_offset = x_offset.ravel().astype(np.float64)
+    y_offset = y_offset.ravel().astype(np.float64)
+    reference_iter = np.full(delta_x.size, start)
+
+    for iter in range(start, max_iterations):
+        x_loop = reference_x[reference_iter] + x_offset
+        y_loop = reference_y[reference_iter] + y_offset
+
+        length_squared = x_loop**2 + y_loop**2
+        escaped = length_squared > 4
+        if escaped.any():
+            counts[indices[escaped]] = iter
+
+            active = ~escaped
+            indices, delta_x, delta_y = (
+                indices[active],
+                delta_x[active],
+                delta_y[active],
+            )
+            x_offset, y_offset = x_offset[active], y_offset[active]
+            x_loop, y_loop = x_loop[active], y_loop[active]
+            length_squared = length_squared[active]
+            reference_iter = reference_iter[active]
+
+        if indices.size == 0:
+            break
+
+        rebase = (length_squared < x_offset**2 + y_offset**2) | (
+            reference_iter == reference_length - 1
+        )
+        x_offset = np.where(rebase, x_loop, x_offset)
+        y_offset = np.where(rebase, y_loop, y_offset)
+        reference_iter = np.where(rebase, 0, reference_iter)
+
+        x_reference = reference_x[reference_iter]
+        y_reference = reference_y[reference_iter]
+
+        x_offset, y_offset = (
+            2 * (x_reference * x_offset - y_reference * y_offset)
+            + x_offset**2
+            - y_offset**2
+            + delta_x,
+            2 * (x_reference * y_offset + y_reference * x_offset)
+            + 2 * x_offset * y_offset
+            + delta_y,
+        )
+
+        reference_iter += 1
+
+    return counts.reshape(shape)
+
+
+@njit(cache=True)
+def series_coefficients(
+    reference_x: np.ndarray, reference_y: np.ndarray, radius: float, tolerance: float
+) -> np.ndarray:
+    # Row n holds A, B, C with offset_n ~ A u + B u^2 + C u^3 for u = dc / radius,
+    # computed until the cubic term stops being negligible next to the quadratic
+    coefficients = np.zeros(shape=(len(reference_x), 3), dtype=np.complex128)
+
+    a = b = c = 0j
+    for n in range(len(reference_x) - 1):
+        z = complex(reference_x[n], reference_y[n])
+        a, b, c = 2 * z * a + radius, 2 * z * b + a * a, 2 * z * c + 2 * a * b
+
+        # Corners of the view have |u| = sqrt(2)
+        if abs(c) * sqrt(2) > tolerance * abs(b):
+            return coefficients[: n + 1]
+
+        coefficients[n + 1, 0] = a
+        coefficients[n + 1, 1] = b
+        coefficients[n + 1, 2] = c
+
+    return coefficients
+
+
+@njit(cache=True)
+def perturbation_offsets(
+    delta_x: float,
+    delta_y: float,
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    steps: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Offsets along the perturbed orbit, up to the first escape or rebase
+    x_offsets = np.zeros(steps + 1)
+    y_offsets = np.zeros(steps + 1)
+
+    x_offset = y_offset = 0.0
+    for n in range(steps):
+        x_loop, y_loop = reference_x[n] + x_offset, reference_y[n] + y_offset
+        length_squared = x_loop**2 + y_loop**2
+        if length_squared > 4 or length_squared < x_offset**2 + y_offset**2:
+            return x_offsets[: n + 1], y_offsets[: n + 1]
+
+        x_new = (
+            2 * (reference_x[n] * x_offset - reference_y[n] * y_offset)
+            + x_offset**2
+            - y_offset**2
+            + delta_x
+        )
+        y_offset = (
+            2 * (reference_x[n] * y_offset + reference_y[n] * x_offset)
+            + 2 * x_offset * y_offset
+            + delta_y
+        )
+        x_offset = x_new
+
+        x_offsets[n + 1], y_offsets[n + 1] = x_offset, y_offset
+
+    return x_offsets, y_offsets
+
+
+def series_approximation(
+    reference_x: np.ndarray,
+    reference_y: np.ndarray,
+    radius: float,
+    tolerance: float = 1e-3,
+    probe_tolerance: float = 1e-6,
+) -> Tuple[int, np.ndarray]:
+    coefficients = series_coefficients(reference_x, reference_y, radius, tolerance)
+    skip = len(coefficients) - 1
+
+    # Check the approximation against fully iterated orbits at the corners and
+    # edges of the view, halving the skip until all of them agree
+    for u in [1 + 1j, 1 - 1j, -1 + 1j, -1 - 1j, 1, -1, 1j, -1j]:
+        x_offsets, y_offsets = perturbation_offsets(
+            radius * u.real, radius * u.imag, reference_x, reference_y, skip
+        )
+        skip = min(skip, len(x_offsets) - 1)
+
+        while skip > 0:
+            a, b, c = coefficients[skip]
+            approximation = ((c * u + b) * u + a) * u
+            offset = complex(x_offsets[skip], y_offsets[skip])
+
+            if abs(approximation - offset) <= probe_tolerance * abs(offset):
+                break
+            skip //= 2
+
+    return skip, coefficients[skip]
+
+
+class PerturbedMandelbrot(EscapeFractal):
+    # Deep zoom Mandelbrot where escape functions take offsets from the view
+    # center rather than absolute points, so grids come from delta_grid
+    def __init__(
+        self,
+        max_iterations: int,
+        center_x: Decimal | str,
+        center_y: Decimal | str,
+        side_length: float,
+        series: bool = True,
+        series_tolerance: float = 1e-3,
+    ):
+        super().__init__(
+            max_iterations=max_iterations,
+            base_function=perturbation_series_escape,
+            jit_function=perturbation_series_escape_jit,
+            numpy_function=perturbation_escape_numpy,
+        )
+        self.center_x, self.center_y = Decimal(center_x), Decimal(center_y)
+        self.side_length = float(side_length)
+
+        # Enough digits to resolve a pixel offset from the center, plus guard digits
+        self.precision = max(20, int(-log10(self.side_length)) + 20)
+
+        self.reference_x, self.reference_y = reference_orbit(
+            self.center_x, self.center_y, max_iterations, self.precision
+        )
+
+        # Every pixel starts at series_skip iterations from the series approximation
+        self.radius = self.side_length / 2
+        if series:
+            self.series_skip, self.series_coefficients = series_approximation(
+                self.reference_x, self.reference_y, self.radius, series_tolerance
+            )
+        else:
+            self.series_skip = 0
+            self.series_coefficients = np.zeros(3, dtype=np.complex128)
+
+    def iterations_saved(self, samples: int) -> int:
+        return self.series_skip * samples
+
+    def cache_key(self) -> tuple:
+        return (
+            *super().cache_key(),
+            str(self.center_x),
+            str(self.center_y),
+            self.side_length,
+        )
+
+    def delta_grid(self, divisions: int) -> GridPoints:
+        return generate_square_grid(
+            center=ComplexPoint(0, 0), side_length=self.side_length, divisions=divisions
+        )
+
+    def escape_arguments(self) -> tuple:
+        return (
+            self.max_iterations,
+            self.reference_x,
+            self.reference_y,
+            self.radius,
+            self.series_coefficients,
+            self.series_skip,
+        )
+
+    def orbit_kernel(self, mode: Literal["normal", "jit"]) -> Callable:
+        if mode == "normal":
+            return perturbation_series_orbit
+
+        return perturbation_series_orbit_jit
+
+    def _make_escape_function(
+        self, mode: Literal["normal", "jit", "numpy", "gpu"]
+    ) -> Callable:
+        arguments = self.escape_arguments()
+
+        if mode == "normal":
+            escape_function = self.base_function
+
+            def bound_escape_function(delta_x: float, delta_y: float) -> int:
+                return escape_function(delta_x, delta_y, *arguments)
+        elif mode == "numpy":
+            max_iterations = self.max_iterations
+            reference_x, reference_y = self.reference_x, self.reference_y
+            radius, skip = self.radius, self.series_skip
+            a, b, c = self.series_coefficients
+
+            def bound_escape_function(
+                delta_x: np.ndarray, delta_y: np.ndarray
+            ) -> np.ndarray:
+                u = (delta_x + 1j * delta_y) / radius
+                offset = ((c * u + b) * u + a) * u
+
+                return self.numpy_function(
+                    delta_x,
+                    delta_y,
+                    max_iterations,
+                    reference_x,
+                    reference_y,
+                    offset.real,
+                    offset.imag,
+                    skip,
+                )
+        else:
+            escape_function = self.jit_function
+
+            @compile_kernel
+            def bound_escape_function(delta_x: float, delta_y: float) -> int:
+                return escape_function(delta_x, delta_y, *arguments)
+
+        return bound_escape_function
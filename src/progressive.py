@@ -0,0 +1,88 @@
+from typing import Iterable, Iterator, Literal
+
+import numpy as np
+
+from src.escape_fractal import EscapeFractal
+from src.grid import GridPoints
+
+
+class ProgressiveRender:
+    def __init__(
+        self,
+        fractal: EscapeFractal,
+        grid: GridPoints,
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"] = "jit",
+        samples: int = 5,
+        workers: int | None = None,
+    ):
+        if not fractal.resumable:
+            raise ValueError(
+                f"{type(fractal).__name__} does not support progressive refinement"
+            )
+
+        self.fractal = fractal
+        self.samples = samples
+        self.depth = 0
+
+        self.resume_field_function = fractal.build_resume_field_function(
+            mode=mode, workers=workers
+        )
+
+        # Samples are flattened in (row, column, x sample, y sample) order
+        x_samples, y_samples = grid.sample_grids(divisions=samples)
+        self.shape = (len(y_samples), len(x_samples), samples, samples)
+
+        input_x = np.broadcast_to(x_samples[None, :, :, None], self.shape).ravel()
+        input_y = np.broadcast_to(y_samples[:, None, None, :], self.shape).ravel()
+
+        # Escaped orbits have their final count, orbits proven never to escape
+        # are -1 and the remaining ones are continued from the compact state
+        self.counts = np.zeros(input_x.size, dtype=np.int64)
+
+        self.indices = np.arange(input_x.size)
+        self.input_x, self.input_y = input_x.copy(), input_y.copy()
+        self.x_loop, self.y_loop = fractal.initial_orbit(self.input_x, self.input_y)
+        self.iterations = np.zeros(input_x.size, dtype=np.int64)
+
+    @property
+    def active(self) -> int:
+        return len(self.indices)
+
+    def refine(self, max_iterations: int) -> np.ndarray:
+        if max_iterations < self.depth:
+            raise ValueError(
+                f"Cannot refine to {max_iterations} iterations from {self.depth}"
+            )
+
+        self.resume_field_function(
+            self.input_x,
+            self.input_y,
+            self.x_loop,
+            self.y_loop,
+            self.iterations,
+            max_iterations,
+        )
+        self.depth = max_iterations
+
+        finished = self.iterations < max_iterations
+        self.counts[self.indices[finished]] = self.iterations[finished]
+
+        unfinished = ~finished
+        self.indices = self.indices[unfinished]
+        self.input_x, self.input_y = self.input_x[unfinished], self.input_y[unfinished]
+        self.x_loop, self.y_loop = self.x_loop[unfinished], self.y_loop[unfinished]
+        self.iterations = self.iterations[unfinished]
+
+        return self.frame()
+
+    def frame(self) -> np.ndarray:
+        counts = self.counts.copy()
+        counts[counts < 0] = self.depth
+        counts[self.indices] = self.depth
+
+        rows, columns = self.shape[:2]
+        return counts.reshape(rows, columns, -1).sum(axis=-1) / self.samples**2
+
+    def refine_progressively(self, depths: Iterable[int]) -> Iterator[np.ndarray]:
+        for max_iterations in depths:
+            yield self.refine(max_iterations)
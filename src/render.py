@@ -1,10 +1,12 @@
-from typing import Literal
+import sys
+from typing import Callable, Iterator, Literal, TextIO, Tuple
 
 import numpy as np
 
-from src.ascii import get_ascii
+from src.ascii import get_ascii_frame, palette
 from src.grid import GridPoints
 from src.mandelbrot import EscapeFractal
+from src.stats import RenderStats, compile_timer, emit, timed
 
 
 class Renderer:
@@ -12,67 +14,269 @@ class Renderer:
         self,
         fractal: EscapeFractal,
         grid: GridPoints,
-        mode: Literal["normal", "jit", "gpu"],
+        mode: Literal["normal", "jit", "parallel", "numpy", "gpu"],
+        samples: int = 5,
+        workers: int | None = None,
+        strategy: Literal["full", "adaptive", "subdivide"] = "full",
+        tolerance: float = 0.0,
+        block_size: int = 32,
+        compact: bool = False,
     ):
         self.grid = grid
         self.fractal = fractal
         self.mode = mode
+        self.samples = samples
+        self.workers = workers
+        self.strategy = strategy
+        self.tolerance = tolerance
+        self.block_size = block_size
+        self.samples_spent = 0
+        self.setup_seconds = 0.0
 
-        self.average_escape_function = fractal.build_average_escape_function(
-            mode=self.mode
+        # Compact results are stored in the fractal's result type, with
+        # averaged escape counts rounded to the nearest count
+        self.dtype = fractal.result_dtype() if compact else np.dtype(np.float64)
+
+        if self.strategy == "adaptive":
+            build_field_function = fractal.build_adaptive_average_escape_field_function
+        elif self.strategy == "subdivide":
+            build_field_function = (
+                fractal.build_subdivided_average_escape_field_function
+            )
+        else:
+            build_field_function = fractal.build_average_escape_field_function
+
+        with timed(self._set_setup_seconds):
+            self.average_escape_field_function = build_field_function(
+                mode=self.mode, workers=self.workers
+            )
+
+        # Statistics of the latest compute, stream or render
+        self.stats = self.new_stats()
+
+    def _set_setup_seconds(self, seconds: float):
+        self.setup_seconds = seconds
+
+    def new_stats(self) -> RenderStats:
+        return RenderStats(
+            fractal=type(self.fractal).__name__,
+            mode=self.mode,
+            strategy=self.strategy,
+            samples=self.samples,
+            max_iterations=self.fractal.max_iterations,
+            setup_seconds=self.setup_seconds,
+        )
+
+    def cache_key(self) -> tuple:
+        return (
+            *self.fractal.cache_key(),
+            self.samples,
+            self.strategy,
+            self.tolerance,
+            self.dtype.str,
+        )
+
+    def compute(self, grid: GridPoints | None = None) -> np.ndarray:
+        grid = self.grid if grid is None else grid
+        self.stats = self.new_stats()
+
+        with timed(self._add_grid_seconds):
+            x_samples, y_samples = grid.sample_grids(divisions=self.samples)
+            x_probes, y_probes = grid.probe_grids()
+
+        results, self.samples_spent = self.compute_samples(
+            x_samples, y_samples, x_probes, y_probes
+        )
+        emit(self.stats)
+
+        return results
+
+    def stream(self, band_size: int = 8) -> Iterator[np.ndarray]:
+        yield from self._stream(band_size)
+        emit(self.stats)
+
+    def _stream(self, band_size: int) -> Iterator[np.ndarray]:
+        # Only the samples of one band of rows are evaluated and held at a time
+        self.stats = self.new_stats()
+
+        with timed(self._add_grid_seconds):
+            x_samples, y_samples = self.grid.sample_grids(divisions=self.samples)
+            x_probes, y_probes = self.grid.probe_grids()
+
+        self.samples_spent = 0
+        for start in range(0, len(y_samples), band_size):
+            end = start + band_size
+
+            results, samples_spent = self.compute_samples(
+                x_samples, y_samples[start:end], x_probes, y_probes[start:end]
+            )
+            self.samples_spent += samples_spent
+
+            yield results
+
+    def save(self, path: str, band_size: int = 8) -> np.ndarray:
+        # Bands are written into a .npy file as they are computed, so frames
+        # larger than memory never have to be held at once
+        results = open_results(
+            path, shape=(len(self.grid.y_grid), len(self.grid.x_grid)), dtype=self.dtype
         )
 
-    def render(self, sample_grid_function, average_escape_function):
-        x_grid, y_grid = self.grid.x_grid, self.grid.y_grid
-        x_unit_length, y_unit_length = self.grid.steps()
-
-        results = np.empty(shape=(len(y_grid), len(x_grid)))
-
-        for j in range(len(y_grid)):
-            for i in range(len(x_grid)):
-                x_center = x_grid[i]
-                y_center = y_grid[-(j + 1)]
-                x_sample_grid, y_sample_grid = sample_grid_function(
-                    x_center=x_center,
-                    y_center=y_center,
-                    x_length=x_unit_length,
-                    y_length=y_unit_length,
+        start = 0
+        for band in self._stream(band_size):
+            with timed(self._add_output_seconds):
+                results[start : start + len(band)] = band
+            start += len(band)
+
+        with timed(self._add_output_seconds):
+            results.flush()
+        emit(self.stats)
+
+        return results
+
+    def render(
+        self,
+        band_size: int = 8,
+        file: TextIO | None = None,
+        palette: list[str] = palette,
+    ):
+        file = sys.stdout if file is None else file
+
+        for results in self._stream(band_size):
+            with timed(self._add_output_seconds):
+                file.write(
+                    get_ascii_frame(
+                        results,
+                        max_iterations=self.fractal.max_iterations,
+                        palette=palette,
+                    )
                 )
+                file.flush()
+
+        emit(self.stats)
 
-                results[j, i] = average_escape_function(x_sample_grid, y_sample_grid)
+    def _add_grid_seconds(self, seconds: float):
+        self.stats.grid_seconds += seconds
 
-        for j in range(len(y_grid)):
-            line = "".join(
-                [
-                    get_ascii(value=value, max_iterations=self.fractal.max_iterations)
-                    for value in results[j, :]
-                ]
+    def _add_output_seconds(self, seconds: float):
+        self.stats.output_seconds += seconds
+
+    def _add_compile_seconds(self, seconds: float):
+        self.stats.compile_seconds += seconds
+
+    def _add_call_seconds(self, seconds: float):
+        self.stats.kernel_seconds += seconds
+
+    def compute_samples(
+        self,
+        x_samples: np.ndarray,
+        y_samples: np.ndarray,
+        x_probes: np.ndarray,
+        y_probes: np.ndarray,
+    ) -> Tuple[np.ndarray, int]:
+        compile_seconds = self.stats.compile_seconds
+
+        with (
+            timed(self._add_call_seconds),
+            compile_timer(self.mode, self._add_compile_seconds),
+        ):
+            results, samples_spent, iterations = self._call_field_function(
+                x_samples, y_samples, x_probes, y_probes
             )
-            print(line)
 
+        # Kernel time leaves out compiling, which happens inside the call
+        self.stats.kernel_seconds -= self.stats.compile_seconds - compile_seconds
+        self.stats.cells += results.size
+        self.stats.samples_spent += int(samples_spent)
 
-def render(
-    x_grid: np.ndarray,
-    y_grid: np.ndarray,
-    sample_grid_function,
-    average_escape_function,
-) -> np.ndarray:
-    x_grid, y_grid = x_grid, y_grid
-    x_unit_length, y_unit_length = x_grid[1] - x_grid[0], y_grid[1] - y_grid[0]
-
-    results = np.empty(shape=(len(y_grid), len(x_grid)))
-
-    for j in range(len(y_grid)):
-        for i in range(len(x_grid)):
-            x_center = x_grid[i]
-            y_center = y_grid[-(j + 1)]
-            x_sample_grid, y_sample_grid = sample_grid_function(
-                x_center=x_center,
-                y_center=y_center,
-                x_length=x_unit_length,
-                y_length=y_unit_length,
+        if iterations is None or self.stats.iterations is None:
+            self.stats.iterations = None
+        else:
+            self.stats.iterations += int(iterations)
+
+        capped_cells = self.fractal.capped_cells(results)
+        if capped_cells is None or self.stats.capped_cells is None:
+            self.stats.capped_cells = None
+        else:
+            self.stats.capped_cells += capped_cells
+
+        return compact_results(results, self.dtype), int(samples_spent)
+
+    def _call_field_function(
+        self,
+        x_samples: np.ndarray,
+        y_samples: np.ndarray,
+        x_probes: np.ndarray,
+        y_probes: np.ndarray,
+    ) -> Tuple[np.ndarray, int, int | None]:
+        # Results with the samples taken and the iterations the kernels ran,
+        # None when they do not count them
+        if self.strategy == "adaptive":
+            results, samples_spent, iterations = self.average_escape_field_function(
+                x_samples, y_samples, x_probes, y_probes, self.tolerance
+            )
+        elif self.strategy == "subdivide":
+            results, cells_evaluated, iterations = self.average_escape_field_function(
+                x_samples, y_samples, self.block_size
             )
+            samples_spent = cells_evaluated * self.samples**2
+        else:
+            results, iterations = self.average_escape_field_function(
+                x_samples, y_samples
+            )
+            samples_spent = results.size * self.samples**2
+
+        return results, samples_spent, iterations
+
 
-            results[j, i] = average_escape_function(x_sample_grid, y_sample_grid)
+def compact_results(results: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    if np.issubdtype(dtype, np.integer):
+        results = np.rint(results)
+
+    return results.astype(dtype, copy=False)
+
+
+def open_results(path: str, shape: tuple[int, int], dtype: np.dtype) -> np.ndarray:
+    # A .npy file mapped into memory, which numpy can load back with its shape
+    return np.lib.format.open_memmap(path, mode="w+", shape=shape, dtype=dtype)
+
+
+def render(
+    grid: GridPoints,
+    average_escape_field_function: Callable,
+    samples: int = 5,
+) -> np.ndarray:
+    x_samples, y_samples = grid.sample_grids(divisions=samples)
+    results, _ = average_escape_field_function(x_samples, y_samples)
 
     return results
+
+
+def render_adaptive(
+    grid: GridPoints,
+    adaptive_average_escape_field_function: Callable,
+    samples: int = 5,
+    tolerance: float = 0.0,
+) -> Tuple[np.ndarray, int]:
+    x_samples, y_samples = grid.sample_grids(divisions=samples)
+    x_probes, y_probes = grid.probe_grids()
+
+    results, samples_spent, _ = adaptive_average_escape_field_function(
+        x_samples, y_samples, x_probes, y_probes, tolerance
+    )
+
+    return results, int(samples_spent)
+
+
+def render_subdivided(
+    grid: GridPoints,
+    subdivided_average_escape_field_function: Callable,
+    samples: int = 5,
+    block_size: int = 32,
+) -> Tuple[np.ndarray, int]:
+    x_samples, y_samples = grid.sample_grids(divisions=samples)
+
+    results, cells_evaluated, _ = subdivided_average_escape_field_function(
+        x_samples, y_samples, block_size
+    )
+
+    return results, int(cells_evaluated)
@@ -0,0 +1,314 @@
+import os
+import sys
+from functools import cache
+from math import floor
+from typing import Callable, Literal, TextIO
+
+import numpy as np
+
+from src.ascii import get_ascii_frame, palette, shade
+from src.backend import compile_kernel, prange, set_num_threads, specialize
+from src.grid import ComplexPoint, GridPoints, generate_square_grid
+
+
+def chaos_game(
+    maps: np.ndarray,
+    cumulative: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    states: np.ndarray,
+    steps: int,
+    skip: int,
+    counts: np.ndarray,
+    left: float,
+    top: float,
+    x_step: float,
+    y_step: float,
+):
+    # Moves every walker from (x, y) through steps maps, picked by the
+    # cumulative probabilities with uniforms from the walker's own generator,
+    # and counts the points after the first skip in the cell of the grid they
+    # land in. Walkers are split into contiguous groups, each counted into its
+    # own histogram so groups run in parallel
+    groups, rows, columns = counts.shape
+    walkers = len(states)
+
+    for group in prange(groups):
+        for walker in range(group * walkers // groups, (group + 1) * walkers // groups):
+            point_x, point_y = x[walker], y[walker]
+            state = states[walker]
+
+            for step in range(steps):
+                # xorshift32, whose values stay below 2**45 so the same
+                # arithmetic runs on Python, numba and numpy integers
+                state ^= (state << 13) & 0xFFFFFFFF
+                state ^= state >> 17
+                state ^= (state << 5) & 0xFFFFFFFF
+                uniform = state / 4294967296.0
+
+                m = 0
+                while m < len(cumulative) - 1 and uniform >= cumulative[m]:
+                    m += 1
+
+                point_x, point_y = (
+                    maps[m, 0] * point_x + maps[m, 1] * point_y + maps[m, 4],
+                    maps[m, 2] * point_x + maps[m, 3] * point_y + maps[m, 5],
+                )
+                if step < skip:
+                    continue
+
+                i = floor((point_x - left) / x_step)
+                j = floor((top - point_y) / y_step)
+                if 0 <= i < columns and 0 <= j < rows:
+                    counts[group, j, i] += 1
+
+            x[walker], y[walker] = point_x, point_y
+            states[walker] = state
+
+
+@cache
+def compile_chaos_game(parallel: bool, /) -> Callable:
+    # numba keys its cache by the qualified name alone, so the parallel copy
+    # needs a name of its own
+    function = specialize(chaos_game, "parallel" if parallel else None)
+
+    return compile_kernel(function, cache=True, parallel=parallel)
+
+
+def chaos_game_numpy(
+    maps: np.ndarray,
+    cumulative: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    states: np.ndarray,
+    steps: int,
+    skip: int,
+    counts: np.ndarray,
+    left: float,
+    top: float,
+    x_step: float,
+    y_step: float,
+):
+    # Steps every walker at once, then bins the whole batch in one bincount
+    _, rows, columns = counts.shape
+    walkers = len(states)
+
+    points_x = np.empty(shape=(walkers, steps))
+    points_y = np.empty(shape=(walkers, steps))
+    for step in range(steps):
+        states ^= (states << 13) & 0xFFFFFFFF
+        states ^= states >> 17
+        states ^= (states << 5) & 0xFFFFFFFF
+
+        m = np.minimum(
+            np.searchsorted(cumulative, states / 4294967296.0, side="right"),
+            len(cumulative) - 1,
+        )
+        x, y = (
+            maps[m, 0] * x + maps[m, 1] * y + maps[m, 4],
+            maps[m, 2] * x + maps[m, 3] * y + maps[m, 5],
+        )
+        points_x[:, step], points_y[:, step] = x, y
+
+    i = np.floor((points_x[:, skip:] - left) / x_step)
+    j = np.floor((top - points_y[:, skip:]) / y_step)
+    inside = (i >= 0) & (i < columns) & (j >= 0) & (j < rows)
+
+    counts[0] += np.bincount(
+        (j[inside] * columns + i[inside]).astype(np.int64),
+        minlength=rows * columns,
+    ).reshape(rows, columns)
+
+    return points_x[:, -1], points_y[:, -1]
+
+
+class IteratedFunctionSystem:
+    # Affine maps (a, b, c, d, e, f) taking (x, y) to
+    # (a x + b y + e, c x + d y + f), each picked with its probability
+    def __init__(
+        self,
+        maps: list[tuple[float, float, float, float, float, float]],
+        probabilities: list[float] | None = None,
+    ):
+        self.maps = np.asarray(maps, dtype=np.float64).reshape(-1, 6)
+
+        if probabilities is None:
+            # Maps are picked in proportion to the area they keep, with a
+            # floor so maps collapsing the plane onto a line still show
+            areas = np.abs(
+                self.maps[:, 0] * self.maps[:, 3] - self.maps[:, 1] * self.maps[:, 2]
+            )
+            probabilities = np.maximum(areas, 0.01 * max(areas.sum(), 1e-12))
+
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if len(probabilities) != len(self.maps) or np.any(probabilities < 0):
+            raise ValueError("Every map needs one non-negative probability")
+        if probabilities.sum() <= 0:
+            raise ValueError("At least one map needs a positive probability")
+
+        self.probabilities = probabilities / probabilities.sum()
+        self.cumulative = np.cumsum(self.probabilities)
+        self.cumulative[-1] = 1.0
+
+    def bounds(
+        self, points: int = 10_000, seed: int = 0
+    ) -> tuple[float, float, float, float]:
+        # Smallest and largest x and y of a short chaos game
+        generator = np.random.default_rng(seed)
+        x, y = 0.0, 0.0
+        xs, ys = np.empty(points), np.empty(points)
+
+        for index, m in enumerate(
+            np.minimum(
+                np.searchsorted(
+                    self.cumulative, generator.random(points + 20), "right"
+                ),
+                len(self.maps) - 1,
+            )
+        ):
+            a, b, c, d, e, f = self.maps[m]
+            x, y = a * x + b * y + e, c * x + d * y + f
+            if index >= 20:
+                xs[index - 20], ys[index - 20] = x, y
+
+        return xs.min(), xs.max(), ys.min(), ys.max()
+
+    def fit_grid(self, divisions: int, margin: float = 0.05) -> GridPoints:
+        # Square view around the attractor, as from generate_square_grid
+        min_x, max_x, min_y, max_y = self.bounds()
+        side_length = max(max_x - min_x, max_y - min_y) * (1 + margin)
+
+        return generate_square_grid(
+            center=ComplexPoint((min_x + max_x) / 2, (min_y + max_y) / 2),
+            side_length=side_length,
+            divisions=divisions,
+        )
+
+
+def sierpinski_triangle() -> IteratedFunctionSystem:
+    return IteratedFunctionSystem(
+        [
+            (0.5, 0, 0, 0.5, 0, 0),
+            (0.5, 0, 0, 0.5, 0.5, 0),
+            (0.5, 0, 0, 0.5, 0.25, np.sqrt(3) / 4),
+        ]
+    )
+
+
+def sierpinski_carpet() -> IteratedFunctionSystem:
+    return IteratedFunctionSystem(
+        [
+            (1 / 3, 0, 0, 1 / 3, i / 3, j / 3)
+            for i in range(3)
+            for j in range(3)
+            if (i, j) != (1, 1)
+        ]
+    )
+
+
+def barnsley_fern() -> IteratedFunctionSystem:
+    return IteratedFunctionSystem(
+        [
+            (0, 0, 0, 0.16, 0, 0),
+            (0.85, 0.04, -0.04, 0.85, 0, 1.6),
+            (0.2, -0.26, 0.23, 0.22, 0, 1.6),
+            (-0.15, 0.28, 0.26, 0.24, 0, 0.44),
+        ],
+        probabilities=[0.01, 0.85, 0.07, 0.07],
+    )
+
+
+shapes = {
+    "triangle": sierpinski_triangle,
+    "carpet": sierpinski_carpet,
+    "fern": barnsley_fern,
+}
+
+
+class ChaosGame:
+    # Plays the chaos game of an iterated function system with many walkers,
+    # counting their points in the cells of the grid. Every walker draws from
+    # its own random stream seeded from the seed, inside the kernel, so the
+    # counts are the same in every mode and for any number of workers
+    def __init__(
+        self,
+        system: IteratedFunctionSystem,
+        grid: GridPoints,
+        points: int = 1_000_000,
+        mode: Literal["normal", "jit", "parallel", "numpy"] = "parallel",
+        walkers: int = 256,
+        workers: int | None = None,
+        seed: int = 0,
+        transient: int = 20,
+        batch_size: int = 4096,
+    ):
+        self.system = system
+        self.grid = grid
+        self.points = points
+        self.mode = mode
+        self.walkers = walkers
+        self.workers = workers
+        self.seed = seed
+        self.transient = transient
+        self.batch_size = batch_size
+
+        if mode == "normal":
+            self.chaos_game = chaos_game
+        elif mode == "numpy":
+            self.chaos_game = chaos_game_numpy
+        elif mode in ("jit", "parallel"):
+            self.chaos_game = compile_chaos_game(mode == "parallel")
+        else:
+            raise ValueError(f"The {mode} mode is not supported for the chaos game")
+
+    def compute(self) -> np.ndarray:
+        x_step, y_step = self.grid.steps()
+        left = self.grid.x_grid[0] - x_step / 2
+        top = self.grid.y_grid[-1] + y_step / 2
+
+        groups = 1
+        if self.mode == "parallel":
+            if self.workers is not None:
+                set_num_threads(self.workers)
+            groups = self.workers or os.cpu_count()
+
+        counts = np.zeros(
+            shape=(groups, len(self.grid.y_grid), len(self.grid.x_grid)),
+            dtype=np.int64,
+        )
+
+        # Every walker's generator starts from its own word of the seed's
+        # state, and xorshift needs a state other than zero
+        states = np.random.SeedSequence(self.seed).generate_state(self.walkers)
+        states = np.maximum(states.astype(np.int64), 1)
+        x, y = np.zeros(self.walkers), np.zeros(self.walkers)
+
+        # Walkers take batch_size steps per call, which bounds the memory of
+        # the numpy mode
+        steps = self.transient + -(-self.points // self.walkers)
+
+        for start in range(0, steps, self.batch_size):
+            result = self.chaos_game(
+                self.system.maps,
+                self.system.cumulative,
+                x,
+                y,
+                states,
+                min(self.batch_size, steps - start),
+                max(self.transient - start, 0),
+                counts,
+                left,
+                top,
+                x_step,
+                y_step,
+            )
+            if result is not None:
+                x, y = result
+
+        return counts.sum(axis=0)
+
+    def render(self, file: TextIO | None = None, palette: list[str] = palette):
+        file = sys.stdout if file is None else file
+
+        file.write(get_ascii_frame(*shade(self.compute(), len(palette)), palette))
+        file.flush()
@@ -0,0 +1,114 @@
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterator
+
+# Statistics are gathered on every render, a few timer reads, iterations summed
+# inside the kernels and one count over the cells of each band, and passed to
+# the hooks registered here
+hooks: list[Callable[["RenderStats"], None]] = []
+
+
+@dataclass
+class RenderStats:
+    fractal: str
+    mode: str
+    strategy: str
+    cells: int = 0
+    samples: int = 0
+    max_iterations: int = 0
+
+    # Seconds spent building the field functions, compiling kernels or
+    # loading them from the on disk cache, generating sample grids, running
+    # kernels and formatting characters
+    setup_seconds: float = 0.0
+    compile_seconds: float = 0.0
+    grid_seconds: float = 0.0
+    kernel_seconds: float = 0.0
+    output_seconds: float = 0.0
+
+    samples_spent: int = 0
+    # Iterations the escape kernels ran over all samples, summed inside the
+    # kernels, or None in the numpy and gpu modes whose kernels do not count
+    # them. Interior checks and early exits make them fewer than the escape
+    # counts. Cells averaging max_iterations, or None for fractals whose values
+    # are not escape counts
+    iterations: int | None = 0
+    capped_cells: int | None = 0
+
+    @property
+    def samples_per_cell(self) -> float:
+        return self.samples_spent / self.cells if self.cells else 0.0
+
+    @property
+    def capped_fraction(self) -> float | None:
+        if self.capped_cells is None:
+            return None
+
+        return self.capped_cells / self.cells if self.cells else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "samples_per_cell": self.samples_per_cell,
+            "capped_fraction": self.capped_fraction,
+        }
+
+
+def combine(stats: list[RenderStats]) -> RenderStats:
+    # Totals of several computes of one renderer, such as the tiles of a view
+    combined = RenderStats(**asdict(stats[0]))
+
+    for other in stats[1:]:
+        for name in [
+            "cells",
+            "compile_seconds",
+            "grid_seconds",
+            "kernel_seconds",
+            "output_seconds",
+            "samples_spent",
+            "iterations",
+            "capped_cells",
+        ]:
+            total, value = getattr(combined, name), getattr(other, name)
+            setattr(
+                combined,
+                name,
+                None if total is None or value is None else total + value,
+            )
+
+    return combined
+
+
+def add_hook(hook: Callable[[RenderStats], None]):
+    hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[RenderStats], None]):
+    hooks.remove(hook)
+
+
+def emit(stats: RenderStats):
+    for hook in hooks:
+        hook(stats)
+
+
+@contextmanager
+def timed(callback: Callable[[float], None]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        callback(time.perf_counter() - start)
+
+
+def compile_timer(mode: str, callback: Callable[[float], None]):
+    # numba holds its compiler lock while compiling or loading a kernel from
+    # the cache. The normal and numpy modes never import numba, so neither
+    # does their timer
+    if mode not in ("jit", "parallel", "gpu"):
+        return nullcontext()
+
+    from numba.core.event import install_timer
+
+    return install_timer("numba:compiler_lock", callback)
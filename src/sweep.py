@@ -0,0 +1,124 @@
+from functools import partial
+from typing import Iterator, Literal
+
+import numpy as np
+
+from src.backend import prange, set_num_threads
+from src.escape_fractal import (
+    EscapeFractal,
+    bind_escape_function,
+    compile_field_function,
+    escape_function,
+)
+from src.grid import GridPoints
+from src.julia import julia_escape, julia_escape_jit, julia_escape_numpy
+
+
+def julia_sweep_field(
+    x_samples: np.ndarray,
+    y_samples: np.ndarray,
+    parameters_x: np.ndarray,
+    parameters_y: np.ndarray,
+    results: np.ndarray,
+    max_iterations: int,
+):
+    # A field template like those of EscapeFractal, with the escape_function
+    # placeholder bound to the Julia escape kernel
+    frames, rows, columns = results.shape
+    x_divisions, y_divisions = x_samples.shape[1], y_samples.shape[1]
+
+    # Frames and rows share one parallel loop, so sweeps of a few large frames
+    # and of many thumbnails both keep every thread busy
+    for n in prange(frames * rows):
+        frame, j = n // rows, n % rows
+        parameter_x, parameter_y = parameters_x[frame], parameters_y[frame]
+
+        for i in range(columns):
+            total = 0
+            for k in range(x_divisions):
+                for m in range(y_divisions):
+                    total += escape_function(
+                        x_samples[i, k],
+                        y_samples[j, m],
+                        max_iterations,
+                        parameter_x,
+                        parameter_y,
+                    )
+            results[frame, j, i] = total / (x_divisions * y_divisions)
+
+
+class JuliaSweep:
+    # Renders the Julia sets of many parameters over one view. One compiled
+    # kernel takes the parameters as arrays, and one sample grid serves all frames
+    def __init__(
+        self,
+        max_iterations: int,
+        grid: GridPoints,
+        mode: Literal["normal", "jit", "parallel", "numpy"] = "parallel",
+        samples: int = 5,
+        workers: int | None = None,
+    ):
+        self.max_iterations = max_iterations
+        self.mode = mode
+        self.samples = samples
+        self.workers = workers
+
+        self.x_samples, self.y_samples = grid.sample_grids(divisions=samples)
+        self.shape = (len(self.y_samples), len(self.x_samples))
+
+        if mode == "numpy":
+            self.sweep_field_function = None
+        elif mode == "normal":
+            self.sweep_field_function = bind_escape_function(
+                julia_sweep_field, julia_escape
+            )
+        elif mode in ("jit", "parallel"):
+            self.sweep_field_function = compile_field_function(
+                julia_sweep_field, julia_escape_jit, mode == "parallel"
+            )
+        else:
+            raise ValueError(f"The {mode} mode is not supported for Julia sweeps")
+
+    def compute(self, parameters: np.ndarray) -> np.ndarray:
+        # Frames of the complex parameters stacked along the first axis
+        parameters = np.asarray(parameters, dtype=np.complex128).ravel()
+        results = np.empty(shape=(len(parameters), *self.shape))
+
+        if self.mode == "numpy":
+            for frame, parameter in enumerate(parameters):
+                average_escape_field = (
+                    EscapeFractal.average_escape_field_function_numpy(
+                        partial(
+                            julia_escape_numpy,
+                            max_iterations=self.max_iterations,
+                            parameter_x=parameter.real,
+                            parameter_y=parameter.imag,
+                        )
+                    )
+                )
+                results[frame], _ = average_escape_field(self.x_samples, self.y_samples)
+
+            return results
+
+        if self.mode == "parallel" and self.workers is not None:
+            set_num_threads(self.workers)
+
+        self.sweep_field_function(
+            self.x_samples,
+            self.y_samples,
+            np.ascontiguousarray(parameters.real),
+            np.ascontiguousarray(parameters.imag),
+            results,
+            self.max_iterations,
+        )
+
+        return results
+
+    def stream(
+        self, parameters: np.ndarray, batch_size: int = 64
+    ) -> Iterator[np.ndarray]:
+        # Frames one at a time, computed batch_size parameters per kernel call
+        parameters = np.asarray(parameters, dtype=np.complex128).ravel()
+
+        for start in range(0, len(parameters), batch_size):
+            yield from self.compute(parameters[start : start + batch_size])
@@ -0,0 +1,207 @@
+import sys
+from math import cos, radians, sin
+from typing import Literal, TextIO
+
+import numpy as np
+
+from src.ascii import get_ascii_frame, palette, shade
+from src.backend import njit
+from src.l_system import LSystem
+
+# Turtle actions the symbols are translated to, and that turtle_walk reads
+IGNORE, DRAW, MOVE, LEFT, RIGHT, PUSH, POP = range(7)
+
+
+def turtle_walk(
+    actions: np.ndarray,
+    state: np.ndarray,
+    stack: np.ndarray,
+    angle: float,
+    step: float,
+    bounds: np.ndarray,
+    counts: np.ndarray,
+    origin_x: float,
+    origin_y: float,
+    scale: float,
+):
+    # Walks one chunk of actions from the turtle state (x, y, heading, depth,
+    # last row, last column), growing the bounds (min x, max x, min y, max y)
+    # by every point reached. Unless counts is empty, every cell a stroke
+    # passes through is counted once, with columns at scale cells per unit and
+    # rows at half that. The last cell counted is kept in the state, so that a
+    # stroke continuing into the next chunk does not count it again
+    rows, columns = counts.shape
+    x, y, heading, depth = state[0], state[1], state[2], int(state[3])
+    last_row, last_column = int(state[4]), int(state[5])
+
+    for action in actions:
+        if action == DRAW or action == MOVE:
+            next_x = x + step * cos(heading)
+            next_y = y + step * sin(heading)
+
+            if action == DRAW and rows > 0:
+                column, row = (x - origin_x) * scale, (origin_y - y) * scale / 2
+                next_column = (next_x - origin_x) * scale
+                next_row = (origin_y - next_y) * scale / 2
+
+                points = int(max(abs(next_column - column), abs(next_row - row))) + 1
+                for k in range(points + 1):
+                    fraction = k / points
+                    j = int(row + fraction * (next_row - row) + 0.5)
+                    i = int(column + fraction * (next_column - column) + 0.5)
+                    j, i = min(max(j, 0), rows - 1), min(max(i, 0), columns - 1)
+
+                    if j != last_row or i != last_column:
+                        counts[j, i] += 1
+                        last_row, last_column = j, i
+
+            x, y = next_x, next_y
+            bounds[0], bounds[1] = min(bounds[0], x), max(bounds[1], x)
+            bounds[2], bounds[3] = min(bounds[2], y), max(bounds[3], y)
+        elif action == LEFT:
+            heading += angle
+        elif action == RIGHT:
+            heading -= angle
+        elif action == PUSH and depth < stack.shape[0]:
+            stack[depth, 0], stack[depth, 1], stack[depth, 2] = x, y, heading
+            depth += 1
+        elif action == POP and depth > 0:
+            depth -= 1
+            x, y, heading = stack[depth, 0], stack[depth, 1], stack[depth, 2]
+
+    state[0], state[1], state[2], state[3] = x, y, heading, depth
+    state[4], state[5] = last_row, last_column
+
+
+turtle_walk_jit = njit(turtle_walk, cache=True)
+
+
+def bracket_depth(symbols: str) -> int:
+    # Deepest nesting of the brackets, which must be balanced
+    depth = deepest = 0
+    for symbol in symbols:
+        depth += 1 if symbol == "[" else -1 if symbol == "]" else 0
+        deepest = max(deepest, depth)
+
+        if depth < 0:
+            break
+
+    if depth != 0:
+        raise ValueError(f"Unbalanced brackets in '{symbols}'")
+
+    return deepest
+
+
+class TurtleRenderer:
+    # Draws a generation of an L-system with a turtle: draw symbols step
+    # forward drawing, move symbols step forward without drawing, + and - turn
+    # by the angle in degrees, and [ and ] save and restore the turtle. The
+    # symbols are streamed twice in chunks, once for the bounding box and once
+    # to count the strokes through every cell, so the generation is never built
+    def __init__(
+        self,
+        system: LSystem,
+        generations: int,
+        angle: float,
+        divisions: int = 100,
+        step: float = 1.0,
+        heading: float = 0.0,
+        draw: str = "FG",
+        move: str = "f",
+        mode: Literal["normal", "jit"] = "jit",
+        chunk_size: int = 1 << 16,
+    ):
+        self.system = system
+        self.generations = generations
+        self.angle = radians(angle)
+        self.step = step
+        self.heading = radians(heading)
+        self.divisions = divisions
+        self.mode = mode
+        self.chunk_size = chunk_size
+
+        self.actions = str.maketrans(
+            {
+                symbol: chr(
+                    DRAW
+                    if symbol in draw
+                    else MOVE
+                    if symbol in move
+                    else LEFT
+                    if symbol == "+"
+                    else RIGHT
+                    if symbol == "-"
+                    else PUSH
+                    if symbol == "["
+                    else POP
+                    if symbol == "]"
+                    else IGNORE
+                )
+                for symbol in system.alphabet
+            }
+        )
+        self.walk = turtle_walk if mode == "normal" else turtle_walk_jit
+
+        # With balanced brackets, every expansion nests at most the deepest
+        # rule within a symbol
+        self.stack_size = bracket_depth(system.axiom) + generations * max(
+            map(bracket_depth, system.rules.values()), default=0
+        )
+        self._bounds = None
+
+    def _walk(self, counts: np.ndarray, origin_x=0.0, origin_y=0.0, scale=1.0):
+        state = np.array([0.0, 0.0, self.heading, 0.0, -1.0, -1.0])
+        stack = np.empty(shape=(self.stack_size, 3))
+        bounds = np.zeros(4)
+
+        for chunk in self.system.chunks(self.generations, chunk_size=self.chunk_size):
+            actions = np.frombuffer(
+                chunk.translate(self.actions).encode("latin-1"), dtype=np.uint8
+            )
+            self.walk(
+                actions,
+                state,
+                stack,
+                self.angle,
+                self.step,
+                bounds,
+                counts,
+                origin_x,
+                origin_y,
+                scale,
+            )
+
+        return bounds
+
+    def bounds(self) -> np.ndarray:
+        # Smallest and largest x and y the turtle reaches, from the first pass
+        if self._bounds is None:
+            self._bounds = self._walk(np.zeros(shape=(0, 0), dtype=np.int64))
+
+        return self._bounds
+
+    def compute(self) -> np.ndarray:
+        rows, columns = int(self.divisions / 2), self.divisions
+        min_x, max_x, min_y, max_y = self.bounds()
+        width, height = max_x - min_x, max_y - min_y
+
+        # A row is about twice as tall as a column is wide, so a unit spans
+        # half as many rows as columns, and the drawing is centered
+        scale = min(
+            (columns - 1) / width if width > 0 else np.inf,
+            2 * (rows - 1) / height if height > 0 else np.inf,
+        )
+        scale = 1.0 if np.isinf(scale) else scale
+        origin_x = min_x - ((columns - 1) / scale - width) / 2
+        origin_y = max_y + (2 * (rows - 1) / scale - height) / 2
+
+        counts = np.zeros(shape=(rows, columns), dtype=np.int64)
+        self._walk(counts, origin_x, origin_y, scale)
+
+        return counts
+
+    def render(self, file: TextIO | None = None, palette: list[str] = palette):
+        file = sys.stdout if file is None else file
+
+        file.write(get_ascii_frame(*shade(self.compute(), len(palette)), palette))
+        file.flush()
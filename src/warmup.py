@@ -0,0 +1,76 @@
+from typing import Iterable, Literal
+
+import numpy as np
+
+from src.burning_ship import BurningShip
+from src.escape_fractal import EscapeFractal
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet
+from src.lyapunov import Lyapunov
+from src.mandelbrot import Mandelbrot
+from src.perturbation import PerturbedMandelbrot
+from src.progressive import ProgressiveRender
+from src.render import Renderer
+
+
+def warmup_fractals() -> list[tuple[EscapeFractal, ComplexPoint]]:
+    # One fractal of every kind with arguments of the types the CLI passes,
+    # since compiled kernels are cached per argument type signature
+    return [
+        (Mandelbrot(max_iterations=100), ComplexPoint(-0.5, 0.0)),
+        (
+            JuliaSet(max_iterations=100, parameter=ComplexPoint(-0.8, 0.156)),
+            ComplexPoint(0.0, 0.0),
+        ),
+        (BurningShip(max_iterations=100), ComplexPoint(-0.5, -0.5)),
+        (Lyapunov(max_iterations=100, sequence="AB"), ComplexPoint(3.0, 3.0)),
+        (
+            PerturbedMandelbrot(
+                max_iterations=100, center_x="-0.5", center_y="0", side_length=4
+            ),
+            ComplexPoint(0.0, 0.0),
+        ),
+    ]
+
+
+def warmup(
+    modes: Iterable[Literal["jit", "parallel"]] = ("jit", "parallel"),
+    strategies: Iterable[Literal["full", "adaptive", "subdivide"]] = (
+        "full",
+        "adaptive",
+        "subdivide",
+    ),
+) -> int:
+    # Renders a tiny frame with every kernel so that they are compiled and
+    # written to numba's on disk cache, returning the number of kernels built
+    modes, strategies = list(modes), list(strategies)
+
+    kernels = 0
+    for fractal, center in warmup_fractals():
+        grid = generate_square_grid(center=center, side_length=0.5, divisions=4)
+
+        for mode in modes:
+            for strategy in strategies:
+                Renderer(
+                    fractal=fractal, grid=grid, mode=mode, strategy=strategy
+                ).compute()
+                kernels += 1
+
+            # Cells reevaluated between the frames of an animation
+            x_samples, y_samples = grid.sample_grids()
+            rows, columns = np.nonzero(np.ones(shape=(len(y_samples), len(x_samples))))
+            fractal.build_selected_average_escape_field_function(mode=mode)(
+                x_samples, y_samples, rows, columns
+            )
+            kernels += 1
+
+            if not fractal.resumable:
+                continue
+
+            progressive = ProgressiveRender(
+                fractal=fractal, grid=grid, mode=mode, samples=2
+            )
+            progressive.refine(max_iterations=fractal.max_iterations)
+            kernels += 1
+
+    return kernels
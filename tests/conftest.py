@@ -0,0 +1,5 @@
+import os
+
+# The gpu mode is tested on the CPU with numba's CUDA simulator unless a real
+# device is requested with NUMBA_ENABLE_CUDASIM=0
+os.environ.setdefault("NUMBA_ENABLE_CUDASIM", "1")
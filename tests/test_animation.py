@@ -0,0 +1,123 @@
+import io
+
+import numpy as np
+
+from src.animation import HOME, Keyframe, SequenceRenderer, interpolate_keyframes
+from src.grid import ComplexPoint, generate_square_grid
+from src.mandelbrot import Mandelbrot
+from src.render import Renderer
+
+
+def render_directly(keyframe: Keyframe, divisions: int, samples: int) -> np.ndarray:
+    grid = generate_square_grid(keyframe.center, keyframe.size, divisions)
+
+    return Renderer(
+        fractal=Mandelbrot(max_iterations=keyframe.max_iterations),
+        grid=grid,
+        mode="jit",
+        samples=samples,
+    ).compute()
+
+
+def test_interpolate_keyframes():
+    keyframes = [
+        Keyframe(0, ComplexPoint(0, 0), 4, 100),
+        Keyframe(2, ComplexPoint(1, 1), 1, 300),
+        Keyframe(1, ComplexPoint(1, 0), 2, 200),
+    ]
+
+    path = interpolate_keyframes(keyframes, 5)
+
+    assert [keyframe.time for keyframe in path] == [0, 0.5, 1, 1.5, 2]
+    assert [keyframe.max_iterations for keyframe in path] == [100, 150, 200, 250, 300]
+    assert np.allclose([keyframe.size for keyframe in path], [4, 2**1.5, 2, 2**0.5, 1])
+
+    # The center moves in proportion to the size
+    assert np.isclose(path[1].center.x, (4 - 2**1.5) / 2)
+    assert path[2].center == ComplexPoint(1, 0)
+    assert path[4].center == ComplexPoint(1, 1)
+
+
+def test_sequence_pan():
+    # A pan by whole cells reuses every cell still in view unchanged
+    keyframes = [
+        Keyframe(0, ComplexPoint(-0.5, 0), 3, 100),
+        Keyframe(1, ComplexPoint(0.4, 0), 3, 100),
+    ]
+    sequence = SequenceRenderer(
+        make_fractal=lambda max_iterations: Mandelbrot(max_iterations=max_iterations),
+        keyframes=keyframes,
+        frames=10,
+        divisions=30,
+        samples=2,
+        tolerance=1e-6,
+    )
+
+    for keyframe, frame in zip(sequence.path, sequence.frames()):
+        assert np.array_equal(frame, render_directly(keyframe, 30, 2))
+
+    assert sequence.cells_computed == [30 * 15] + [15] * 9
+
+
+def test_sequence_zoom():
+    keyframes = [
+        Keyframe(0, ComplexPoint(-0.5, 0), 3, 100),
+        Keyframe(1, ComplexPoint(-0.745, 0.11), 1, 100),
+    ]
+    sequence = SequenceRenderer(
+        make_fractal=lambda max_iterations: Mandelbrot(max_iterations=max_iterations),
+        keyframes=keyframes,
+        frames=30,
+        divisions=40,
+        samples=2,
+        tolerance=0.5,
+    )
+
+    frames = list(sequence.frames())
+    assert sum(sequence.cells_computed) < 0.5 * 30 * 40 * 20
+
+    for keyframe, frame in zip(sequence.path, frames):
+        expected = render_directly(keyframe, 40, 2)
+        assert np.mean(np.abs(frame - expected)) < 5
+
+
+def test_sequence_depth_change():
+    keyframes = [
+        Keyframe(0, ComplexPoint(-0.5, 0), 3, 50),
+        Keyframe(1, ComplexPoint(-0.5, 0), 3, 100),
+    ]
+    sequence = SequenceRenderer(
+        make_fractal=lambda max_iterations: Mandelbrot(max_iterations=max_iterations),
+        keyframes=keyframes,
+        frames=3,
+        divisions=20,
+        samples=2,
+    )
+
+    for keyframe, frame in zip(sequence.path, sequence.frames()):
+        assert np.array_equal(frame, render_directly(keyframe, 20, 2))
+    assert sequence.cells_computed == [200] * 3
+
+
+def test_sequence_outputs(tmp_path):
+    keyframes = [
+        Keyframe(0, ComplexPoint(-0.5, 0), 3, 100),
+        Keyframe(1, ComplexPoint(-0.5, 0), 2, 100),
+    ]
+    sequence = SequenceRenderer(
+        make_fractal=lambda max_iterations: Mandelbrot(max_iterations=max_iterations),
+        keyframes=keyframes,
+        frames=4,
+        divisions=20,
+        samples=2,
+    )
+
+    file = io.StringIO()
+    sequence.render(file=file)
+    output = file.getvalue()
+    assert output.count(HOME) == 4
+    assert output.count("\n") == 4 * 10
+
+    path = tmp_path / "frames.npy"
+    sequence.save(str(path))
+    assert np.array_equal(np.load(path), np.stack(list(sequence.frames())))
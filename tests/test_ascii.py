@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from src.ascii import ascii_lookup, get_ascii, get_ascii_frame, get_ascii_indices
+
+
+def expected_frame(values, max_iterations, **kwargs):
+    return "".join(
+        "".join(get_ascii(value, max_iterations, **kwargs) for value in row) + "\n"
+        for row in values
+    )
+
+
+def test_get_ascii():
+    assert get_ascii(0, 100) == " "
+    assert get_ascii(55, 100) == "+"
+    assert get_ascii(100, 100) == "@"
+    assert get_ascii(50, 100, palette=["a", "b"]) == "b"
+
+
+def test_get_ascii_frame_floats():
+    values = np.concatenate(
+        [
+            np.random.default_rng(0).uniform(-5, 105, 1000),
+            np.arange(101) / 7 * 7,
+            [0, 100, 9.999999999999, np.nan, np.inf, -np.inf, -0.5],
+        ]
+    )
+    values = values[: len(values) // 8 * 8].reshape(-1, 8)
+
+    assert get_ascii_frame(values, 100) == expected_frame(values, 100)
+
+
+def test_get_ascii_frame_integers():
+    values = np.random.default_rng(1).integers(0, 150, (30, 20)).astype(np.uint16)
+
+    assert np.array_equal(
+        get_ascii_indices(values, 100), get_ascii_indices(values.astype(float), 100)
+    )
+    assert get_ascii_frame(values, 100) == expected_frame(values.tolist(), 100)
+    assert ascii_lookup(100, 10) is ascii_lookup(100, 10)
+
+
+def test_get_ascii_frame_palette():
+    palette = list(" ░▒▓█")
+    values = np.linspace(-1, 60, 40).reshape(4, 10)
+
+    frame = get_ascii_frame(values, 50, palette=palette)
+
+    assert frame == expected_frame(values, 50, palette=palette)
+    assert frame.splitlines()[-1][-1] == "█"
+
+
+def test_get_ascii_frame_invalid_palette():
+    values = np.zeros((2, 2))
+
+    for palette in [[], [" ", "ab"], ["", "#"]]:
+        with pytest.raises(ValueError):
+            get_ascii_frame(values, 10, palette=palette)
@@ -0,0 +1,64 @@
+import os
+import pickle
+import subprocess
+import sys
+
+from numba.extending import is_jitted
+
+from src.backend import LazyKernel, njit
+from src.mandelbrot import mandelbrot_escape_shortcut_jit, mandelbrot_orbit_shortcut_jit
+
+# Cumulative import time of main.py in microseconds. It is about a quarter of
+# a second without numba, and the budget leaves room for cold caches and slow
+# machines, which can set BENOIT_IMPORT_TIME_BUDGET instead
+IMPORT_TIME_BUDGET = int(os.environ.get("BENOIT_IMPORT_TIME_BUDGET", "2000000"))
+
+
+def import_times(*arguments: str) -> dict[str, int]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def test_import_time():
+    times = import_times("-c", "import main")
+
+    assert not [name for name in times if name.startswith("numba")]
+    assert times["main"] < IMPORT_TIME_BUDGET
+
+
+def test_normal_mode_imports():
+    times = import_times("main.py", "mandelbrot", "-d", "10", "-m", "normal")
+
+    assert not [name for name in times if name.startswith("numba")]
+
+
+def test_lazy_kernel():
+    def add(x, y):
+        return x + y
+
+    kernel = njit(add)
+
+    assert isinstance(kernel, LazyKernel)
+    assert kernel._dispatcher is None
+
+    assert kernel(2, 3) == 5
+    assert is_jitted(kernel.dispatcher)
+
+    # Lazy kernels called from a kernel are compiled along with it
+    assert mandelbrot_escape_shortcut_jit(0, 0, 100) == 100
+    for kernel in [mandelbrot_escape_shortcut_jit, mandelbrot_orbit_shortcut_jit]:
+        assert pickle.loads(pickle.dumps(kernel)) is kernel
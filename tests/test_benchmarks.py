@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from benchmarks.suite import compare_results, main, run_case
+
+
+def test_run_case(monkeypatch):
+    case = run_case(
+        "mandelbrot", "jit", divisions=20, max_iterations=50, samples=2, repeats=1
+    )
+
+    assert case["pixels"] == 20 * 10
+    assert 0 < case["iterations_performed"] <= 20 * 10 * 4 * 50
+    assert case["miterations_per_second"] > 0
+    assert case["mpixels_per_second"] > 0
+    assert case["compile_seconds"] >= 0
+
+    assert run_case("perturbation", "gpu", 20, 50, samples=2, repeats=1) is None
+
+    # The numpy kernels do not count their iterations
+    case = run_case("mandelbrot", "numpy", 20, 50, samples=2, repeats=1)
+    assert case["iterations_performed"] is case["miterations_per_second"] is None
+
+    # Only the listed pairs are skipped, other cases that raise fail the run
+    monkeypatch.setattr("benchmarks.suite.UNSUPPORTED", set())
+    with pytest.raises(ValueError):
+        run_case("perturbation", "gpu", 20, 50, samples=2, repeats=1)
+
+
+def test_compare(tmp_path):
+    case = {
+        "fractal": "mandelbrot",
+        "mode": "jit",
+        "divisions": 40,
+        "iterations": 100,
+        "samples": 3,
+        "mpixels_per_second": 1.0,
+    }
+    baseline = {"cases": [case]}
+    faster = {"cases": [{**case, "mpixels_per_second": 1.05}]}
+    slower = {"cases": [{**case, "mpixels_per_second": 0.8}]}
+
+    assert compare_results(baseline, faster, threshold=0.1) == []
+    assert compare_results(baseline, slower, threshold=0.1) == [
+        "mandelbrot/jit/40x100x3"
+    ]
+    assert compare_results(baseline, slower, threshold=0.25) == []
+    assert compare_results(baseline, {"cases": []}, threshold=0.1) == [
+        "mandelbrot/jit/40x100x3"
+    ]
+    uncounted = {"cases": [{**case, "miterations_per_second": None}]}
+    assert (
+        compare_results(uncounted, uncounted, 0.1, metric="miterations_per_second")
+        == []
+    )
+
+    for name, results in [("baseline", baseline), ("slower", slower)]:
+        with open(tmp_path / f"{name}.json", "w") as file:
+            json.dump(results, file)
+
+    paths = [str(tmp_path / "baseline.json"), str(tmp_path / "slower.json")]
+    assert main(["compare", *paths]) == 1
+    assert main(["compare", *paths, "--threshold", "0.3"]) == 0
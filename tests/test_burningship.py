@@ -0,0 +1,45 @@
+import numpy as np
+from numba.extending import is_jitted
+
+from src.burning_ship import (
+    BurningShip,
+    burning_ship_escape,
+    burning_ship_escape_jit,
+    burning_ship_escape_numpy,
+)
+
+
+def test_burning_ship_escape():
+    assert burning_ship_escape(input_x=0, input_y=0, max_iterations=1000) == 1000
+    assert burning_ship_escape(input_x=2, input_y=0, max_iterations=1000) < 1000
+
+    assert burning_ship_escape_jit(input_x=0, input_y=0, max_iterations=1000) == 1000
+    assert burning_ship_escape_jit(input_x=2, input_y=0, max_iterations=1000) < 1000
+
+
+def test_burning_ship_escape_numpy():
+    x_grid = np.linspace(-2.2, 1.2, 50)
+    y_grid = np.linspace(-2, 1, 30)
+
+    counts = burning_ship_escape_numpy(x_grid[None, :], y_grid[:, None], 300)
+
+    assert np.array_equal(
+        counts,
+        [[burning_ship_escape_jit(x, y, 300) for x in x_grid] for y in y_grid],
+    )
+
+
+def test_burning_ship_class():
+    burning_ship = BurningShip(max_iterations=1000)
+
+    average_escape_jit = burning_ship.build_average_escape_function(mode="jit")
+    assert is_jitted(average_escape_jit)
+    assert average_escape_jit([0], [0]) == 1000
+
+    average_escape_field_numpy = burning_ship.build_average_escape_field_function(
+        mode="numpy"
+    )
+    assert average_escape_field_numpy(np.zeros((1, 1)), np.zeros((1, 1))) == (
+        1000,
+        None,
+    )
@@ -0,0 +1,78 @@
+import numpy as np
+
+from src.cache import TileCache, render_cached
+from src.grid import ComplexPoint, GridPoints
+from src.julia import JuliaSet
+from src.mandelbrot import Mandelbrot
+from src.render import Renderer
+
+
+def test_tile_cache_lru():
+    cache = TileCache(capacity=2)
+
+    cache.put("a", np.zeros(1))
+    cache.put("b", np.ones(1))
+    assert cache.get("a") is not None
+
+    cache.put("c", np.ones(1))
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.hits == 3
+    assert cache.misses == 1
+
+
+def test_tile_cache_directory(tmp_path):
+    TileCache(capacity=1, directory=str(tmp_path)).put(("mandelbrot", 1.5), np.eye(3))
+
+    cache = TileCache(capacity=1, directory=str(tmp_path))
+
+    assert np.array_equal(cache.get(("mandelbrot", 1.5)), np.eye(3))
+    assert cache.get(("mandelbrot", 2.5)) is None
+
+
+def test_cache_key():
+    assert Mandelbrot(max_iterations=100).cache_key() == ("Mandelbrot", 100)
+    assert JuliaSet(
+        max_iterations=100, parameter=ComplexPoint(0.35, 0.35)
+    ).cache_key() == ("JuliaSet", 100, 0.35, 0.35)
+
+
+def test_render_cached():
+    renderer = Renderer(
+        fractal=Mandelbrot(max_iterations=100), grid=None, mode="jit", samples=3
+    )
+    cache = TileCache()
+
+    results = render_cached(
+        cache=cache,
+        key=renderer.cache_key(),
+        center=ComplexPoint(-0.5, 0.1),
+        side_length=3,
+        divisions=60,
+        compute_tile=renderer.compute,
+        tile_size=16,
+    )
+
+    x_grid = (np.arange(-40, 20) + 0.5) * 0.05
+    y_grid = (np.arange(-14, 16) + 0.5) * 0.1
+    expected = renderer.compute(GridPoints(x_grid, y_grid))
+
+    assert results.shape == (30, 60)
+    assert np.array_equal(results, expected)
+    assert cache.misses == len(cache) == 10
+
+    panned = render_cached(
+        cache=cache,
+        key=renderer.cache_key(),
+        center=ComplexPoint(-0.4, 0.1),
+        side_length=3,
+        divisions=60,
+        compute_tile=renderer.compute,
+        tile_size=16,
+    )
+
+    assert np.array_equal(panned[:, :-2], results[:, 2:])
+    assert cache.misses == 10
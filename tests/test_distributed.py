@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.distributed import TileScheduler, split_tiles
+from src.grid import ComplexPoint, generate_square_grid
+from src.mandelbrot import Mandelbrot
+from src.render import Renderer
+
+
+def test_split_tiles_covers_frame():
+    tiles = split_tiles(rows=10, columns=25, tile_size=8)
+
+    covered = np.zeros(shape=(10, 25), dtype=np.int64)
+    for tile in tiles:
+        covered[tile.row_start : tile.row_end, tile.column_start : tile.column_end] += 1
+
+    assert len(tiles) == 2 * 4
+    assert np.all(covered == 1)
+
+
+def test_tile_scheduler_matches_renderer():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 60)
+    fractal = Mandelbrot(max_iterations=50)
+
+    for strategy in ["full", "adaptive"]:
+        scheduler = TileScheduler(
+            fractal=fractal,
+            grid=grid,
+            mode="jit",
+            strategy=strategy,
+            tile_size=16,
+            processes=2,
+        )
+        renderer = Renderer(fractal=fractal, grid=grid, mode="jit", strategy=strategy)
+
+        results = scheduler.compute()
+
+        np.testing.assert_array_equal(results, renderer.compute())
+        assert len(scheduler.timings) == len(split_tiles(*results.shape, 16))
+        assert 1 <= len({timing.worker for timing in scheduler.timings}) <= 2
+        # Adaptive tiles also probe a border around themselves
+        assert scheduler.samples_spent >= renderer.samples_spent
+
+
+def test_tile_scheduler_result_file(tmp_path):
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 60)
+    fractal = Mandelbrot(max_iterations=50)
+
+    scheduler = TileScheduler(
+        fractal=fractal, grid=grid, tile_size=16, processes=2, compact=True
+    )
+    results = scheduler.compute(path=str(tmp_path / "frame.npy"))
+    renderer = Renderer(fractal=fractal, grid=grid, mode="jit", compact=True)
+
+    assert results.dtype == np.uint16
+    assert np.array_equal(np.load(tmp_path / "frame.npy"), renderer.compute())
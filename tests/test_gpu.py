@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from src.burning_ship import BurningShip
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet
+from src.lyapunov import Lyapunov
+from src.mandelbrot import Mandelbrot
+from src.perturbation import PerturbedMandelbrot
+from src.progressive import ProgressiveRender
+from src.render import Renderer
+
+# The simulator runs every thread in Python, so frames are kept tiny
+FRACTALS = [
+    (Mandelbrot(max_iterations=60), ComplexPoint(-0.5, 0), 3),
+    (
+        JuliaSet(max_iterations=60, parameter=ComplexPoint(-0.8, 0.156)),
+        ComplexPoint(0, 0),
+        3,
+    ),
+    (BurningShip(max_iterations=60), ComplexPoint(-0.5, -0.5), 3),
+    (Lyapunov(max_iterations=60, sequence="AB"), ComplexPoint(3, 3), 1),
+]
+
+
+@pytest.mark.parametrize("fractal, center, size", FRACTALS)
+def test_gpu_matches_jit(fractal, center, size):
+    grid = generate_square_grid(center=center, side_length=size, divisions=10)
+
+    results = {
+        mode: Renderer(fractal=fractal, grid=grid, mode=mode, samples=2).compute()
+        for mode in ["jit", "gpu"]
+    }
+
+    assert np.allclose(results["gpu"], results["jit"])
+
+
+@pytest.mark.parametrize("strategy", ["adaptive", "subdivide"])
+def test_gpu_strategies(strategy):
+    grid = generate_square_grid(
+        center=ComplexPoint(-0.5, 0), side_length=3, divisions=10
+    )
+
+    renderers = {
+        mode: Renderer(
+            fractal=Mandelbrot(max_iterations=60),
+            grid=grid,
+            mode=mode,
+            samples=2,
+            strategy=strategy,
+        )
+        for mode in ["jit", "gpu"]
+    }
+    results = {mode: renderer.compute() for mode, renderer in renderers.items()}
+
+    assert np.array_equal(results["gpu"], results["jit"])
+    if strategy == "adaptive":
+        assert renderers["gpu"].samples_spent == renderers["jit"].samples_spent
+    else:
+        assert renderers["gpu"].samples_spent == results["gpu"].size * 4
+
+
+def test_gpu_unsupported():
+    grid = generate_square_grid(center=ComplexPoint(0, 0), side_length=3, divisions=10)
+
+    perturbed_mandelbrot = PerturbedMandelbrot(
+        max_iterations=60, center_x="-0.5", center_y="0", side_length=3
+    )
+    with pytest.raises(ValueError):
+        Renderer(fractal=perturbed_mandelbrot, grid=grid, mode="gpu")
+
+    with pytest.raises(ValueError):
+        ProgressiveRender(fractal=Mandelbrot(max_iterations=60), grid=grid, mode="gpu")
@@ -1,4 +1,11 @@
-from src.grid import ComplexPoint, generate_grid
+import numpy as np
+
+from src.grid import (
+    ComplexPoint,
+    generate_grid,
+    generate_sample_grid,
+    generate_square_grid,
+)
 
 
 def test_complex_point():
@@ -20,3 +27,20 @@ def test_generate_grid():
 
     assert y_grid[0] == -0.8
     assert y_grid[-1] == 0.8
+
+
+def test_generate_sample_grid():
+    grid = generate_square_grid(ComplexPoint(-0.7, 0.1), 3.3, 40)
+    x_step, y_step = grid.steps()
+
+    x_samples = generate_sample_grid(grid.x_grid, x_step, divisions=5)
+
+    assert x_samples.shape == (40, 5)
+    for i, x_center in enumerate(grid.x_grid):
+        x_grid, _ = generate_grid(x_center, 0, x_step, y_step)
+        assert np.array_equal(x_samples[i], x_grid)
+
+    _, y_samples = grid.sample_grids(divisions=3)
+
+    assert y_samples.shape == (20, 3)
+    assert y_samples[0, 1] == grid.y_grid[-1]
@@ -1,3 +1,4 @@
+import numpy as np
 from numba.extending import is_jitted
 
 from src.grid import ComplexPoint
@@ -6,6 +7,7 @@ from src.julia import (
     julia_escape,
     julia_escape_jit,
     julia_escape_gpu,
+    julia_escape_numpy,
 )
 
 
@@ -120,3 +122,15 @@ def test_julia_class():
     average_escape_jit = julia.build_average_escape_function(mode="jit")
     assert is_jitted(average_escape_jit)
     assert average_escape_jit([0], [0]) == 1000
+
+
+def test_julia_escape_numpy():
+    x_grid = np.linspace(-1.6, 1.6, 50)
+    y_grid = np.linspace(-1, 1, 30)
+
+    counts = julia_escape_numpy(x_grid[None, :], y_grid[:, None], 300, -0.8, 0.156)
+
+    assert np.array_equal(
+        counts,
+        [[julia_escape_jit(x, y, 300, -0.8, 0.156) for x in x_grid] for y in y_grid],
+    )
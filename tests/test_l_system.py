@@ -0,0 +1,61 @@
+from src.l_system import LSystem
+
+
+def naive_generation(axiom: str, rules: dict[str, str], n: int) -> str:
+    for iteration in range(n):
+        axiom = "".join(rules.get(char, char) for char in axiom)
+
+    return axiom
+
+
+systems = [
+    ("A", {"A": "AB", "B": "A"}),
+    ("F", {"F": "F+F-F-F+F"}),
+    ("FX", {"X": "X+YF+", "Y": "-FX-Y"}),
+    ("X", {"X": "F+[[X]-X]-F[-FX]+X", "F": "FF"}),
+]
+
+
+def test_get_generation():
+    for axiom, rules in systems:
+        system = LSystem(axiom, rules)
+
+        for n in range(6):
+            assert system.get_generation(n) == naive_generation(axiom, rules, n)
+
+
+def test_symbols_match_generation():
+    for axiom, rules in systems:
+        system = LSystem(axiom, rules)
+        generation = system.get_generation(7)
+
+        assert "".join(system.symbols(7)) == generation
+        for chunk_size in [1, 5, 100]:
+            assert "".join(system.chunks(7, chunk_size=chunk_size)) == generation
+
+
+def test_symbol_counts():
+    for axiom, rules in systems:
+        system = LSystem(axiom, rules)
+
+        for n in range(8):
+            generation = system.get_generation(n)
+
+            assert system.length(n) == len(generation)
+            assert system.symbol_counts(n) == {
+                symbol: generation.count(symbol) for symbol in system.alphabet
+            }
+
+
+def test_fibonacci_length():
+    system = LSystem("A", {"A": "AB", "B": "A"})
+
+    assert system.length(100) == 927372692193078999176
+
+
+def test_unicode_symbols():
+    system = LSystem("α", {"α": "αβ", "β": "α"})
+
+    assert system.replacements is None
+    assert system.get_generation(6) == naive_generation("α", system.rules, 6)
+    assert "".join(system.symbols(6)) == system.get_generation(6)
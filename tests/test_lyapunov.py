@@ -0,0 +1,82 @@
+import numpy as np
+from numba.extending import is_jitted
+
+from src.lyapunov import (
+    Lyapunov,
+    lyapunov_escape,
+    lyapunov_escape_jit,
+    lyapunov_escape_numpy,
+)
+
+SEQUENCE = np.array([1, 0])
+
+
+def test_lyapunov_escape():
+    # Superstable at x = 1/2
+    assert lyapunov_escape(2, 2, 1000, SEQUENCE) == -np.inf
+
+    # Attracting period 2 orbit
+    assert lyapunov_escape(3.2, 3.2, 1000, SEQUENCE) < 0
+
+    # Chaotic, with a base 2 exponent of about 0.73 scaled by max_iterations
+    assert 700 < lyapunov_escape(3.9, 3.9, 1000, SEQUENCE) < 750
+
+
+def test_lyapunov_escape_jit():
+    for input_x, input_y in [(2, 2), (3.2, 3.2), (3.9, 3.9), (3.8, 3.5), (2.5, 3.9)]:
+        assert lyapunov_escape_jit(input_x, input_y, 1000, SEQUENCE) == (
+            lyapunov_escape(input_x, input_y, 1000, SEQUENCE)
+        )
+
+
+def test_lyapunov_sequence():
+    # The sequence selects the r value, so swapping A and B swaps the axes
+    assert lyapunov_escape_jit(3.8, 3.5, 1000, np.array([1, 1, 0])) == (
+        lyapunov_escape_jit(3.5, 3.8, 1000, np.array([0, 0, 1]))
+    )
+    assert lyapunov_escape_jit(3.8, 3.5, 1000, np.array([1, 1, 0])) != (
+        lyapunov_escape_jit(3.8, 3.5, 1000, np.array([1, 0]))
+    )
+
+
+def test_lyapunov_early_exit():
+    for input_x, input_y in [(3.2, 3.2), (3.9, 3.9), (3.8, 3.5)]:
+        full = lyapunov_escape_jit(input_x, input_y, 5000, SEQUENCE, 100, 16, 0.0)
+        converged = lyapunov_escape_jit(input_x, input_y, 5000, SEQUENCE, 100, 16, 1e-4)
+
+        assert np.sign(converged) == np.sign(full)
+        assert abs(converged - full) < 0.05 * abs(full)
+
+
+def test_lyapunov_class():
+    lyapunov = Lyapunov(max_iterations=1000, sequence="AB", tolerance=0.0)
+
+    average_escape_normal = lyapunov.build_average_escape_function(mode="normal")
+    average_escape_jit = lyapunov.build_average_escape_function(mode="jit")
+
+    assert is_jitted(average_escape_jit)
+    assert average_escape_jit([3.9], [3.9]) == average_escape_normal([3.9], [3.9])
+    assert average_escape_jit([3.9], [3.9]) == lyapunov_escape(3.9, 3.9, 1000, SEQUENCE)
+
+
+def test_lyapunov_escape_numpy():
+    x_grid = np.linspace(2.2, 4, 30)
+    y_grid = np.linspace(2.2, 4, 20)
+
+    for tolerance in [0.0, 1e-4]:
+        results = lyapunov_escape_numpy(
+            x_grid[None, :], y_grid[:, None], 1000, SEQUENCE, 10, 16, tolerance
+        )
+        expected = np.array(
+            [
+                [
+                    lyapunov_escape_jit(x, y, 1000, SEQUENCE, 10, 16, tolerance)
+                    for x in x_grid
+                ]
+                for y in y_grid
+            ]
+        )
+
+        assert np.array_equal(np.isinf(results), np.isinf(expected))
+        finite = np.isfinite(expected)
+        assert np.allclose(results[finite], expected[finite], rtol=1e-9)
@@ -1,9 +1,15 @@
+import numpy as np
 from numba.extending import is_jitted
 
 from src.mandelbrot import (
     mandelbrot_escape,
     mandelbrot_escape_jit,
+    mandelbrot_escape_numpy,
     mandelbrot_escape_gpu_jit,
+    mandelbrot_escape_shortcut,
+    mandelbrot_escape_shortcut_jit,
+    mandelbrot_interior,
+    mandelbrot_interior_jit,
     Mandelbrot,
 )
 
@@ -47,3 +53,53 @@ def test_mandelbrot_class():
     average_escape_jit = mandelbrot.build_average_escape_function(mode="jit")
     assert is_jitted(average_escape_jit)
     assert average_escape_jit([0], [0]) == 1000
+
+
+def test_mandelbrot_interior():
+    assert mandelbrot_interior(0, 0)
+    assert mandelbrot_interior(-1, 0)
+    assert mandelbrot_interior_jit(-0.1, 0.3)
+    assert not mandelbrot_interior(-0.75, 0.3)
+    assert not mandelbrot_interior_jit(1, 0)
+
+
+def test_mandelbrot_escape_shortcut_matches():
+    x_grid = np.linspace(-2.1, 0.7, 120)
+    y_grid = np.linspace(-1.3, 1.3, 80)
+
+    for input_x in x_grid:
+        for input_y in y_grid:
+            expected = mandelbrot_escape_jit(input_x, input_y, 2000)
+
+            assert mandelbrot_escape_shortcut_jit(input_x, input_y, 2000) == expected
+
+    for input_x in x_grid[::4]:
+        for input_y in y_grid[::4]:
+            assert mandelbrot_escape_shortcut(input_x, input_y, 200) == (
+                mandelbrot_escape(input_x, input_y, 200)
+            )
+
+
+def test_mandelbrot_interior_checks_selection():
+    assert Mandelbrot(max_iterations=100).jit_function is mandelbrot_escape_shortcut_jit
+    assert (
+        Mandelbrot(max_iterations=100, interior_checks=False).jit_function
+        is mandelbrot_escape_jit
+    )
+
+
+def test_mandelbrot_escape_numpy():
+    x_grid = np.linspace(-2.1, 0.7, 60)
+    y_grid = np.linspace(-1.3, 1.3, 40)
+
+    expected = np.array(
+        [[mandelbrot_escape_jit(x, y, 500) for x in x_grid] for y in y_grid]
+    )
+
+    for interior_checks in [True, False]:
+        counts = mandelbrot_escape_numpy(
+            x_grid[None, :], y_grid[:, None], 500, interior_checks
+        )
+
+        assert counts.shape == (40, 60)
+        assert np.array_equal(counts, expected)
@@ -0,0 +1,183 @@
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+from src.grid import ComplexPoint, generate_square_grid
+from src.mandelbrot import Mandelbrot
+from src.perturbation import (
+    PerturbedMandelbrot,
+    perturbation_escape,
+    perturbation_offsets,
+    reference_orbit,
+)
+from src.render import render
+
+# A point on the boundary of the set found by bisection along y = 0.11
+BOUNDARY_X = "-0.740910148767786192206219086538576190509503003033444080544251609104844"
+BOUNDARY_Y = "0.11"
+
+
+def mandelbrot_escape_decimal(
+    input_x: Decimal, input_y: Decimal, max_iterations: int
+) -> int:
+    x_loop = y_loop = Decimal(0)
+
+    iter = 0
+    while (x_loop**2 + y_loop**2) <= 4 and iter < max_iterations:
+        x_new = x_loop**2 - y_loop**2 + input_x
+        y_loop = 2 * x_loop * y_loop + input_y
+        x_loop = x_new
+
+        iter += 1
+
+    return iter
+
+
+def test_reference_orbit():
+    reference_x, reference_y = reference_orbit(Decimal(0), Decimal(0), 100, 20)
+    assert len(reference_x) == 101
+    assert not reference_x.any() and not reference_y.any()
+
+    reference_x, reference_y = reference_orbit(Decimal(1), Decimal(0), 100, 20)
+    assert reference_x.tolist() == [0, 1, 2, 5]
+
+
+def test_perturbation_matches_float64():
+    perturbed_mandelbrot = PerturbedMandelbrot(
+        max_iterations=500, center_x="-0.745", center_y="0.11", side_length=0.01
+    )
+    results = render(
+        grid=perturbed_mandelbrot.delta_grid(divisions=40),
+        average_escape_field_function=perturbed_mandelbrot.build_average_escape_field_function(
+            mode="jit"
+        ),
+        samples=1,
+    )
+
+    expected = render(
+        grid=generate_square_grid(ComplexPoint(-0.745, 0.11), 0.01, 40),
+        average_escape_field_function=Mandelbrot(
+            max_iterations=500
+        ).build_average_escape_field_function(mode="jit"),
+        samples=1,
+    )
+
+    assert np.mean(results == expected) > 0.98
+
+
+def test_perturbation_escaping_reference():
+    # The reference orbit escapes after a few steps, so pixels are rebased
+    perturbed_mandelbrot = PerturbedMandelbrot(
+        max_iterations=100, center_x="0.5", center_y="0.5", side_length=0.5
+    )
+    assert len(perturbed_mandelbrot.reference_x) < 10
+
+    for delta_x, delta_y in [(0, 0), (-0.2, 0.1), (-0.25, -0.25)]:
+        assert perturbation_escape(
+            delta_x,
+            delta_y,
+            100,
+            perturbed_mandelbrot.reference_x,
+            perturbed_mandelbrot.reference_y,
+        ) == mandelbrot_escape_decimal(
+            Decimal(0.5 + delta_x), Decimal(0.5 + delta_y), 100
+        )
+
+
+def test_perturbation_deep_zoom():
+    perturbed_mandelbrot = PerturbedMandelbrot(
+        max_iterations=3000, center_x=BOUNDARY_X, center_y=BOUNDARY_Y, side_length=1e-30
+    )
+    grid = perturbed_mandelbrot.delta_grid(divisions=20)
+
+    results = render(
+        grid=grid,
+        average_escape_field_function=perturbed_mandelbrot.build_average_escape_field_function(
+            mode="jit"
+        ),
+        samples=1,
+    )
+    assert len(np.unique(results)) > 5
+
+    x_samples, y_samples = grid.sample_grids(divisions=1)
+    with localcontext() as context:
+        context.prec = 60
+
+        for j, i in [(0, 0), (3, 4), (5, 10), (9, 19)]:
+            assert results[j, i] == mandelbrot_escape_decimal(
+                Decimal(BOUNDARY_X) + Decimal(x_samples[i, 0]),
+                Decimal(BOUNDARY_Y) + Decimal(y_samples[j, 0]),
+                3000,
+            )
+
+
+def test_series_approximation():
+    perturbed_mandelbrot = PerturbedMandelbrot(
+        max_iterations=3000, center_x=BOUNDARY_X, center_y=BOUNDARY_Y, side_length=1e-30
+    )
+    assert perturbed_mandelbrot.series_skip > 1000
+    assert perturbed_mandelbrot.iterations_saved(10) == (
+        perturbed_mandelbrot.series_skip * 10
+    )
+
+    grid = perturbed_mandelbrot.delta_grid(divisions=20)
+    x_samples, y_samples = grid.sample_grids(divisions=1)
+    a, b, c = perturbed_mandelbrot.series_coefficients
+    skip = perturbed_mandelbrot.series_skip
+
+    # The approximated offsets match fully iterated ones at the skipped iteration
+    for j, i in [(0, 0), (5, 10), (9, 19)]:
+        u = complex(x_samples[i, 0], y_samples[j, 0]) / perturbed_mandelbrot.radius
+        x_offsets, y_offsets = perturbation_offsets(
+            x_samples[i, 0],
+            y_samples[j, 0],
+            perturbed_mandelbrot.reference_x,
+            perturbed_mandelbrot.reference_y,
+            skip,
+        )
+
+        assert len(x_offsets) == skip + 1
+        assert abs(
+            ((c * u + b) * u + a) * u - complex(x_offsets[-1], y_offsets[-1])
+        ) <= 1e-6 * abs(complex(x_offsets[-1], y_offsets[-1]))
+
+
+def test_series_approximation_matches_full_iteration():
+    results = {}
+    for series in [False, True]:
+        perturbed_mandelbrot = PerturbedMandelbrot(
+            max_iterations=3000,
+            center_x=BOUNDARY_X,
+            center_y=BOUNDARY_Y,
+            side_length=1e-30,
+            series=series,
+        )
+        results[series] = render(
+            grid=perturbed_mandelbrot.delta_grid(divisions=30),
+            average_escape_field_function=perturbed_mandelbrot.build_average_escape_field_function(
+                mode="jit"
+            ),
+            samples=1,
+        )
+
+    assert np.mean(results[True] == results[False]) > 0.99
+
+
+def test_perturbation_numpy():
+    perturbed_mandelbrot = PerturbedMandelbrot(
+        max_iterations=3000, center_x=BOUNDARY_X, center_y=BOUNDARY_Y, side_length=1e-30
+    )
+    grid = perturbed_mandelbrot.delta_grid(divisions=30)
+
+    results = {
+        mode: render(
+            grid=grid,
+            average_escape_field_function=perturbed_mandelbrot.build_average_escape_field_function(
+                mode=mode
+            ),
+            samples=2,
+        )
+        for mode in ["jit", "numpy"]
+    }
+
+    assert np.array_equal(results["numpy"], results["jit"])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.burning_ship import BurningShip
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet
+from src.lyapunov import Lyapunov
+from src.mandelbrot import Mandelbrot, mandelbrot_escape_resume_jit
+from src.progressive import ProgressiveRender
+from src.render import render
+
+
+def test_mandelbrot_escape_resume():
+    x_loop, y_loop, iter = mandelbrot_escape_resume_jit(0.4, 0.5, 0.0, 0.0, 0, 5)
+    assert iter == 5
+
+    _, _, iter = mandelbrot_escape_resume_jit(0.4, 0.5, x_loop, y_loop, iter, 1000)
+    assert iter == 7
+
+    _, _, iter = mandelbrot_escape_resume_jit(0, 0, 0.0, 0.0, 0, 10)
+    assert iter == -1
+
+
+@pytest.mark.parametrize(
+    "make_fractal",
+    [
+        lambda max_iterations: Mandelbrot(max_iterations=max_iterations),
+        lambda max_iterations: JuliaSet(
+            max_iterations=max_iterations, parameter=ComplexPoint(-0.8, 0.156)
+        ),
+        lambda max_iterations: BurningShip(max_iterations=max_iterations),
+    ],
+)
+def test_progressive_render_matches_render(make_fractal):
+    grid = generate_square_grid(ComplexPoint(-0.745, 0.11), 0.05, 40)
+
+    progressive_render = ProgressiveRender(
+        fractal=make_fractal(1), grid=grid, mode="jit", samples=2
+    )
+
+    active = progressive_render.active
+    for max_iterations, frame in zip(
+        [10, 100, 300], progressive_render.refine_progressively([10, 100, 300])
+    ):
+        expected = render(
+            grid=grid,
+            average_escape_field_function=make_fractal(
+                max_iterations
+            ).build_average_escape_field_function(mode="jit"),
+            samples=2,
+        )
+
+        assert np.array_equal(frame, expected)
+        assert progressive_render.active <= active
+        active = progressive_render.active
+
+
+def test_progressive_render_normal_mode():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 10)
+    progressive_render = ProgressiveRender(
+        fractal=Mandelbrot(max_iterations=1), grid=grid, mode="normal", samples=1
+    )
+
+    progressive_render.refine(20)
+    frame = progressive_render.refine(50)
+
+    expected = render(
+        grid=grid,
+        average_escape_field_function=Mandelbrot(
+            max_iterations=50
+        ).build_average_escape_field_function(mode="normal"),
+        samples=1,
+    )
+
+    assert np.array_equal(frame, expected)
+
+    with pytest.raises(ValueError):
+        progressive_render.refine(10)
+
+
+def test_progressive_render_unsupported():
+    grid = generate_square_grid(ComplexPoint(2, 2), 1, 10)
+
+    with pytest.raises(ValueError):
+        ProgressiveRender(fractal=Lyapunov(max_iterations=10, sequence="AB"), grid=grid)
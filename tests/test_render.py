@@ -0,0 +1,268 @@
+import io
+
+import numpy as np
+
+from src.burning_ship import BurningShip
+from src.grid import ComplexPoint, generate_grid, generate_square_grid
+from src.julia import JuliaSet
+from src.lyapunov import Lyapunov
+from src.mandelbrot import Mandelbrot
+from src.render import Renderer, render, render_adaptive, render_subdivided
+
+
+def render_per_cell(grid, average_escape_function):
+    x_grid, y_grid = grid.x_grid, grid.y_grid
+    x_unit_length, y_unit_length = grid.steps()
+
+    results = np.empty(shape=(len(y_grid), len(x_grid)))
+
+    for j in range(len(y_grid)):
+        for i in range(len(x_grid)):
+            x_sample_grid, y_sample_grid = generate_grid(
+                x_center=x_grid[i],
+                y_center=y_grid[-(j + 1)],
+                x_length=x_unit_length,
+                y_length=y_unit_length,
+            )
+            results[j, i] = average_escape_function(x_sample_grid, y_sample_grid)
+
+    return results
+
+
+def test_render_matches_per_cell():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 30)
+
+    for fractal in [
+        Mandelbrot(max_iterations=50),
+        JuliaSet(max_iterations=50, parameter=ComplexPoint(-0.8, 0.156)),
+    ]:
+        for mode in ["normal", "jit"]:
+            results = render(
+                grid=grid,
+                average_escape_field_function=fractal.build_average_escape_field_function(
+                    mode=mode
+                ),
+            )
+            expected = render_per_cell(
+                grid, fractal.build_average_escape_function(mode=mode)
+            )
+
+            assert results.shape == (15, 30)
+            assert np.array_equal(results, expected)
+
+
+def test_render_samples():
+    grid = generate_square_grid(ComplexPoint(0, 0), 4, 10)
+    mandelbrot = Mandelbrot(max_iterations=20)
+
+    results = render(
+        grid=grid,
+        average_escape_field_function=mandelbrot.build_average_escape_field_function(
+            mode="jit"
+        ),
+        samples=1,
+    )
+
+    assert results.shape == (5, 10)
+    assert results[2, 5] == 20
+
+
+def test_render_parallel_matches_jit():
+    grid = generate_square_grid(ComplexPoint(-0.75, 0.1), 0.5, 40)
+
+    for fractal in [
+        Mandelbrot(max_iterations=200),
+        JuliaSet(max_iterations=200, parameter=ComplexPoint(-0.8, 0.156)),
+        BurningShip(max_iterations=200),
+    ]:
+        expected = render(
+            grid=grid,
+            average_escape_field_function=fractal.build_average_escape_field_function(
+                mode="jit"
+            ),
+        )
+
+        for workers in [None, 1]:
+            results = render(
+                grid=grid,
+                average_escape_field_function=fractal.build_average_escape_field_function(
+                    mode="parallel", workers=workers
+                ),
+            )
+
+            assert np.array_equal(results, expected)
+
+
+def test_render_adaptive():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 60)
+    mandelbrot = Mandelbrot(max_iterations=100)
+
+    expected = render(
+        grid=grid,
+        average_escape_field_function=mandelbrot.build_average_escape_field_function(
+            mode="jit"
+        ),
+    )
+
+    for mode in ["normal", "jit", "parallel"]:
+        results, samples_spent = render_adaptive(
+            grid=grid,
+            adaptive_average_escape_field_function=mandelbrot.build_adaptive_average_escape_field_function(
+                mode=mode
+            ),
+        )
+
+        assert results.shape == expected.shape
+        assert samples_spent < expected.size * 25 * 0.75
+        assert np.mean(results != expected) < 0.05
+
+        # Flat interior cells keep their single probe sample
+        assert results[15, 40] == expected[15, 40] == 100
+
+
+def test_render_adaptive_tolerance():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 20)
+    adaptive_average_escape_field_function = Mandelbrot(
+        max_iterations=50
+    ).build_adaptive_average_escape_field_function(mode="jit")
+
+    _, samples_spent = render_adaptive(
+        grid=grid,
+        adaptive_average_escape_field_function=adaptive_average_escape_field_function,
+        tolerance=50,
+    )
+
+    assert samples_spent == 200
+
+
+def test_render_subdivided_matches_full():
+    grid = generate_square_grid(ComplexPoint(-0.5, -0.5), 3.5, 80)
+
+    for fractal in [
+        Mandelbrot(max_iterations=100),
+        JuliaSet(max_iterations=100, parameter=ComplexPoint(-0.8, 0.156)),
+        BurningShip(max_iterations=100),
+    ]:
+        expected = render(
+            grid=grid,
+            average_escape_field_function=fractal.build_average_escape_field_function(
+                mode="jit"
+            ),
+            samples=1,
+        )
+
+        for mode in ["normal", "jit", "parallel"]:
+            results, cells_evaluated = render_subdivided(
+                grid=grid,
+                subdivided_average_escape_field_function=fractal.build_subdivided_average_escape_field_function(
+                    mode=mode
+                ),
+                samples=1,
+                block_size=16,
+            )
+
+            assert np.array_equal(results, expected)
+            assert cells_evaluated < results.size
+
+
+def test_renderer_strategies():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+
+    results = {}
+    for strategy in ["full", "adaptive", "subdivide"]:
+        renderer = Renderer(
+            fractal=Mandelbrot(max_iterations=100),
+            grid=grid,
+            mode="jit",
+            strategy=strategy,
+        )
+        results[strategy] = renderer.compute()
+
+        assert 0 < renderer.samples_spent <= results[strategy].size * 25
+
+    assert np.array_equal(results["subdivide"], results["full"])
+
+
+def test_renderer_stream():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+
+    for strategy in ["full", "adaptive", "subdivide"]:
+        renderer = Renderer(
+            fractal=Mandelbrot(max_iterations=100),
+            grid=grid,
+            mode="jit",
+            strategy=strategy,
+        )
+        bands = list(renderer.stream(band_size=6))
+
+        assert [band.shape for band in bands] == [(6, 40)] * 3 + [(2, 40)]
+        if strategy != "adaptive":
+            assert np.array_equal(np.vstack(bands), renderer.compute())
+
+
+def test_renderer_render():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+    renderer = Renderer(fractal=Mandelbrot(max_iterations=100), grid=grid, mode="jit")
+
+    output = io.StringIO()
+    renderer.render(band_size=7, file=output)
+    lines = output.getvalue().splitlines()
+
+    assert len(lines) == 20
+    assert all(len(line) == 40 for line in lines)
+    assert lines[10][27] == "@"
+
+
+def test_render_numpy_matches_jit():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+
+    for fractal in [
+        Mandelbrot(max_iterations=200),
+        JuliaSet(max_iterations=200, parameter=ComplexPoint(-0.8, 0.156)),
+        BurningShip(max_iterations=200),
+    ]:
+        for strategy in ["full", "adaptive", "subdivide"]:
+            results = {}
+            for mode in ["jit", "numpy"]:
+                renderer = Renderer(
+                    fractal=fractal, grid=grid, mode=mode, strategy=strategy
+                )
+                results[mode] = renderer.compute()
+
+            if strategy == "subdivide":
+                assert renderer.samples_spent == results["numpy"].size * 25
+            else:
+                assert np.array_equal(results["numpy"], results["jit"])
+
+
+def test_renderer_compact():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+
+    for fractal, dtype in [
+        (Mandelbrot(max_iterations=100), np.uint16),
+        (Lyapunov(max_iterations=100, sequence="AB"), np.float32),
+    ]:
+        if isinstance(fractal, Lyapunov):
+            grid = generate_square_grid(ComplexPoint(3, 3), 1, 40)
+
+        full = Renderer(fractal=fractal, grid=grid, mode="jit").compute()
+        compact = Renderer(fractal=fractal, grid=grid, mode="jit", compact=True)
+        results = compact.compute()
+
+        assert results.dtype == dtype
+        np.testing.assert_allclose(results, full, atol=0.5, rtol=1e-6)
+
+    assert Mandelbrot(max_iterations=100_000).result_dtype() == np.uint32
+
+
+def test_renderer_save(tmp_path):
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+    renderer = Renderer(
+        fractal=Mandelbrot(max_iterations=100), grid=grid, mode="jit", compact=True
+    )
+
+    renderer.save(str(tmp_path / "frame.npy"), band_size=6)
+    saved = np.load(tmp_path / "frame.npy")
+
+    assert saved.dtype == np.uint16
+    assert np.array_equal(saved, renderer.compute())
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from src.grid import ComplexPoint, generate_square_grid
+from src.sierpinski import (
+    ChaosGame,
+    IteratedFunctionSystem,
+    barnsley_fern,
+    compile_chaos_game,
+    shapes,
+    sierpinski_triangle,
+)
+
+
+def test_modes_match():
+    for make_system in shapes.values():
+        system = make_system()
+        grid = system.fit_grid(divisions=40)
+
+        results = {
+            mode: ChaosGame(
+                system, grid, points=20_000, mode=mode, walkers=16, batch_size=500
+            ).compute()
+            for mode in ["normal", "jit", "parallel", "numpy"]
+        }
+
+        for mode in ["normal", "parallel", "numpy"]:
+            assert np.array_equal(results[mode], results["jit"])
+
+
+def test_histograms_merge():
+    system = barnsley_fern()
+    grid = system.fit_grid(divisions=40)
+    x_step, y_step = grid.steps()
+    seeds = np.random.default_rng(1).integers(1, 2**32, size=12)
+
+    merged = []
+    for groups in [1, 3, 4]:
+        counts = np.zeros(shape=(groups, 20, 40), dtype=np.int64)
+        compile_chaos_game(False)(
+            system.maps,
+            system.cumulative,
+            np.zeros(12),
+            np.zeros(12),
+            seeds.copy(),
+            1000,
+            20,
+            counts,
+            grid.x_grid[0] - x_step / 2,
+            grid.y_grid[-1] + y_step / 2,
+            x_step,
+            y_step,
+        )
+        merged.append(counts.sum(axis=0))
+
+    assert merged[0].sum() == 12 * 980
+    assert np.array_equal(merged[0], merged[1])
+    assert np.array_equal(merged[0], merged[2])
+
+
+def test_triangle():
+    system = sierpinski_triangle()
+    grid = generate_square_grid(ComplexPoint(0.5, 0.45), 1.2, 60)
+    counts = ChaosGame(system, grid, points=256 * 200, mode="jit").compute()
+
+    # Every point lands in the view, none in the removed middle triangle
+    assert counts.sum() == 256 * 200
+    x_centers, y_centers = grid.probe_grids()
+    middle = (np.abs(x_centers[None, :] - 0.5) < 0.05) & (
+        np.abs(y_centers[:, None] - 0.29) < 0.05
+    )
+    assert middle.any() and counts[middle].sum() == 0
+
+
+def test_seeds():
+    system = sierpinski_triangle()
+    grid = system.fit_grid(divisions=40)
+
+    first, second, other = [
+        ChaosGame(system, grid, points=10_000, mode="jit", seed=seed).compute()
+        for seed in [0, 0, 1]
+    ]
+
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, other)
+
+
+def test_probabilities():
+    with pytest.raises(ValueError):
+        IteratedFunctionSystem([(0.5, 0, 0, 0.5, 0, 0)], probabilities=[1, 2])
+    with pytest.raises(ValueError):
+        IteratedFunctionSystem(
+            [(0.5, 0, 0, 0.5, 0, 0), (0.5, 0, 0, 0.5, 0.5, 0)], probabilities=[0, 0]
+        )
+
+    system = IteratedFunctionSystem(
+        [(0.5, 0, 0, 0.5, 0, 0), (0.25, 0, 0, 0.25, 1, 0), (0, 0, 0, 0.5, 0, 0)]
+    )
+    assert system.probabilities[0] == pytest.approx(4 * system.probabilities[1])
+    assert system.probabilities[2] > 0
@@ -0,0 +1,137 @@
+import io
+
+import numpy as np
+
+from src.grid import ComplexPoint, generate_square_grid
+from src.lyapunov import Lyapunov
+from src.mandelbrot import Mandelbrot
+from src.render import Renderer
+from src.stats import RenderStats, add_hook, combine, remove_hook
+
+
+def test_compute_stats():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+    renderer = Renderer(fractal=Mandelbrot(max_iterations=100), grid=grid, mode="jit")
+
+    results = renderer.compute()
+    stats = renderer.stats
+
+    assert stats.cells == results.size
+    assert stats.samples_per_cell == 25
+    assert 0 < stats.iterations <= round(results.sum() * 25)
+    assert stats.capped_fraction == np.mean(results >= 100)
+    assert 0 < stats.capped_fraction < 1
+    assert stats.kernel_seconds > 0 and stats.compile_seconds >= 0
+
+    renderer.compute()
+    assert renderer.stats.cells == results.size
+
+
+def test_adaptive_stats():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+    renderer = Renderer(
+        fractal=Mandelbrot(max_iterations=100),
+        grid=grid,
+        mode="numpy",
+        strategy="adaptive",
+    )
+    renderer.compute()
+
+    assert renderer.stats.compile_seconds == 0
+    assert renderer.stats.samples_spent == renderer.samples_spent
+    assert 1 < renderer.stats.samples_per_cell < 26
+
+
+def test_lyapunov_stats():
+    grid = generate_square_grid(ComplexPoint(3, 3), 1, 20)
+    renderer = Renderer(
+        fractal=Lyapunov(max_iterations=50, sequence="AB"), grid=grid, mode="numpy"
+    )
+    renderer.compute()
+
+    assert renderer.stats.iterations is None
+    assert renderer.stats.capped_fraction is None
+    assert renderer.stats.to_dict()["samples_per_cell"] == 25
+
+
+def test_iterations():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 20)
+    escape_counts = {}
+    iterations = {}
+
+    for interior_checks in [False, True]:
+        fractal = Mandelbrot(max_iterations=200, interior_checks=interior_checks)
+        for mode in ["normal", "jit", "parallel"]:
+            renderer = Renderer(fractal=fractal, grid=grid, mode=mode, samples=2)
+            results = renderer.compute()
+
+            escape_counts[interior_checks, mode] = round(results.sum() * 4)
+            iterations[interior_checks, mode] = renderer.stats.iterations
+
+    # Interior checks report the same counts with far fewer iterations, and
+    # every mode counts the same iterations
+    for mode in ["normal", "jit", "parallel"]:
+        assert escape_counts[True, mode] == escape_counts[False, mode]
+        assert iterations[False, mode] == escape_counts[False, mode]
+        assert iterations[True, mode] < iterations[False, mode] / 2
+        assert iterations[True, mode] == iterations[True, "jit"]
+
+    # Adaptive sampling and subdivision count only the samples they take, here
+    # one probe per cell and the cells on the borders of uniform blocks
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 60)
+    counts = {}
+    for strategy in ["full", "adaptive", "subdivide"]:
+        renderer = Renderer(
+            fractal=Mandelbrot(max_iterations=200, interior_checks=False),
+            grid=grid,
+            mode="jit",
+            samples=2,
+            strategy=strategy,
+            tolerance=200,
+            block_size=4,
+        )
+        renderer.compute()
+        counts[strategy] = renderer.stats.iterations
+
+    assert 0 < counts["adaptive"] < counts["full"]
+    assert 0 < counts["subdivide"] < counts["full"]
+
+    lyapunov = Renderer(
+        fractal=Lyapunov(max_iterations=50, sequence="AB"),
+        grid=generate_square_grid(ComplexPoint(3, 3), 1, 20),
+        mode="jit",
+    )
+    lyapunov.compute()
+
+    # Each orbit also runs at least one transient step
+    assert 0 < lyapunov.stats.iterations <= lyapunov.stats.samples_spent * 51
+
+
+def test_hooks():
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 40)
+    renderer = Renderer(fractal=Mandelbrot(max_iterations=100), grid=grid, mode="jit")
+
+    reports = []
+    add_hook(reports.append)
+    try:
+        renderer.compute()
+        renderer.render(band_size=6, file=io.StringIO())
+        bands = list(renderer.stream(band_size=6))
+    finally:
+        remove_hook(reports.append)
+    renderer.compute()
+
+    assert len(reports) == 3
+    assert reports[1].cells == reports[0].cells == sum(band.size for band in bands)
+    assert reports[1].iterations == reports[0].iterations
+    assert reports[1].output_seconds > 0
+
+
+def test_combine():
+    first = RenderStats("Mandelbrot", "jit", "full", cells=10, iterations=100)
+    second = RenderStats("Mandelbrot", "jit", "full", cells=5, iterations=50)
+    uncounted = RenderStats("Mandelbrot", "numpy", "full", cells=5, iterations=None)
+
+    assert combine([first, second]).cells == 15
+    assert combine([first, second]).iterations == 150
+    assert combine([first, uncounted]).iterations is None
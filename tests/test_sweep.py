@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet
+from src.render import Renderer
+from src.sweep import JuliaSweep
+
+
+def grid_shape(grid):
+    return len(grid.y_grid), len(grid.x_grid)
+
+
+PARAMETERS = np.array([-0.8 + 0.156j, 0.285 + 0.01j, -0.4 + 0.6j, -0.835 - 0.2321j])
+
+
+@pytest.mark.parametrize("mode", ["normal", "jit", "parallel", "numpy"])
+def test_julia_sweep(mode):
+    grid = generate_square_grid(ComplexPoint(0, 0), 3, 12)
+
+    sweep = JuliaSweep(max_iterations=100, grid=grid, mode=mode, samples=2)
+    results = sweep.compute(PARAMETERS)
+
+    assert results.shape == (len(PARAMETERS), *grid_shape(grid))
+    for frame, parameter in zip(results, PARAMETERS):
+        julia = JuliaSet(
+            max_iterations=100, parameter=ComplexPoint(parameter.real, parameter.imag)
+        )
+        expected = Renderer(fractal=julia, grid=grid, mode="jit", samples=2).compute()
+
+        assert np.array_equal(frame, expected)
+
+
+def test_julia_sweep_stream():
+    grid = generate_square_grid(ComplexPoint(0, 0), 3, 12)
+    sweep = JuliaSweep(max_iterations=100, grid=grid, mode="parallel", workers=1)
+
+    frames = list(sweep.stream(PARAMETERS, batch_size=3))
+
+    assert len(frames) == len(PARAMETERS)
+    assert np.array_equal(np.stack(frames), sweep.compute(PARAMETERS))
+
+
+def test_julia_sweep_gpu():
+    grid = generate_square_grid(ComplexPoint(0, 0), 3, 12)
+
+    with pytest.raises(ValueError):
+        JuliaSweep(max_iterations=100, grid=grid, mode="gpu")
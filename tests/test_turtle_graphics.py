@@ -0,0 +1,69 @@
+import io
+
+import numpy as np
+import pytest
+
+from src.l_system import LSystem
+from src.turtle_graphics import TurtleRenderer
+
+plant = LSystem("X", {"X": "F+[[X]-X]-F[-FX]+X", "F": "FF"})
+
+
+def test_square_bounds():
+    renderer = TurtleRenderer(LSystem("F+F+F+F", {}), generations=0, angle=90)
+
+    np.testing.assert_allclose(renderer.bounds(), [0, 1, 0, 1], atol=1e-12)
+
+
+def test_independent_of_chunks():
+    renderers = [
+        TurtleRenderer(plant, generations=5, angle=25, chunk_size=chunk_size)
+        for chunk_size in [1, 64, 1 << 16]
+    ]
+    bounds = [renderer.bounds() for renderer in renderers]
+    counts = [renderer.compute() for renderer in renderers]
+
+    np.testing.assert_allclose(bounds[0], bounds[1])
+    np.testing.assert_allclose(bounds[0], bounds[2])
+    assert np.array_equal(counts[0], counts[1])
+    assert np.array_equal(counts[0], counts[2])
+
+
+def test_unbalanced_brackets():
+    with pytest.raises(ValueError):
+        TurtleRenderer(LSystem("FF", {"F": "[F"}), generations=3, angle=90)
+
+    with pytest.raises(ValueError):
+        TurtleRenderer(LSystem("F]F[", {}), generations=1, angle=90)
+
+
+def test_normal_matches_jit():
+    results = {
+        mode: TurtleRenderer(
+            plant, generations=4, angle=25, heading=65, divisions=60, mode=mode
+        ).compute()
+        for mode in ["normal", "jit"]
+    }
+
+    assert results["jit"].shape == (30, 60)
+    assert np.array_equal(results["normal"], results["jit"])
+
+
+def test_render_square():
+    renderer = TurtleRenderer(
+        LSystem("F+F+F+F", {"F": "F-F+F+FF-F-F+F"}),
+        generations=1,
+        angle=90,
+        divisions=20,
+    )
+
+    output = io.StringIO()
+    renderer.render(file=output)
+    lines = output.getvalue().splitlines()
+
+    assert len(lines) == 10
+    assert all(len(line) == 20 for line in lines)
+    # The drawing touches every side of the frame
+    assert lines[0].strip() and lines[-1].strip()
+    assert any(line[0] != " " for line in lines)
+    assert any(line[-1] != " " for line in lines)
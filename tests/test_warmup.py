@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from src.backend import source_digest
+from src.escape_fractal import (
+    average_escape_field,
+    bind_escape_function,
+    compile_field_function,
+    count_iterations,
+    kernel_name,
+)
+from src.grid import ComplexPoint, generate_square_grid
+from src.julia import JuliaSet, julia_escape, julia_escape_jit
+from src.mandelbrot import Mandelbrot, mandelbrot_orbit_shortcut_jit
+from src.render import render
+from src.warmup import warmup
+
+
+def test_bind_escape_function():
+    specialized = bind_escape_function(
+        average_escape_field, count_iterations(julia_escape, False)
+    )
+
+    assert specialized.__qualname__.startswith(
+        "average_escape_field[src.escape_fractal.counted_escape[src.julia.julia_escape@"
+    )
+    assert specialized.__closure__ is None
+
+    x_samples, y_samples = np.array([[0.0]]), np.array([[0.0, 1.5]])
+    counts = [
+        julia_escape(0, 0, 100, -0.8, 0.156),
+        julia_escape(0, 1.5, 100, -0.8, 0.156),
+    ]
+    results, iterations = specialized(x_samples, y_samples, 100, -0.8, 0.156)
+    assert np.array_equal(results, [[sum(counts) / 2]])
+    assert iterations == sum(counts)
+
+
+def test_unbound_template():
+    x_samples, y_samples = np.array([[0.0]]), np.array([[0.0]])
+
+    with pytest.raises(TypeError, match="escape_function is unbound"):
+        average_escape_field(x_samples, y_samples, 100, -0.8, 0.156)
+
+
+def test_kernel_name(tmp_path):
+    path = tmp_path / "kernel.py"
+    source = "def kernel(x):\n    return x{}\n"
+    names = []
+    for change in ["", " + 0"]:
+        path.write_text(source.format(change))
+        namespace = {}
+        exec(compile(path.read_text(), str(path), "exec"), namespace)
+        source_digest.cache_clear()
+        names.append(kernel_name(namespace["kernel"]))
+
+    # Editing the kernel's file renames the copies bound to it, so numba
+    # compiles them afresh instead of loading stale ones from its disk cache
+    assert names[0] != names[1]
+
+
+def test_compile_field_function():
+    jit_function = compile_field_function(average_escape_field, julia_escape_jit, False)
+    parallel_function = compile_field_function(
+        average_escape_field, julia_escape_jit, True
+    )
+
+    assert (
+        compile_field_function(average_escape_field, julia_escape_jit, False)
+        is jit_function
+    )
+    assert parallel_function is not jit_function
+    assert jit_function.py_func.__qualname__ != parallel_function.py_func.__qualname__
+
+
+def test_field_function_arguments():
+    # Fractals sharing a kernel share one compiled field function, with their
+    # parameters passed as arguments
+    grid = generate_square_grid(ComplexPoint(0, 0), 3, 20)
+
+    results = []
+    for parameter in [ComplexPoint(-0.8, 0.156), ComplexPoint(0.285, 0.01)]:
+        julia = JuliaSet(max_iterations=100, parameter=parameter)
+
+        results.append(
+            {
+                mode: render(
+                    grid, julia.build_average_escape_field_function(mode=mode), 2
+                )
+                for mode in ["normal", "jit"]
+            }
+        )
+
+    for result in results:
+        assert np.array_equal(result["normal"], result["jit"])
+    assert not np.array_equal(results[0]["jit"], results[1]["jit"])
+
+
+def test_warmup():
+    assert warmup(modes=["jit"], strategies=["full"]) == 5 * 2 + 3
+
+    field_function = compile_field_function(
+        average_escape_field, mandelbrot_orbit_shortcut_jit, False
+    )
+    assert len(field_function.signatures) > 0
+
+    grid = generate_square_grid(ComplexPoint(-0.5, 0), 3, 10)
+    mandelbrot = Mandelbrot(max_iterations=100)
+    render(grid, mandelbrot.build_average_escape_field_function(mode="jit"))
+    assert len(field_function.signatures) == 1